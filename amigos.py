@@ -0,0 +1,399 @@
+"""
+Lista de amigos do Amigo Secreto, guardada na sessão (chave "as_friends").
+
+Formato:
+    {"amigos": {id: nome, ...}, "nomes": {nome.casefold(): id, ...}, "versao": 7}
+
+"amigos" é um dict: a ordem de inserção é a ordem da lista (o JSON da sessão
+preserva), e achar/editar/remover por id é O(1), sem varrer nem reconstruir
+a lista. "nomes" é o índice para barrar nome repetido (sem diferenciar
+maiúsculas) também em O(1). Sessões antigas (lista de {"id", "name"} ou de
+strings) são migradas na primeira leitura.
+
+"versao" sobe a cada request que muda a lista; com ela as rotas podem
+responder só o que mudou (delta()) em vez da lista inteira.
+"""
+
+import csv
+import io
+import json
+import os
+import random
+import time
+import uuid
+
+from execucao import TempoEsgotado
+
+AMIGOS_MAX_IMPORTAR = int(os.environ.get("AMIGOS_MAX_IMPORTAR", 5000))  # nomes por importação
+
+
+class AmigoInvalido(ValueError):
+    """Nome/id inválido ou repetido (vira um 400 com a mensagem)."""
+
+    status = 400
+
+
+class AmigoNaoEncontrado(AmigoInvalido):
+    status = 404
+
+
+def chave_nome(nome):
+    return nome.casefold()
+
+
+def _de_lista(itens):
+    """Formato antigo (lista) -> formato indexado."""
+    dados = {"amigos": {}, "nomes": {}, "versao": 0}
+    for item in itens:
+        if isinstance(item, str):
+            item = {"id": uuid.uuid4().hex, "name": item}
+        if not isinstance(item, dict) or not item.get("id") or not item.get("name"):
+            continue
+        chave = chave_nome(item["name"])
+        if chave in dados["nomes"] or item["id"] in dados["amigos"]:
+            continue  # a lista antiga já barrava repetidos; se sobrou algum, fica o primeiro
+        dados["amigos"][item["id"]] = item["name"]
+        dados["nomes"][chave] = item["id"]
+    return dados
+
+
+def normalizar(valor):
+    """Valor guardado na sessão -> formato atual (migra ou zera se preciso)."""
+    if isinstance(valor, list):
+        return _de_lista(valor)
+    if (
+        isinstance(valor, dict)
+        and isinstance(valor.get("amigos"), dict)
+        and isinstance(valor.get("nomes"), dict)
+    ):
+        valor.setdefault("versao", 0)
+        return valor
+    return {"amigos": {}, "nomes": {}, "versao": 0}
+
+
+class ListaAmigos:
+    """Operações sobre os dados da sessão (mexe no dict no lugar)."""
+
+    def __init__(self, dados):
+        self.dados = dados
+        self.amigos = dados["amigos"]
+        self.nomes = dados["nomes"]
+        self.base = dados["versao"]  # versão antes deste request
+        self._mudados = {}  # id -> "adicionado" / "alterado" / "removido"
+
+    @property
+    def versao(self):
+        return self.dados["versao"]
+
+    def _marcar(self, friend_id, tipo):
+        self.dados["versao"] = self.base + 1
+        anterior = self._mudados.get(friend_id)
+        if anterior == "adicionado":
+            if tipo == "removido":
+                del self._mudados[friend_id]  # entrou e saiu no mesmo request
+            return
+        self._mudados[friend_id] = tipo
+
+    def __len__(self):
+        return len(self.amigos)
+
+    def lista(self):
+        """No formato da API: [{"id", "name"}, ...] na ordem em que entraram."""
+        return [{"id": i, "name": nome} for i, nome in self.amigos.items()]
+
+    def delta(self):
+        """
+        O que mudou neste request: de "base" para "versao". Se o cliente não
+        está em "base", perdeu alguma mudança e deve buscar a lista inteira.
+        """
+        d = {"base": self.base, "versao": self.versao, "adicionados": [], "alterados": [], "removidos": []}
+        for friend_id, tipo in self._mudados.items():
+            if tipo == "removido":
+                d["removidos"].append(friend_id)
+            else:
+                d[tipo + "s"].append({"id": friend_id, "name": self.amigos[friend_id]})
+        return d
+
+    def _checar_nome(self, nome, friend_id=None, msg="Esse nome já foi adicionado."):
+        if not nome:
+            raise AmigoInvalido("Digite um nome válido.")
+        dono = self.nomes.get(chave_nome(nome))
+        if dono is not None and dono != friend_id:
+            raise AmigoInvalido(msg)
+
+    def _checar_id(self, friend_id):
+        if not friend_id:
+            raise AmigoInvalido("ID inválido.")
+        if friend_id not in self.amigos:
+            raise AmigoNaoEncontrado("Amigo não encontrado.")
+
+    def adicionar(self, nome):
+        self._checar_nome(nome)
+        friend_id = uuid.uuid4().hex
+        self.amigos[friend_id] = nome
+        self.nomes[chave_nome(nome)] = friend_id
+        self._marcar(friend_id, "adicionado")
+        return friend_id
+
+    def importar(self, nomes):
+        """
+        Adiciona vários nomes de uma vez (limpa espaços, pula vazios e
+        repetidos, na lista ou na própria importação). Retorna os ignorados:
+        [{"nome", "motivo"}].
+        """
+        if len(nomes) > AMIGOS_MAX_IMPORTAR:
+            raise AmigoInvalido(f"No máximo {AMIGOS_MAX_IMPORTAR} nomes por importação.")
+        ignorados = []
+        for nome in nomes:
+            nome = nome.strip() if isinstance(nome, str) else ""
+            if not nome:
+                continue
+            if chave_nome(nome) in self.nomes:
+                ignorados.append({"nome": nome, "motivo": "repetido"})
+                continue
+            self.adicionar(nome)
+        return ignorados
+
+    def editar(self, friend_id, nome):
+        if friend_id and not nome:
+            raise AmigoInvalido("Digite um nome válido.")
+        self._checar_id(friend_id)
+        self._checar_nome(nome, friend_id, "Esse nome já existe na lista.")
+        del self.nomes[chave_nome(self.amigos[friend_id])]
+        self.amigos[friend_id] = nome
+        self.nomes[chave_nome(nome)] = friend_id
+        self._marcar(friend_id, "alterado")
+
+    def remover(self, friend_id):
+        self._checar_id(friend_id)
+        del self.nomes[chave_nome(self.amigos.pop(friend_id))]
+        self._marcar(friend_id, "removido")
+
+    def limpar(self):
+        for friend_id in self.amigos:
+            self._marcar(friend_id, "removido")
+        self.amigos.clear()
+        self.nomes.clear()
+
+
+def ler_importacao(corpo, content_type=""):
+    """
+    Nomes do corpo de /api/amigo-secreto/importar: JSON (lista de nomes ou
+    {"nomes": [...]}) ou texto/CSV, um nome por linha (a primeira coluna;
+    um cabeçalho "nome"/"name" é pulado).
+    """
+    try:
+        texto = corpo.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise AmigoInvalido("Envie o arquivo em UTF-8.")
+
+    if "json" in content_type or texto.lstrip()[:1] in ("[", "{"):
+        try:
+            dados = json.loads(texto)
+        except ValueError:
+            raise AmigoInvalido("JSON inválido.")
+        if isinstance(dados, dict):
+            dados = dados.get("nomes")
+        if not isinstance(dados, list):
+            raise AmigoInvalido("Envie uma lista de nomes.")
+        return dados
+
+    nomes = []
+    for i, linha in enumerate(csv.reader(io.StringIO(texto))):
+        if not linha:
+            continue
+        if i == 0 and linha[0].strip().casefold() in ("nome", "name"):
+            continue
+        nomes.append(linha[0])
+    return nomes
+
+
+# ----------------- SORTEIO COM RESTRIÇÕES -----------------
+#
+# Cada pessoa tira uma outra; ninguém tira a si mesmo nem alguém proibido
+# (casal, mesmo time, o par do ano passado). É um emparelhamento perfeito
+# no grafo "quem pode tirar quem": começa de uma permutação aleatória
+# (quase tudo já vale quando há poucas restrições), completa os que
+# sobraram com sorteio guloso e conserta o resto com caminhos aumentantes
+# (Kuhn). Se um caminho aumentante não existe, não há solução; isso é
+# exato, não é "desisti depois de N tentativas".
+
+
+class SemSolucao(AmigoInvalido):
+    """As restrições não deixam fazer o sorteio (400 com o motivo)."""
+
+
+def _pode(de, para, proibidos, grupo):
+    if de == para or para in proibidos.get(de, ()):
+        return False
+    g = grupo.get(de)
+    return g is None or g != grupo.get(para)
+
+
+def _checar_viavel(amigos, proibidos, grupo):
+    """Testes rápidos (Hall) para os casos óbvios, com mensagem que ajuda."""
+    n = len(amigos)
+    tamanhos = {}
+    for i in amigos:
+        g = grupo.get(i)
+        if g is not None:
+            tamanhos[g] = tamanhos.get(g, 0) + 1
+    for g, tam in tamanhos.items():
+        if tam > n - tam:
+            raise SemSolucao(f"O time {g} tem mais da metade dos participantes.")
+
+    # quantos cada um pode tirar / por quantos pode ser tirado
+    saida = {i: n - tamanhos.get(grupo.get(i), 1) for i in amigos}
+    entrada = dict(saida)
+    for de, bloqueados in proibidos.items():
+        if de not in amigos:
+            continue
+        for para in bloqueados:
+            if para in amigos and _pode(de, para, {}, grupo):
+                saida[de] -= 1
+                entrada[para] -= 1
+    for i in amigos:
+        if saida[i] <= 0:
+            raise SemSolucao(f"{amigos[i]} não pode tirar ninguém com essas regras.")
+        if entrada[i] <= 0:
+            raise SemSolucao(f"Ninguém pode tirar {amigos[i]} com essas regras.")
+
+
+def sortear_pares(amigos, proibidos=None, grupo=None, tempo=None, rng=random):
+    """
+    amigos: {id: nome}; proibidos: {id: {ids que ele não pode tirar}};
+    grupo: {id: time} (ninguém tira alguém do mesmo time).
+    Retorna {id: id tirado}. SemSolucao se for impossível; TempoEsgotado
+    se passar de `tempo` segundos.
+    """
+    proibidos = proibidos or {}
+    grupo = grupo or {}
+    prazo = None if tempo is None else time.monotonic() + tempo
+    _checar_viavel(amigos, proibidos, grupo)
+
+    ids = list(amigos)
+    n = len(ids)
+    par = {}       # quem tira -> tirado
+    dono = {}      # tirado -> quem tira
+
+    # 1) permutação aleatória: fica o que já respeita as regras
+    ordem = ids[:]
+    rng.shuffle(ordem)
+    for de, para in zip(ids, ordem):
+        if _pode(de, para, proibidos, grupo):
+            par[de] = para
+            dono[para] = de
+
+    # 2) guloso: cada um que sobrou tenta alguns livres ao acaso
+    livres = [i for i in ids if i not in dono]
+    pos = {v: k for k, v in enumerate(livres)}
+    sobra = []
+    for de in ids:
+        if de in par:
+            continue
+        for _ in range(min(8, len(livres))):
+            para = livres[rng.randrange(len(livres))]
+            if _pode(de, para, proibidos, grupo):
+                # tira de `livres` em O(1) (troca com o último)
+                k, ultimo = pos.pop(para), livres.pop()
+                if ultimo != para:
+                    livres[k] = ultimo
+                    pos[ultimo] = k
+                par[de] = para
+                dono[para] = de
+                break
+        else:
+            sobra.append(de)
+
+    # 3) caminhos aumentantes para o resto
+    passos = 0
+    for u in sobra:
+        visitados = set()
+        veio_de = {}  # tirado -> quem chegou nele no caminho
+        pilha = [(u, rng.randrange(n), 0)]
+        achou = None
+        while pilha and achou is None:
+            de, inicio, k = pilha[-1]
+            proximo = None
+            while k < n:
+                v = ordem[(inicio + k) % n]
+                k += 1
+                if v not in visitados and _pode(de, v, proibidos, grupo):
+                    proximo = v
+                    break
+            passos += k - pilha[-1][2]
+            if prazo is not None and passos > 50_000:
+                passos = 0
+                if time.monotonic() > prazo:
+                    raise TempoEsgotado()
+            if proximo is None:
+                pilha.pop()
+                continue
+            pilha[-1] = (de, inicio, k)
+            visitados.add(proximo)
+            veio_de[proximo] = de
+            if proximo in dono:
+                pilha.append((dono[proximo], rng.randrange(n), 0))
+            else:
+                achou = proximo
+        if achou is None:
+            raise SemSolucao(f"Não há como sortear com essas regras ({amigos[u]} fica sem par).")
+        # inverte o caminho: cada um passa a tirar quem o alcançou
+        v = achou
+        while True:
+            de = veio_de[v]
+            anterior = par.get(de)
+            par[de] = v
+            dono[v] = de
+            if anterior is None:
+                break
+            v = anterior
+    return par
+
+
+def regras(lista, body):
+    """
+    Restrições do corpo de /api/amigo-secreto/sortear (por nome ou id):
+        "casais":   [["Ana", "Caio"], ...]     um não tira o outro
+        "times":    [["Ana", "Bia", "Duda"], ...]  ninguém tira do próprio time
+        "anterior": [{"de": "Ana", "para": "Bia"}, ...]  o par do ano passado
+    "anterior" tem o formato dos "pares" da resposta; quem saiu da lista é
+    ignorado ali. Retorna (proibidos, grupo).
+    """
+    def achar(ref, estrito=True):
+        ref = (ref or "").strip() if isinstance(ref, str) else ""
+        if ref in lista.amigos:
+            return ref
+        friend_id = lista.nomes.get(chave_nome(ref))
+        if friend_id is None and estrito:
+            raise AmigoNaoEncontrado(f"Amigo não encontrado: {ref or '(vazio)'}.")
+        return friend_id
+
+    def listas(chave):
+        valor = body.get(chave) or []
+        if not isinstance(valor, list):
+            raise AmigoInvalido(f'"{chave}" deve ser uma lista.')
+        return valor
+
+    proibidos, grupo = {}, {}
+    for casal in listas("casais"):
+        if not isinstance(casal, list) or len(casal) != 2:
+            raise AmigoInvalido("Cada casal deve ter duas pessoas.")
+        a, b = achar(casal[0]), achar(casal[1])
+        proibidos.setdefault(a, set()).add(b)
+        proibidos.setdefault(b, set()).add(a)
+    for n, time_ in enumerate(listas("times"), 1):
+        if not isinstance(time_, list):
+            raise AmigoInvalido("Cada time deve ser uma lista de nomes.")
+        for ref in time_:
+            i = achar(ref)
+            if grupo.get(i, n) != n:
+                raise AmigoInvalido(f"{lista.amigos[i]} está em mais de um time.")
+            grupo[i] = n
+    for par in listas("anterior"):
+        if not isinstance(par, dict):
+            raise AmigoInvalido('Cada par de "anterior" deve ter "de" e "para".')
+        de, para = achar(par.get("de"), False), achar(par.get("para"), False)
+        if de and para:
+            proibidos.setdefault(de, set()).add(para)
+    return proibidos, grupo
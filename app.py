@@ -1,19 +1,92 @@
-from fastapi import FastAPI, Request
-from fastapi.responses import HTMLResponse, JSONResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
-from starlette.middleware.sessions import SessionMiddleware
+from sessao import SessaoServidorMiddleware, MemoriaSessoes, SQLiteSessoes, PerfilSessao, gravar_chave, no_armazenamento
+from estaticos import ArquivosImutaveis, EstaticosComHash
+from paginas import PaginasCache
+from execucao import Executor, Sobrecarga, TempoEsgotado
+from metricas import Metricas, MetricasMiddleware
+import imagens
+import sorteio
+from truco import equidade
+import json
+import os
 import random
 
 NUMERO_LIMITE = 100
 
 app = FastAPI()
-app.add_middleware(SessionMiddleware, secret_key="troque-essa-chave-por-uma-forte")
+
+# Estado dos jogos fica no servidor; o cookie leva só um id opaco.
+# Padrão: memória do processo. Defina SESSOES_DB=caminho.db para usar SQLite.
+# SESSOES_PERFIL=1 mede o custo de cada chave da sessão (relatório em /perfil/sessao).
+SESSOES_DB = os.environ.get("SESSOES_DB")
+perfil_sessao = PerfilSessao() if os.environ.get("SESSOES_PERFIL") == "1" else None
+sessoes = SQLiteSessoes(SESSOES_DB, perfil=perfil_sessao) if SESSOES_DB else MemoriaSessoes(perfil=perfil_sessao)
+app.add_middleware(SessaoServidorMiddleware, armazenamento=sessoes)
+
+# Por fora da sessão, para a latência incluir carregar/salvar o estado.
+metricas = Metricas()
+app.add_middleware(MetricasMiddleware, metricas=metricas)
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Métricas por rota no formato texto do Prometheus (ver metricas.py)."""
+    return PlainTextResponse(metricas.prometheus(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/perfil/sessao", include_in_schema=False)
+def perfil_sessao_relatorio(formato: str = "texto"):
+    """Relatório do PerfilSessao (só com SESSOES_PERFIL=1)."""
+    if perfil_sessao is None:
+        return JSONResponse({"ok": False, "erro": "Perfil desligado (SESSOES_PERFIL=1)."}, status_code=404)
+    if formato == "json":
+        return JSONResponse({"ok": True, **perfil_sessao.relatorio()})
+    return PlainTextResponse(perfil_sessao.texto())
 
 templates = Jinja2Templates(directory="templates")
 
-app.mount("/static", StaticFiles(directory="static"), name="static")
-app.mount("/img", StaticFiles(directory="img"), name="img")
+# Trabalho pesado (sorteios, bot do Truco) roda fora do event loop, com fila
+# limitada e tempo máximo por request. Ver execucao.py (EXECUCAO_* no ambiente).
+# No modo processo, cada worker já nasce com a tabela de equidade carregada.
+executor = Executor(inicializar=equidade.carregar)
+ERROS_EXECUCAO = {
+    Sobrecarga: ({"ok": False, "erro": "Servidor ocupado, tente de novo em instantes."}, 503),
+    TempoEsgotado: ({"ok": False, "erro": "A operação demorou demais, tente de novo."}, 504),
+}
+
+
+@app.exception_handler(Sobrecarga)
+@app.exception_handler(TempoEsgotado)
+async def erro_execucao(request: Request, exc: Exception):
+    d, status = ERROS_EXECUCAO[type(exc)]
+    headers = {"Retry-After": "1"} if status == 503 else None
+    return JSONResponse(d, status, headers=headers)
+
+# Variantes AVIF/WebP das cartas e capas (ver imagens.py).
+# IMAGENS_GERAR=1 gera o que faltar na subida (precisa do Pillow).
+imagens.preparar(gerar_se_puder=os.environ.get("IMAGENS_GERAR") == "1")
+templates.env.globals["image_set"] = imagens.image_set
+
+# tabela de equidade do bot (truco/equidade.bin) lida na subida, não na
+# primeira jogada
+equidade.carregar()
+
+# URLs com hash do conteúdo (static_url/img_url nos templates), ETag forte
+# e CSS/JS já comprimidos em memória. Ver estaticos.py.
+imagens_estaticas = EstaticosComHash(directory="img", prefixo="/img")
+estaticos = EstaticosComHash(directory="static", prefixo="/static", reescrever_url=imagens_estaticas.url)
+templates.env.globals["static_url"] = estaticos.url
+templates.env.globals["img_url"] = imagens_estaticas.url
+
+# páginas só dependem de constantes: HTML renderizado uma vez, com ETag
+paginas = PaginasCache(templates)
+
+app.mount("/static", estaticos, name="static")
+# gerados têm hash no nome: cache para sempre (precisa vir antes de /img)
+app.mount("/img/gerado", ArquivosImutaveis(directory=imagens.GERADO_DIR), name="img_gerado")
+app.mount("/img", imagens_estaticas, name="img")
 
 # ---- Catálogo de jogos ----
 GAMES = [
@@ -53,61 +126,95 @@ GAMES = [
 
 ]
 
+# contexto constante: a chave do cache de páginas é calculada uma vez só
+CONTEXTO_HOME = {"games": GAMES}
+CHAVE_HOME = paginas.chave(CONTEXTO_HOME)
+
 
 # -------------------- NUMERO SECRETO --------------------
+import numero_secreto
+
+# média de todas as sessões deste processo (somas acumuladas)
+NS_ESTATISTICAS = numero_secreto.nova_estatistica()
+
 def _ns_ensure_state(request: Request) -> None:
-    """Estado por sessão do jogo 'numero-secreto'."""
+    """
+    Estado por sessão do jogo 'numero-secreto'. Os secretos saem em ordem
+    sem repetir de uma permutação (ver numero_secreto.py): a sessão guarda
+    só a seed, o número do jogo atual e o limite da sequência, mais o
+    histórico compacto do jogo e as estatísticas acumuladas.
+    """
     s = request.session
-    s.setdefault("ns_pool", [])
-    s.setdefault("ns_secret", None)
-    s.setdefault("ns_tries", 1)
+    # formatos antigos: lista embaralhada inteira na sessão / só o contador
+    for chave in ("ns_pool", "ns_secret", "ns_tries"):
+        if chave in s:
+            del s[chave]
+
+    limite = s.get("ns_limite")
+    if (
+        not isinstance(s.get("ns_seed"), int)
+        or not isinstance(limite, int)
+        or not 2 <= limite <= numero_secreto.LIMITE_MAX
+    ):
+        _ns_nova_sequencia(s, NUMERO_LIMITE)
+    partida = s.get("ns_partida")
+    if not isinstance(partida, dict) or partida.get("limite") != s["ns_limite"]:
+        s["ns_partida"] = numero_secreto.Historico(s["ns_limite"]).json()
+    if not isinstance(s.get("ns_estatisticas"), dict):
+        s["ns_estatisticas"] = numero_secreto.nova_estatistica()
 
-    if not isinstance(s["ns_pool"], list) or len(s["ns_pool"]) == 0:
-        pool = list(range(1, NUMERO_LIMITE + 1))
-        random.shuffle(pool)
-        s["ns_pool"] = pool
 
-    if not isinstance(s["ns_secret"], int):
-        s["ns_secret"] = s["ns_pool"].pop()
+def _ns_nova_sequencia(s, limite: int) -> None:
+    s["ns_seed"] = numero_secreto.nova_seed()
+    s["ns_limite"] = limite
+    s["ns_jogo"] = 0
 
-    if not isinstance(s["ns_tries"], int):
-        s["ns_tries"] = 1
+
+def _ns_secreto(s) -> int:
+    return numero_secreto.secreto(s["ns_seed"], s["ns_jogo"], s["ns_limite"])
 
 
 @app.get("/", response_class=HTMLResponse)
 def home(request: Request):
-    return templates.TemplateResponse(
-        "home.html",
-        {"request": request, "games": GAMES}
-    )
+    return paginas.pagina(request, "home.html", CONTEXTO_HOME, CHAVE_HOME)
 
 
 @app.get("/games/numero-secreto", response_class=HTMLResponse)
 def numero_secreto_page(request: Request):
     _ns_ensure_state(request)
-    return templates.TemplateResponse(
-        "games/numero_secreto.html",
-        {"request": request}
-    )
+    return paginas.pagina(request, "games/numero_secreto.html", {"limite": request.session["ns_limite"]})
 
 
 @app.post("/api/numero-secreto/novo-jogo")
-def ns_novo_jogo(request: Request):
+async def ns_novo_jogo(request: Request):
+    """Corpo opcional: {"limite": N} escolhe o intervalo 1..N deste jogo (até 10^9)."""
     _ns_ensure_state(request)
     s = request.session
 
-    if len(s["ns_pool"]) == 0:
-        pool = list(range(1, NUMERO_LIMITE + 1))
-        random.shuffle(pool)
-        s["ns_pool"] = pool
+    body = await request.body()
+    try:
+        body = json.loads(body) if body else {}
+        limite = int(body.get("limite") or s["ns_limite"])
+    except (ValueError, TypeError, AttributeError):
+        return JSONResponse({"ok": False, "erro": "Envie um limite válido."}, status_code=400)
+    if not 2 <= limite <= numero_secreto.LIMITE_MAX:
+        return JSONResponse(
+            {"ok": False, "erro": f"O limite deve estar entre 2 e {numero_secreto.LIMITE_MAX}."},
+            status_code=400,
+        )
 
-    s["ns_secret"] = s["ns_pool"].pop()
-    s["ns_tries"] = 1
+    # próximo da sequência; depois de todos (ou trocando o limite), outra permutação
+    if limite != s["ns_limite"] or s["ns_jogo"] + 1 >= s["ns_limite"]:
+        _ns_nova_sequencia(s, limite)
+    else:
+        s["ns_jogo"] += 1
+    s["ns_partida"] = numero_secreto.Historico(limite).json()
 
     return JSONResponse({
         "ok": True,
         "titulo": "Jogo do número secreto",
-        "mensagem": f"Escolha um número entre 1 e {NUMERO_LIMITE}",
+        "mensagem": f"Escolha um número entre 1 e {limite}",
+        "limite": limite,
         "reiniciar_habilitado": False,
     })
 
@@ -125,891 +232,395 @@ async def ns_chute(request: Request):
     except (TypeError, ValueError):
         return JSONResponse({"ok": False, "erro": "Envie um número válido."}, status_code=400)
 
-    if chute < 1 or chute > NUMERO_LIMITE:
-        return JSONResponse({"ok": False, "erro": f"O chute deve estar entre 1 e {NUMERO_LIMITE}."}, status_code=400)
+    limite = s["ns_limite"]
+    if chute < 1 or chute > limite:
+        return JSONResponse({"ok": False, "erro": f"O chute deve estar entre 1 e {limite}."}, status_code=400)
+
+    historico = numero_secreto.Historico.de_json(s["ns_partida"])
+    if historico.fim:
+        return JSONResponse({"ok": False, "erro": "Esse jogo já acabou, comece um novo."}, status_code=400)
 
-    secret = s["ns_secret"]
-    tries = s["ns_tries"]
+    resultado, redundante = historico.chutar(chute, _ns_secreto(s))
+    tries = historico.tentativas
 
-    if chute == secret:
+    if resultado == "igual":
+        numero_secreto.registrar(s["ns_estatisticas"], historico)
+        numero_secreto.registrar(NS_ESTATISTICAS, historico)
+        s["ns_partida"] = historico.json()
         palavra = "tentativa" if tries == 1 else "tentativas"
         return JSONResponse({
             "ok": True,
             "acertou": True,
             "titulo": "Acertou!",
             "mensagem": f"Você descobriu o número secreto com {tries} {palavra}!",
+            "otimo": round(numero_secreto.otimo_medio(limite), 2),
             "reiniciar_habilitado": True,
         })
 
-    s["ns_tries"] = tries + 1
-    dica = "O número secreto é menor" if chute > secret else "O número secreto é maior"
+    s["ns_partida"] = historico.json()
+    dica = f"O número secreto é {resultado}"
+    if redundante:
+        dica += f" (esse chute não ajudou: ele está entre {historico.lo} e {historico.hi})"
 
     return JSONResponse({
         "ok": True,
         "acertou": False,
         "titulo": None,
         "mensagem": dica,
+        "redundante": redundante,
+        "intervalo": [historico.lo, historico.hi],
         "reiniciar_habilitado": False,
     })
 
 
+@app.get("/api/numero-secreto/estatisticas")
+def ns_estatisticas(request: Request):
+    """Média de chutes contra a busca binária perfeita: desta sessão e geral."""
+    _ns_ensure_state(request)
+    return JSONResponse({
+        "ok": True,
+        "sessao": numero_secreto.resumo(request.session["ns_estatisticas"]),
+        "geral": numero_secreto.resumo(NS_ESTATISTICAS),
+    })
+
+
 # -------------------- SORTEADOR --------------------
 @app.get("/games/sorteador", response_class=HTMLResponse)
 def sorteador_page(request: Request):
-    return templates.TemplateResponse(
-        "games/sorteador.html",
-        {"request": request}
-    )
+    return paginas.pagina(request, "games/sorteador.html")
 
 
 @app.post("/api/sorteador/sortear")
 async def sorteador_sortear(request: Request):
     body = await request.json()
-    quantidade = body.get("quantidade")
-    de = body.get("de")
-    ate = body.get("ate")
-
+    if not isinstance(body, dict):
+        return JSONResponse({"ok": False, "erro": "Envie um objeto JSON."}, status_code=400)
     try:
-        quantidade = int(quantidade)
-        de = int(de)
-        ate = int(ate)
-    except (TypeError, ValueError):
-        return JSONResponse({"ok": False, "erro": "Preencha todos os campos com números válidos."}, status_code=400)
+        quantidade, de, ate = sorteio.validar(
+            body.get("quantidade"), body.get("de"), body.get("ate"), sorteio.SORTEIO_MAX_JSON
+        )
+    except sorteio.SorteioInvalido as e:
+        return JSONResponse({"ok": False, "erro": str(e)}, status_code=400)
 
-    if quantidade <= 0:
-        return JSONResponse({"ok": False, "erro": "A quantidade deve ser maior que zero."}, status_code=400)
+    sorteados = await executor.rodar(sorteio.sortear, quantidade, de, ate)
+    return JSONResponse({"ok": True, "sorteados": sorteados})
 
-    if de > ate:
-        return JSONResponse({"ok": False, "erro": 'O valor "Do número" não pode ser maior que "Até o número".'}, status_code=400)
 
-    total_possiveis = ate - de + 1
-    if quantidade > total_possiveis:
-        return JSONResponse(
-            {"ok": False, "erro": f"Quantidade ({quantidade}) maior que o total de números possíveis no intervalo ({total_possiveis})."},
-            status_code=400
+@app.post("/api/sorteador/stream")
+async def sorteador_stream(request: Request):
+    """
+    Sorteio grande em NDJSON: os números saem em lotes enquanto são
+    sorteados (memória O(quantidade), nada de lista do intervalo inteiro).
+    O gerador é síncrono, então o Starlette roda cada lote no threadpool.
+    """
+    body = await request.json()
+    if not isinstance(body, dict):
+        return JSONResponse({"ok": False, "erro": "Envie um objeto JSON."}, status_code=400)
+    try:
+        quantidade, de, ate = sorteio.validar(
+            body.get("quantidade"), body.get("de"), body.get("ate"), sorteio.SORTEIO_MAX_STREAM
         )
+    except sorteio.SorteioInvalido as e:
+        return JSONResponse({"ok": False, "erro": str(e)}, status_code=400)
 
-    sorteados = random.sample(range(de, ate + 1), k=quantidade)
-    return JSONResponse({"ok": True, "sorteados": sorteados})
+    return StreamingResponse(sorteio.ndjson(de, ate, quantidade), media_type="application/x-ndjson")
+
+@app.post("/api/sorteador/lote")
+async def sorteador_lote(request: Request):
+    """
+    Vários sorteios em um request, reproduzíveis:
+        {"sorteios": [{"quantidade": 5, "de": 1, "ate": 60}, ...], "seed": 42}
+    A resposta traz a seed usada (sorteada se não veio) e um resultado por sorteio.
+    """
+    body = await request.json()
+    if not isinstance(body, dict):
+        return JSONResponse({"ok": False, "erro": "Envie um objeto JSON."}, status_code=400)
+    try:
+        seed, resultados = await executor.rodar(sorteio.sortear_lote, body.get("sorteios"), body.get("seed"))
+    except sorteio.SorteioInvalido as e:
+        return JSONResponse({"ok": False, "erro": str(e)}, status_code=400)
+    return JSONResponse({"ok": True, "seed": seed, "resultados": resultados})
 
 # -------------------- AMIGO SECRETO --------------------
-import uuid
+import amigos
 
-def _as_ensure_state(request: Request) -> None:
+def _as_ensure_state(request: Request) -> amigos.ListaAmigos:
     s = request.session
-    s.setdefault("as_friends", [])
-    if not isinstance(s["as_friends"], list):
-        s["as_friends"] = []
+    dados = s.get("as_friends")
+    normalizado = amigos.normalizar(dados)
+    if normalizado is not dados:
+        s["as_friends"] = normalizado  # sessão nova ou formato antigo (lista)
+    return amigos.ListaAmigos(normalizado)
+
+
+def _as_resposta(request: Request, lista: amigos.ListaAmigos, **extra):
+    """Lista inteira, ou só o que mudou com ?delta=1 (ver ListaAmigos.delta)."""
+    if request.query_params.get("delta") == "1":
+        return JSONResponse({"ok": True, **lista.delta(), **extra})
+    return JSONResponse({"ok": True, "amigos": lista.lista(), "versao": lista.versao, **extra})
+
 
-    # migração simples caso você já tenha lista de strings salva
-    if s["as_friends"] and isinstance(s["as_friends"][0], str):
-        s["as_friends"] = [{"id": uuid.uuid4().hex, "name": n} for n in s["as_friends"]]
+def _as_erro(e: amigos.AmigoInvalido):
+    return JSONResponse({"ok": False, "erro": str(e)}, status_code=e.status)
 
 
 @app.get("/games/amigo-secreto", response_class=HTMLResponse)
 def amigo_secreto_page(request: Request):
     _as_ensure_state(request)
-    return templates.TemplateResponse(
-        "games/amigo_secreto.html",
-        {"request": request}
-    )
+    return paginas.pagina(request, "games/amigo_secreto.html")
 
 
 @app.get("/api/amigo-secreto/estado")
 def amigo_secreto_estado(request: Request):
-    _as_ensure_state(request)
-    return JSONResponse({"ok": True, "amigos": request.session["as_friends"]})
+    return _as_resposta(request, _as_ensure_state(request))
 
 
 @app.post("/api/amigo-secreto/adicionar")
 async def amigo_secreto_adicionar(request: Request):
-    _as_ensure_state(request)
-    s = request.session
-
+    lista = _as_ensure_state(request)
     body = await request.json()
     nome = (body.get("nome") or "").strip()
-
-    if not nome:
-        return JSONResponse({"ok": False, "erro": "Digite um nome válido."}, status_code=400)
-
-    # evita duplicado (case-insensitive)
-    ja_existe = any(item["name"].lower() == nome.lower() for item in s["as_friends"])
-    if ja_existe:
-        return JSONResponse({"ok": False, "erro": "Esse nome já foi adicionado."}, status_code=400)
-
-    s["as_friends"].append({"id": uuid.uuid4().hex, "name": nome})
-    return JSONResponse({"ok": True, "amigos": s["as_friends"]})
+    try:
+        lista.adicionar(nome)
+    except amigos.AmigoInvalido as e:
+        return _as_erro(e)
+    return _as_resposta(request, lista)
 
 
 @app.post("/api/amigo-secreto/editar")
 async def amigo_secreto_editar(request: Request):
-    _as_ensure_state(request)
-    s = request.session
-
+    lista = _as_ensure_state(request)
     body = await request.json()
     friend_id = (body.get("id") or "").strip()
     novo_nome = (body.get("nome") or "").strip()
-
-    if not friend_id:
-        return JSONResponse({"ok": False, "erro": "ID inválido."}, status_code=400)
-    if not novo_nome:
-        return JSONResponse({"ok": False, "erro": "Digite um nome válido."}, status_code=400)
-
-    # encontra amigo
-    alvo = next((item for item in s["as_friends"] if item["id"] == friend_id), None)
-    if not alvo:
-        return JSONResponse({"ok": False, "erro": "Amigo não encontrado."}, status_code=404)
-
-    # evita duplicado com outros (case-insensitive)
-    ja_existe = any(
-        item["id"] != friend_id and item["name"].lower() == novo_nome.lower()
-        for item in s["as_friends"]
-    )
-    if ja_existe:
-        return JSONResponse({"ok": False, "erro": "Esse nome já existe na lista."}, status_code=400)
-
-    alvo["name"] = novo_nome
-    return JSONResponse({"ok": True, "amigos": s["as_friends"]})
+    try:
+        lista.editar(friend_id, novo_nome)
+    except amigos.AmigoInvalido as e:
+        return _as_erro(e)
+    return _as_resposta(request, lista)
 
 
 @app.post("/api/amigo-secreto/remover")
 async def amigo_secreto_remover(request: Request):
-    _as_ensure_state(request)
-    s = request.session
-
+    lista = _as_ensure_state(request)
     body = await request.json()
     friend_id = (body.get("id") or "").strip()
-    if not friend_id:
-        return JSONResponse({"ok": False, "erro": "ID inválido."}, status_code=400)
-
-    antes = len(s["as_friends"])
-    s["as_friends"] = [item for item in s["as_friends"] if item["id"] != friend_id]
+    try:
+        lista.remover(friend_id)
+    except amigos.AmigoInvalido as e:
+        return _as_erro(e)
+    return _as_resposta(request, lista)
 
-    if len(s["as_friends"]) == antes:
-        return JSONResponse({"ok": False, "erro": "Amigo não encontrado."}, status_code=404)
 
-    return JSONResponse({"ok": True, "amigos": s["as_friends"]})
+@app.post("/api/amigo-secreto/importar")
+async def amigo_secreto_importar(request: Request):
+    """
+    Vários nomes num request só: JSON (lista ou {"nomes": [...]}) ou
+    texto/CSV com um nome por linha. Repetidos são ignorados e listados.
+    """
+    lista = _as_ensure_state(request)
+    try:
+        nomes = amigos.ler_importacao(await request.body(), request.headers.get("content-type", ""))
+        ignorados = lista.importar(nomes)
+    except amigos.AmigoInvalido as e:
+        return _as_erro(e)
+    return _as_resposta(request, lista, ignorados=ignorados)
 
 
 @app.post("/api/amigo-secreto/sortear")
-def amigo_secreto_sortear(request: Request):
-    _as_ensure_state(request)
-    s = request.session
-
-    amigos = s["as_friends"]
-    if len(amigos) < 4:
+async def amigo_secreto_sortear(request: Request):
+    """Sorteia os pares; o corpo (opcional) traz as restrições, ver amigos.regras."""
+    lista = _as_ensure_state(request)
+    if len(lista) < 4:
         return JSONResponse({"ok": False, "erro": "Adicione pelo menos 4 amigos para sortear."}, status_code=400)
 
-    embaralhado = amigos[:]
-    random.shuffle(embaralhado)
-
-    pares = []
-    for i in range(len(embaralhado)):
-        atual = embaralhado[i]["name"]
-        proximo = embaralhado[0]["name"] if i == len(embaralhado) - 1 else embaralhado[i + 1]["name"]
-        pares.append({"de": atual, "para": proximo})
+    body = await request.body()
+    try:
+        body = json.loads(body) if body else {}
+    except ValueError:
+        body = None
+    if not isinstance(body, dict):
+        return JSONResponse({"ok": False, "erro": "Envie um objeto JSON."}, status_code=400)
 
+    try:
+        proibidos, grupo = amigos.regras(lista, body)
+        # o solver para sozinho no prazo (uma thread não dá para interromper)
+        par = await executor.rodar(amigos.sortear_pares, dict(lista.amigos), proibidos, grupo, executor.tempo)
+    except amigos.AmigoInvalido as e:
+        return _as_erro(e)
+
+    nomes = lista.amigos
+    pares = [{"de": nomes[de], "para": nomes[para]} for de, para in par.items()]
+    random.shuffle(pares)
     return JSONResponse({"ok": True, "pares": pares})
 
 
 @app.post("/api/amigo-secreto/reiniciar")
 def amigo_secreto_reiniciar(request: Request):
-    _as_ensure_state(request)
-    request.session["as_friends"] = []
-    return JSONResponse({"ok": True, "amigos": []})
+    lista = _as_ensure_state(request)
+    lista.limpar()
+    return _as_resposta(request, lista)
 
 # --- Sobre mim --- 
 
 @app.get("/sobre")
 def sobre(request: Request):
-    return templates.TemplateResponse(
-        "about.html",
-        {"request": request}
-    )
+    return paginas.pagina(request, "about.html")
 
 # =========================
 # 🃏 TRUCO (PAULISTA SIMPLIFICADO) — TURNO 100% CORRETO + TRUCO/6/9/12 + MANILHA CORRETA
 # =========================
 
-from fastapi import Request
-from fastapi.responses import HTMLResponse, JSONResponse
-import random
+from truco.motor import novo_estado
+from truco.partida import processar as truco_processar, nova as truco_nova
 
-TRUCO_NAIPES = ["♣", "♥", "♠", "♦"]  # usado só para montar as cartas/arquivos
-TRUCO_ORDEM = ["Q", "J", "K", "A", "2", "3"]  # ranking base (sem manilha)
-TRUCO_VALORES = [1, 3, 6, 9, 12]  # escada do truco
+# dificuldade escolhida na tela -> estratégia do bot
+TRUCO_DIFICULDADES = {"normal": "guloso", "dificil": "mc"}
 
-# ✅ Truco Paulista (manilha): ZAP(♣) > COPAS(♥) > ESPADAS(♠) > OUROS(♦)
-# Para comparar: número MAIOR = mais forte
-TRUCO_FORCA_MANILHA = {"♦": 1, "♠": 2, "♥": 3, "♣": 4}
+# variantes e atlas saem do manifesto lido na subida: montados uma vez
+CONTEXTO_TRUCO = {"cartas_img": imagens.variantes_js("img-truco/"), "atlas": imagens.atlas()}
+CHAVE_TRUCO = paginas.chave(CONTEXTO_TRUCO)
 
 
 # ⭐ ROTA DA PÁGINA
 @app.get("/games/truco", response_class=HTMLResponse)
 def truco_page(request: Request):
-    return templates.TemplateResponse("games/truco.html", {"request": request})
-
-
-# ----------------- FUNÇÕES BASE -----------------
-
-def prox_valor(atual: int):
-    i = TRUCO_VALORES.index(atual)
-    return TRUCO_VALORES[i + 1] if i < len(TRUCO_VALORES) - 1 else None
-
-def truco_parse(carta: str):
-    # carta é tipo "Q♣", "3♦"
-    return carta[:-1], carta[-1]
-
-def truco_proxima(rank: str):
-    # manilha = próxima do vira
-    return TRUCO_ORDEM[(TRUCO_ORDEM.index(rank) + 1) % len(TRUCO_ORDEM)]
-
-def truco_baralho():
-    # baralho limpo (24 cartas)
-    d = [f"{r}{n}" for r in TRUCO_ORDEM for n in TRUCO_NAIPES]
-    random.shuffle(d)
-    return d
-
-def truco_poder(carta: str, manilha_rank: str):
-    r, n = truco_parse(carta)
-    if r == manilha_rank:
-        # manilha sempre ganha de qualquer não-manilha
-        return (100, TRUCO_FORCA_MANILHA[n])
-    # quanto maior o índice, mais forte (Q mais fraco ... 3 mais forte)
-    return (TRUCO_ORDEM.index(r), 0)
-
-def truco_comparar(a: str, b: str, manilha_rank: str):
-    pa = truco_poder(a, manilha_rank)
-    pb = truco_poder(b, manilha_rank)
-    return (pa > pb) - (pa < pb)
-
-
-# ----------------- IA DO BOT -----------------
-
-def bot_escolher_resposta(mao_bot, carta_user, manilha_rank):
-    """
-    Bot tenta ganhar gastando o mínimo:
-    - Se tiver alguma que ganha, joga a menor que ganha
-    - Senão, joga a menor da mão
-    """
-    ganhadoras = [c for c in mao_bot if truco_comparar(c, carta_user, manilha_rank) == 1]
-    if ganhadoras:
-        return min(ganhadoras, key=lambda c: truco_poder(c, manilha_rank))
-    return min(mao_bot, key=lambda c: truco_poder(c, manilha_rank))
-
-def bot_escolher_torno(mao_bot, manilha_rank):
-    """
-    Quando o bot vai 'tornar' (jogar primeiro na rodada),
-    joga uma carta mediana/baixa pra guardar as fortes.
-    """
-    ordenadas = sorted(mao_bot, key=lambda c: truco_poder(c, manilha_rank))
-    if len(ordenadas) == 3:
-        return ordenadas[1]
-    return ordenadas[0]
-
-def bot_deve_pedir_truco(g):
-    """
-    Bot só pode pedir na vez dele, antes de jogar.
-    Estratégia simples: chance de pedir se tiver carta forte (manilha ou 3).
-    """
-    if g["pedido"] is not None:
-        return False
-    if g["mao_valor"] >= 12:
-        return False
-    if g["vez"] != "bot":
-        return False
-    if g["carta_bot_mesa"] is not None:
-        return False
-
-    fortes = 0
-    for c in g["mao_bot"]:
-        r, _ = truco_parse(c)
-        if r == g["manilha"]:
-            fortes += 2
-        elif r == "3":
-            fortes += 1
-
-    if fortes >= 2:
-        chance = 0.35
-    elif fortes == 1:
-        chance = 0.18
-    else:
-        chance = 0.06
-
-    return random.random() < chance
+    return paginas.pagina(request, "games/truco.html", CONTEXTO_TRUCO, CHAVE_TRUCO)
 
-def bot_responde_pedido(g, novo_valor):
-    """
-    Bot decide se aceita, corre ou aumenta.
-    """
-    proximo = prox_valor(novo_valor)
-    pode_aumentar = proximo is not None
-
-    if novo_valor >= 9:
-        p_correr = 0.28
-        p_aumentar = 0.10 if pode_aumentar else 0.0
-    elif novo_valor >= 6:
-        p_correr = 0.18
-        p_aumentar = 0.18 if pode_aumentar else 0.0
-    else:
-        p_correr = 0.10
-        p_aumentar = 0.22 if pode_aumentar else 0.0
-
-    x = random.random()
-    if x < p_correr:
-        return "correr"
-    if x < p_correr + p_aumentar:
-        return "aumentar"
-    return "aceitar"
-
-
-# ----------------- ESTADO DO JOGO -----------------
-
-def novo_estado(placar_user=0, placar_bot=0, mao_inicial="user"):
-    deck = truco_baralho()
-    vira = deck.pop()
-    manilha = truco_proxima(truco_parse(vira)[0])
-
-    g = {
-        "deck": deck,
-        "vira": vira,
-        "manilha": manilha,
-
-        "mao_user": [deck.pop() for _ in range(3)],
-        "mao_bot": [deck.pop() for _ in range(3)],
-
-        "placar_user": placar_user,
-        "placar_bot": placar_bot,
-
-        "tricks": [],                 # "user" / "bot" / "tie"
-        "mao_inicial": mao_inicial,   # quem é "mão" desta mão
-        "vez": mao_inicial,           # quem joga agora (se "bot", ele pode tornar)
-        "carta_bot_mesa": None,       # quando bot torna, carta fica na mesa
-
-        # ✅ quem iniciou a rodada atual (importante para empates)
-        "rodada_iniciador": mao_inicial,
 
-        "mao_valor": 1,
-        "pedido": None,               # {"por":"bot"/"user", "base":X, "valor":Y}
-        "finalizado": False
-    }
-    return g
+# ----------------- ESTADO NA SESSÃO -----------------
 
 def ensure_truco(request: Request):
-    if "truco" not in request.session or not isinstance(request.session["truco"], dict):
+    g = request.session.get("truco")
+    # estado antigo (cartas como string / sem "jogadas") é descartado
+    if not isinstance(g, dict) or not isinstance(g.get("vira"), int) or "jogadas" not in g:
         request.session["truco"] = novo_estado()
 
-def placar_list(g):
-    return [g["placar_user"], g["placar_bot"]]
-
-def fim_de_jogo(g):
-    return g["placar_user"] >= 12 or g["placar_bot"] >= 12
-
-def mensagem_fim(g):
-    if g["placar_user"] >= 12:
-        return "FIM DE JOGO — Você venceu! 🏆"
-    return "FIM DE JOGO — Bot venceu!"
-
-def vencedor_da_mao(tricks, mao_inicial):
+async def truco_rodar(request: Request, acoes):
     """
-    Regras resumidas:
-    - Quem ganhar 2 rodadas vence a mão
-    - Empate + vitória em alguma das duas primeiras já decide
-    - 3 empates => mão (mao_inicial) vence
+    Aplica ações na partida da sessão (no pool de execução, o bot pode
+    pensar um pouco). Retorna (json, status).
     """
-    u = tricks.count("user")
-    b = tricks.count("bot")
-    t = tricks.count("tie")
-
-    if u >= 2:
-        return "user"
-    if b >= 2:
-        return "bot"
-
-    if len(tricks) >= 2 and t >= 1:
-        if u == 1 and b == 0:
-            return "user"
-        if b == 1 and u == 0:
-            return "bot"
-
-    if len(tricks) == 3:
-        if u > b:
-            return "user"
-        if b > u:
-            return "bot"
-        return mao_inicial
-
-    return None
-
-def iniciar_nova_mao(request: Request, mao_inicial: str):
-    g_old = request.session["truco"]
-    pu, pb = g_old["placar_user"], g_old["placar_bot"]
-    request.session["truco"] = novo_estado(placar_user=pu, placar_bot=pb, mao_inicial=mao_inicial)
-
-def bot_torna_se_precisar(g):
-    """
-    Se for vez do bot, sem pedido pendente, ele pode:
-    - pedir truco (antes de jogar)
-    - ou tornar (jogar carta na mesa)
-    Retorna a carta tornada (ou None).
-    """
-    if g["finalizado"]:
-        return None
-    if g["pedido"] is not None:
-        return None
-    if g["vez"] != "bot":
-        return None
-
-    # pedir truco antes de jogar
-    if bot_deve_pedir_truco(g):
-        proximo = prox_valor(g["mao_valor"])
-        if proximo:
-            g["pedido"] = {"por": "bot", "base": g["mao_valor"], "valor": proximo}
-            # continua sendo vez do bot, mas aguardando resposta do user
-            return None
-
-    # se já tem carta na mesa, só garante que a vez é do user
-    if g["carta_bot_mesa"] is not None:
-        g["vez"] = "user"
-        return g["carta_bot_mesa"]
-
-    if not g["mao_bot"]:
-        return None
+    ensure_truco(request)
+    g, d, status = await executor.rodar(truco_processar, request.session["truco"], acoes)
+    if status == 200:
+        request.session["truco"] = g
+    return d, status
 
-    carta = bot_escolher_torno(g["mao_bot"], g["manilha"])
-    g["mao_bot"].remove(carta)
-    g["carta_bot_mesa"] = carta
+async def truco_acao(request: Request, acao: dict):
+    """Uma transição da partida guardada na sessão + a resposta da API."""
+    d, status = await truco_rodar(request, [acao])
+    if status != 200:
+        return JSONResponse(d, status)
+    return d["eventos"][0]
 
-    # ✅ rodada foi iniciada pelo bot
-    g["rodada_iniciador"] = "bot"
 
-    # agora você responde
-    g["vez"] = "user"
-    return carta
+@app.post("/api/truco/actions")
+async def truco_actions(request: Request):
+    """Várias ações em um request só (ex.: pedir truco + jogar carta)."""
+    body = await request.json()
+    acoes = body.get("acoes") if isinstance(body, dict) else None
+    d, status = await truco_rodar(request, acoes)
+    if status != 200:
+        return JSONResponse(d, status)
+    return d
 
 
 # ----------------- NOVO JOGO -----------------
 
 @app.get("/api/truco/new")
-def truco_new(request: Request):
-    request.session["truco"] = novo_estado(placar_user=0, placar_bot=0, mao_inicial="user")
-    g = request.session["truco"]
-
-    return {
-        "ok": True,
-        "vira": g["vira"],
-        "mao_user": g["mao_user"],
-        "placar": placar_list(g),
-        "vez": g["vez"],
-        "mao_valor": g["mao_valor"],
-        "pedido": g["pedido"],
-        "manilha": g["manilha"],
-        "fim_jogo": False,
-        "bot_iniciou": None
-    }
+async def truco_new(request: Request, dificuldade: str = "normal"):
+    bot = TRUCO_DIFICULDADES.get(dificuldade, "guloso")
+    g, d = await executor.rodar(truco_nova, bot)
+    request.session["truco"] = g
+    return d
 
 
-# ----------------- PEDIR TRUCO (USER) -----------------
+# ----------------- PEDIDOS DE TRUCO -----------------
 
 @app.post("/api/truco/pedir")
-def truco_pedir(request: Request):
-    ensure_truco(request)
-    g = request.session["truco"]
-
-    if g["finalizado"] or fim_de_jogo(g):
-        g["finalizado"] = True
-        request.session["truco"] = g
-        return {"ok": True, "fim_jogo": True, "placar": placar_list(g), "vez": g["vez"], "mensagem": mensagem_fim(g)}
-
-    if g["pedido"] is not None:
-        return JSONResponse({"ok": False, "erro": "Já existe um pedido pendente."}, 400)
-
-    if g["vez"] != "user":
-        return JSONResponse({"ok": False, "erro": "Você só pode pedir na sua vez."}, 400)
-
-    proximo = prox_valor(g["mao_valor"])
-    if not proximo:
-        return JSONResponse({"ok": False, "erro": "Mão já está no máximo."}, 400)
-
-    acao = bot_responde_pedido(g, proximo)
-
-    if acao == "correr":
-        g["placar_user"] += g["mao_valor"]
+async def truco_pedir(request: Request):
+    return await truco_acao(request, {"tipo": "pedir"})
 
-        if fim_de_jogo(g):
-            g["finalizado"] = True
-            request.session["truco"] = g
-            return {"ok": True, "fim_jogo": True, "placar": placar_list(g), "vez": g["vez"], "mensagem": mensagem_fim(g)}
-
-        iniciar_nova_mao(request, mao_inicial="user")
-        g2 = request.session["truco"]
-        bot_iniciou = bot_torna_se_precisar(g2)
-        request.session["truco"] = g2
-
-        return {
-            "ok": True,
-            "mensagem": f"Bot correu! Você ganhou {g['mao_valor']} ponto(s).",
-            "nova_mao": True,
-            "vira": g2["vira"],
-            "mao_user": g2["mao_user"],
-            "placar": placar_list(g2),
-            "mao_valor": g2["mao_valor"],
-            "pedido": g2["pedido"],
-            "manilha": g2["manilha"],
-            "vez": g2["vez"],
-            "fim_jogo": False,
-            "bot_iniciou": bot_iniciou
-        }
-
-    if acao == "aceitar":
-        g["mao_valor"] = proximo
-        request.session["truco"] = g
-        return {
-            "ok": True,
-            "mensagem": f"Bot aceitou! Mão valendo {g['mao_valor']}.",
-            "placar": placar_list(g),
-            "mao_valor": g["mao_valor"],
-            "pedido": g["pedido"],
-            "manilha": g["manilha"],
-            "vez": g["vez"],
-            "fim_jogo": False,
-            "bot_iniciou": None
-        }
-
-    proximo2 = prox_valor(proximo)
-    if not proximo2:
-        g["mao_valor"] = proximo
-        request.session["truco"] = g
-        return {
-            "ok": True,
-            "mensagem": f"Bot aceitou! Mão valendo {g['mao_valor']}.",
-            "placar": placar_list(g),
-            "mao_valor": g["mao_valor"],
-            "pedido": g["pedido"],
-            "manilha": g["manilha"],
-            "vez": g["vez"],
-            "fim_jogo": False,
-            "bot_iniciou": None
-        }
-
-    g["pedido"] = {"por": "bot", "base": g["mao_valor"], "valor": proximo2}
-    request.session["truco"] = g
-    return {
-        "ok": True,
-        "mensagem": f"Bot aumentou pra {proximo2}! Aceita, corre ou aumenta?",
-        "placar": placar_list(g),
-        "mao_valor": g["mao_valor"],
-        "pedido": g["pedido"],
-        "manilha": g["manilha"],
-        "vez": g["vez"],
-        "fim_jogo": False,
-        "bot_iniciou": None
-    }
-
-
-# ----------------- AUMENTAR (USER responde pedido do BOT) -----------------
 
 @app.post("/api/truco/aumentar")
-def truco_aumentar(request: Request):
-    ensure_truco(request)
-    g = request.session["truco"]
+async def truco_aumentar(request: Request):
+    # user responde pedido do bot aumentando
+    return await truco_acao(request, {"tipo": "aumentar"})
 
-    if g["pedido"] is None or g["pedido"]["por"] != "bot":
-        return JSONResponse({"ok": False, "erro": "Não há pedido do bot para aumentar."}, 400)
-
-    valor_atual_pedido = g["pedido"]["valor"]
-    proximo = prox_valor(valor_atual_pedido)
-    if not proximo:
-        return JSONResponse({"ok": False, "erro": "Não dá para aumentar mais."}, 400)
-
-    acao = bot_responde_pedido(g, proximo)
-
-    if acao == "correr":
-        g["placar_user"] += valor_atual_pedido
-        g["pedido"] = None
-
-        if fim_de_jogo(g):
-            g["finalizado"] = True
-            request.session["truco"] = g
-            return {"ok": True, "fim_jogo": True, "placar": placar_list(g), "vez": g["vez"], "mensagem": mensagem_fim(g)}
-
-        iniciar_nova_mao(request, mao_inicial="user")
-        g2 = request.session["truco"]
-        bot_iniciou = bot_torna_se_precisar(g2)
-        request.session["truco"] = g2
-
-        return {
-            "ok": True,
-            "mensagem": f"Bot correu! Você ganhou {valor_atual_pedido} ponto(s).",
-            "nova_mao": True,
-            "vira": g2["vira"],
-            "mao_user": g2["mao_user"],
-            "placar": placar_list(g2),
-            "mao_valor": g2["mao_valor"],
-            "pedido": g2["pedido"],
-            "manilha": g2["manilha"],
-            "vez": g2["vez"],
-            "fim_jogo": False,
-            "bot_iniciou": bot_iniciou
-        }
-
-    if acao == "aceitar":
-        g["mao_valor"] = proximo
-        g["pedido"] = None
-
-        bot_card = bot_torna_se_precisar(g)
-        request.session["truco"] = g
-
-        return {
-            "ok": True,
-            "mensagem": f"Bot aceitou! Mão valendo {g['mao_valor']}.",
-            "placar": placar_list(g),
-            "mao_valor": g["mao_valor"],
-            "pedido": g["pedido"],
-            "manilha": g["manilha"],
-            "vez": g["vez"],
-            "fim_jogo": False,
-            "bot_iniciou": bot_card
-        }
-
-    proximo2 = prox_valor(proximo)
-    if not proximo2:
-        g["mao_valor"] = proximo
-        g["pedido"] = None
-        bot_card = bot_torna_se_precisar(g)
-        request.session["truco"] = g
-        return {
-            "ok": True,
-            "mensagem": f"Bot aceitou! Mão valendo {g['mao_valor']}.",
-            "placar": placar_list(g),
-            "mao_valor": g["mao_valor"],
-            "pedido": g["pedido"],
-            "manilha": g["manilha"],
-            "vez": g["vez"],
-            "fim_jogo": False,
-            "bot_iniciou": bot_card
-        }
-
-    g["pedido"] = {"por": "bot", "base": g["mao_valor"], "valor": proximo2}
-    request.session["truco"] = g
-    return {
-        "ok": True,
-        "mensagem": f"Bot aumentou pra {proximo2}! Aceita, corre ou aumenta?",
-        "placar": placar_list(g),
-        "mao_valor": g["mao_valor"],
-        "pedido": g["pedido"],
-        "manilha": g["manilha"],
-        "vez": g["vez"],
-        "fim_jogo": False,
-        "bot_iniciou": None
-    }
-
-
-# ----------------- ACEITAR (USER aceita pedido do BOT) -----------------
 
 @app.post("/api/truco/aceitar")
-def truco_aceitar(request: Request):
-    ensure_truco(request)
-    g = request.session["truco"]
-
-    if g["pedido"] is None or g["pedido"]["por"] != "bot":
-        return JSONResponse({"ok": False, "erro": "Não há pedido do bot para aceitar."}, 400)
-
-    g["mao_valor"] = g["pedido"]["valor"]
-    g["pedido"] = None
-
-    bot_card = bot_torna_se_precisar(g)
-    request.session["truco"] = g
-
-    return {
-        "ok": True,
-        "mensagem": f"Aceito! Mão valendo {g['mao_valor']}.",
-        "placar": placar_list(g),
-        "mao_valor": g["mao_valor"],
-        "pedido": g["pedido"],
-        "manilha": g["manilha"],
-        "vez": g["vez"],
-        "fim_jogo": False,
-        "bot_iniciou": bot_card
-    }
-
+async def truco_aceitar(request: Request):
+    return await truco_acao(request, {"tipo": "aceitar"})
 
-# ----------------- CORRER (USER corre do pedido do BOT) -----------------
 
 @app.post("/api/truco/correr")
-def truco_correr(request: Request):
-    ensure_truco(request)
-    g = request.session["truco"]
-
-    if g["pedido"] is None or g["pedido"]["por"] != "bot":
-        return JSONResponse({"ok": False, "erro": "Não há pedido do bot para correr."}, 400)
-
-    base = g["pedido"]["base"]
-    g["placar_bot"] += base
-    g["pedido"] = None
-
-    if fim_de_jogo(g):
-        g["finalizado"] = True
-        request.session["truco"] = g
-        return {"ok": True, "fim_jogo": True, "placar": placar_list(g), "vez": g["vez"], "mensagem": mensagem_fim(g)}
-
-    iniciar_nova_mao(request, mao_inicial="bot")
-    g2 = request.session["truco"]
-    bot_card = bot_torna_se_precisar(g2)
-    request.session["truco"] = g2
-
-    return {
-        "ok": True,
-        "mensagem": f"Você correu! Bot ganhou {base} ponto(s).",
-        "nova_mao": True,
-        "vira": g2["vira"],
-        "mao_user": g2["mao_user"],
-        "placar": placar_list(g2),
-        "mao_valor": g2["mao_valor"],
-        "pedido": g2["pedido"],
-        "manilha": g2["manilha"],
-        "vez": g2["vez"],
-        "fim_jogo": False,
-        "bot_iniciou": bot_card
-    }
+async def truco_correr(request: Request):
+    return await truco_acao(request, {"tipo": "correr"})
 
 
 # ----------------- JOGAR CARTA (USER) -----------------
 
 @app.post("/api/truco/play")
 async def truco_play(request: Request):
-    ensure_truco(request)
-    g = request.session["truco"]
-
-    if g["finalizado"] or fim_de_jogo(g):
-        g["finalizado"] = True
-        request.session["truco"] = g
-        return {"ok": True, "fim_jogo": True, "placar": placar_list(g), "vez": g["vez"], "mensagem": mensagem_fim(g)}
-
-    if g["pedido"] is not None:
-        return JSONResponse({"ok": False, "erro": "Responda ao pedido (Aceitar/Correr/Aumentar) antes de jogar."}, 400)
-
     body = await request.json()
-    carta_user = body.get("carta")
-
-    if g["vez"] != "user":
-        return JSONResponse({"ok": False, "erro": "Espere o bot jogar."}, 400)
-
-    if not carta_user or carta_user not in g["mao_user"]:
-        return JSONResponse({"ok": False, "erro": "Carta inválida."}, 400)
+    if not isinstance(body, dict):
+        return JSONResponse({"ok": False, "erro": "Carta inválida."}, status_code=400)
+    return await truco_acao(request, {"tipo": "jogar", "carta": body.get("carta")})
 
-    # ✅ define quem iniciou a rodada atual:
-    # - se o bot já tinha tornado (carta na mesa), iniciador = bot
-    # - senão, iniciador = user
-    rodada_iniciador = "bot" if g["carta_bot_mesa"] is not None else "user"
-    g["rodada_iniciador"] = rodada_iniciador
 
-    # 1) user joga
-    g["mao_user"].remove(carta_user)
+# ----------------- WEBSOCKET -----------------
 
-    # 2) carta do bot
-    if g["carta_bot_mesa"] is not None:
-        carta_bot = g["carta_bot_mesa"]
-        g["carta_bot_mesa"] = None
-    else:
-        if not g["mao_bot"]:
-            return JSONResponse({"ok": False, "erro": "Bot sem carta disponível."}, 400)
-        carta_bot = bot_escolher_resposta(g["mao_bot"], carta_user, g["manilha"])
-        g["mao_bot"].remove(carta_bot)
-
-    # 3) resolve a rodada
-    r = truco_comparar(carta_user, carta_bot, g["manilha"])
-
-    if r == 1:
-        g["tricks"].append("user")
-        vencedor_rodada = "user"
-    elif r == -1:
-        g["tricks"].append("bot")
-        vencedor_rodada = "bot"
-    else:
-        g["tricks"].append("tie")
-        vencedor_rodada = "tie"
-
-    # 4) define quem "torna" a próxima rodada
-    if vencedor_rodada == "user":
-        g["vez"] = "user"
-    elif vencedor_rodada == "bot":
-        g["vez"] = "bot"
-    else:
-        # ✅ empate: mantém iniciador da rodada
-        g["vez"] = g["rodada_iniciador"]
-
-    # 5) verifica vencedor da mão
-    win = vencedor_da_mao(g["tricks"], g["mao_inicial"])
-    if win is not None:
-        if win == "user":
-            g["placar_user"] += g["mao_valor"]
-        elif win == "bot":
-            g["placar_bot"] += g["mao_valor"]
-
-        if fim_de_jogo(g):
-            g["finalizado"] = True
-            request.session["truco"] = g
-            return {
-                "ok": True,
-                "sua_carta": carta_user,
-                "carta_bot": carta_bot,
-                "resultado_rodada": "venceu" if r == 1 else ("perdeu" if r == -1 else "empatou"),
-                "placar": placar_list(g),
-                "mao_valor": g["mao_valor"],
-                "pedido": g["pedido"],
-                "manilha": g["manilha"],
-                "vez": g["vez"],
-                "fim_jogo": True,
-                "mensagem": mensagem_fim(g),
-                "nova_mao": False,
-                "bot_iniciou": None
-            }
-
-        # ✅ quem ganhou a mão é mão na próxima
-        iniciar_nova_mao(request, mao_inicial=win)
-        g2 = request.session["truco"]
-
-        bot_iniciou = bot_torna_se_precisar(g2)  # se bot for mão, ele torna
-        request.session["truco"] = g2
-
-        return {
-            "ok": True,
-            "sua_carta": carta_user,
-            "carta_bot": carta_bot,
-            "resultado_rodada": "venceu" if r == 1 else ("perdeu" if r == -1 else "empatou"),
-            "placar": placar_list(g2),
-            "vira": g2["vira"],
-            "mao_user": g2["mao_user"],
-            "mao_valor": g2["mao_valor"],
-            "pedido": g2["pedido"],
-            "manilha": g2["manilha"],
-            "vez": g2["vez"],
-            "fim_jogo": False,
-            "nova_mao": True,
-            "bot_iniciou": bot_iniciou
-        }
-
-    # 6) se a próxima vez for do bot, ele torna automaticamente (ou pede truco)
-    bot_iniciou = None
-    if g["vez"] == "bot" and g["pedido"] is None and not g["finalizado"] and not fim_de_jogo(g):
-        bot_iniciou = bot_torna_se_precisar(g)
-        # se ele tornou, g["vez"] vira "user" e a carta fica na mesa
-        # se ele pediu truco, "pedido" fica preenchido e a vez permanece do bot aguardando sua resposta
+@app.websocket("/ws/truco")
+async def truco_ws(websocket: WebSocket):
+    """
+    Partida ao vivo: o estado fica em memória enquanto a conexão durar e só
+    vai para a sessão no fim de cada mão (e ao desconectar).
+
+    Mensagens do cliente (o "id" volta na resposta):
+        {"id": 1, "novo": "normal"}           nova partida (dificuldade)
+        {"id": 2, "acoes": [{"tipo": ...}]}   mesmo formato de /api/truco/actions
+    Os lances do bot (bot_iniciou, pedido do bot) chegam nos eventos da
+    resposta, sem o cliente precisar perguntar de novo.
+    """
+    await websocket.accept()
+    sid = websocket.scope.get("session_id")
+    armazenamento = websocket.scope.get("session_store")
+    ensure_truco(websocket)
+    g = websocket.session["truco"]
 
-    request.session["truco"] = g
+    async def checkpoint():
+        if sid and armazenamento is not None:
+            await no_armazenamento(armazenamento, gravar_chave, armazenamento, sid, "truco", g)
 
-    return {
-        "ok": True,
-        "sua_carta": carta_user,
-        "carta_bot": carta_bot,
-        "resultado_rodada": "venceu" if r == 1 else ("perdeu" if r == -1 else "empatou"),
-        "placar": placar_list(g),
-        "mao_valor": g["mao_valor"],
-        "pedido": g["pedido"],
-        "manilha": g["manilha"],
-        "vez": g["vez"],
-        "fim_jogo": False,
-        "nova_mao": False,
-        "bot_iniciou": bot_iniciou
-    }
\ No newline at end of file
+    try:
+        while True:
+            try:
+                msg = json.loads(await websocket.receive_text())
+            except ValueError:
+                await websocket.send_json({"ok": False, "erro": "Mensagem inválida."})
+                continue
+            if not isinstance(msg, dict) or not isinstance(msg.get("novo", ""), str):
+                await websocket.send_json({"ok": False, "erro": "Mensagem inválida."})
+                continue
+
+            try:
+                if "novo" in msg:
+                    bot = TRUCO_DIFICULDADES.get(msg["novo"], "guloso")
+                    g, d = await executor.rodar(truco_nova, bot)
+                    await checkpoint()
+                else:
+                    g_novo, d, status = await executor.rodar(truco_processar, g, msg.get("acoes"))
+                    if status == 200:
+                        g = g_novo
+                    if any(e["nova_mao"] or e["fim_jogo"] for e in d.get("eventos", ())):
+                        await checkpoint()
+            except (Sobrecarga, TempoEsgotado) as e:
+                d = dict(ERROS_EXECUCAO[type(e)][0])
+
+            d["id"] = msg.get("id")
+            await websocket.send_json(d)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await checkpoint()
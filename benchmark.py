@@ -0,0 +1,386 @@
+"""
+Benchmarks dos jogos, para pegar regressão antes do deploy.
+
+Cenários HTTP: o `app` ASGI é chamado direto, no mesmo processo, sem rede e
+sem httpx (ClienteASGI monta o scope e guarda o cookie de sessão). Cada
+sessão roteirizada passa pelo mesmo caminho de um usuário de verdade:
+middlewares, sessão, executor. Saem req/s e latência p50/p99 por cenário
+(e por rota com -v).
+
+    truco      partidas completas por /api/truco/new, /play, /pedir, ...
+    amigo      grupos de 10/100/1000: adicionar, editar, remover, sortear
+    sorteador  sorteios grandes, NDJSON de 1M de números e lotes
+
+Micro (--micro): as funções puras do motor do Truco, em ns por chamada.
+
+Uso:
+    python -m benchmark                      # todos os cenários
+    python -m benchmark truco -n 50 --concorrencia 8
+    python -m benchmark --micro
+    python -m benchmark --salvar base.json   # depois: --comparar base.json
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+
+CENARIOS = ("truco", "amigo", "sorteador")
+
+
+# ----------------- CLIENTE ASGI -----------------
+
+class ClienteASGI:
+    """
+    Cliente HTTP mínimo que chama o app ASGI direto. Um cliente = uma sessão
+    (guarda os cookies). Cada request vai para `medidor` pela rota (path sem
+    query string).
+    """
+
+    def __init__(self, app, medidor=None):
+        self.app = app
+        self.medidor = medidor
+        self.cookies = {}
+
+    async def pedir(self, metodo, path, json_=None, texto=None, tipo="text/plain"):
+        caminho, _, query = path.partition("?")
+        headers = [(b"host", b"benchmark")]
+        corpo = b""
+        if json_ is not None:
+            corpo = json.dumps(json_).encode()
+            headers.append((b"content-type", b"application/json"))
+        elif texto is not None:
+            corpo = texto.encode()
+            headers.append((b"content-type", tipo.encode()))
+        if self.cookies:
+            headers.append((b"cookie", "; ".join(f"{k}={v}" for k, v in self.cookies.items()).encode()))
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": metodo,
+            "scheme": "http",
+            "path": caminho,
+            "raw_path": caminho.encode(),
+            "query_string": query.encode(),
+            "root_path": "",
+            "headers": headers,
+            "client": ("127.0.0.1", 0),
+            "server": ("benchmark", 80),
+        }
+
+        terminou = asyncio.Event()
+        corpo_enviado = False
+
+        async def receive():
+            nonlocal corpo_enviado
+            if not corpo_enviado:
+                corpo_enviado = True
+                return {"type": "http.request", "body": corpo, "more_body": False}
+            # StreamingResponse fica ouvindo o disconnect: só vem no fim
+            await terminou.wait()
+            return {"type": "http.disconnect"}
+
+        resposta = {"status": None, "headers": [], "corpo": []}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                resposta["status"] = message["status"]
+                resposta["headers"] = message.get("headers", [])
+            elif message["type"] == "http.response.body":
+                resposta["corpo"].append(message.get("body", b""))
+                if not message.get("more_body", False):
+                    terminou.set()
+
+        inicio = time.perf_counter()
+        await self.app(scope, receive, send)
+        segundos = time.perf_counter() - inicio
+        terminou.set()
+
+        for nome, valor in resposta["headers"]:
+            if nome == b"set-cookie":
+                cookie = valor.decode().split(";", 1)[0]
+                chave, _, v = cookie.partition("=")
+                if v == "null":
+                    self.cookies.pop(chave, None)
+                else:
+                    self.cookies[chave] = v
+        if self.medidor is not None:
+            self.medidor.registrar(f"{metodo} {caminho}", segundos)
+        return Resposta(resposta["status"], b"".join(resposta["corpo"]))
+
+
+class Resposta:
+    def __init__(self, status, corpo):
+        self.status = status
+        self.corpo = corpo
+
+    def json(self):
+        return json.loads(self.corpo)
+
+
+# ----------------- MEDIÇÃO -----------------
+
+def percentil(ordenados, p):
+    if not ordenados:
+        return 0.0
+    i = min(len(ordenados) - 1, max(0, round(p / 100 * len(ordenados)) - 1))
+    return ordenados[i]
+
+
+class Medidor:
+    def __init__(self):
+        self.rotas = {}  # rota -> [segundos]
+
+    def registrar(self, rota, segundos):
+        self.rotas.setdefault(rota, []).append(segundos)
+
+    @staticmethod
+    def resumir(latencias, segundos):
+        ordenadas = sorted(latencias)
+        return {
+            "requests": len(ordenadas),
+            "req_s": round(len(ordenadas) / segundos, 1) if segundos else 0.0,
+            "p50_ms": round(percentil(ordenadas, 50) * 1000, 3),
+            "p99_ms": round(percentil(ordenadas, 99) * 1000, 3),
+        }
+
+    def resumo(self, segundos):
+        todas = [s for lat in self.rotas.values() for s in lat]
+        d = self.resumir(todas, segundos)
+        d["segundos"] = round(segundos, 3)
+        d["rotas"] = {rota: self.resumir(lat, segundos) for rota, lat in sorted(self.rotas.items())}
+        return d
+
+
+# ----------------- CENÁRIOS -----------------
+
+async def sessao_truco(cliente, rng, dificuldade="normal", max_acoes=2000):
+    """Uma partida inteira até 12 pontos, jogando como o front joga."""
+    d = (await cliente.pedir("GET", f"/api/truco/new?dificuldade={dificuldade}")).json()
+    mao = list(d["mao_user"])
+    for _ in range(max_acoes):
+        if d.get("fim_jogo"):
+            return
+        pedido = d.get("pedido")
+        if pedido and pedido["por"] == "bot":
+            rota = rng.choice(("aceitar", "aceitar", "aceitar", "correr", "aumentar"))
+            r = await cliente.pedir("POST", f"/api/truco/{rota}")
+        elif not pedido and rng.random() < 0.1:
+            r = await cliente.pedir("POST", "/api/truco/pedir")
+        else:
+            r = await cliente.pedir("POST", "/api/truco/play", json_={"carta": rng.choice(mao)})
+        if r.status != 200:
+            # ação recusada (ex.: aumentar acima de 12): aceita ou joga uma carta
+            if pedido and pedido["por"] == "bot":
+                r = await cliente.pedir("POST", "/api/truco/aceitar")
+            else:
+                r = await cliente.pedir("POST", "/api/truco/play", json_={"carta": rng.choice(mao)})
+            if r.status != 200:
+                raise RuntimeError(f"Truco travou: {r.status} {r.corpo[:200]!r}")
+        d = r.json()
+        if d.get("sua_carta") in mao:
+            mao.remove(d["sua_carta"])
+        if d.get("nova_mao"):
+            mao = list(d["mao_user"])
+    raise RuntimeError("Partida de Truco não terminou")
+
+
+async def sessao_amigo(cliente, rng, tamanho):
+    nomes = [f"Pessoa {i}" for i in range(tamanho)]
+    ids = []
+    for nome in nomes:
+        d = (await cliente.pedir("POST", "/api/amigo-secreto/adicionar?delta=1", json_={"nome": nome})).json()
+        ids.append(d["adicionados"][0]["id"])
+    await cliente.pedir("GET", "/api/amigo-secreto/estado")
+    for i in rng.sample(range(tamanho), max(1, tamanho // 10)):
+        await cliente.pedir("POST", "/api/amigo-secreto/editar?delta=1", json_={"id": ids[i], "nome": nomes[i] + "!"})
+        nomes[i] += "!"
+    for i in sorted(rng.sample(range(tamanho), max(1, tamanho // 20)), reverse=True):
+        await cliente.pedir("POST", "/api/amigo-secreto/remover?delta=1", json_={"id": ids.pop(i)})
+        nomes.pop(i)
+    r = await cliente.pedir("POST", "/api/amigo-secreto/sortear")
+    anterior = r.json()["pares"]
+    casais = [[nomes[i], nomes[i + 1]] for i in range(0, len(nomes) // 5 * 2, 2)]
+    r = await cliente.pedir("POST", "/api/amigo-secreto/sortear", json_={"casais": casais, "anterior": anterior})
+    if r.status != 200:
+        raise RuntimeError(f"Sorteio do Amigo Secreto falhou: {r.corpo[:200]!r}")
+    await cliente.pedir("POST", "/api/amigo-secreto/reiniciar")
+
+
+async def sessao_sorteador(cliente, rng):
+    for _ in range(10):
+        r = await cliente.pedir("POST", "/api/sorteador/sortear", json_={"quantidade": 100_000, "de": 1, "ate": 10**9})
+        assert r.status == 200, r.corpo[:200]
+    r = await cliente.pedir("POST", "/api/sorteador/stream", json_={"quantidade": 1_000_000, "de": 1, "ate": 10**9})
+    assert r.corpo.endswith(b'{"ok": true, "total": 1000000}\n'), r.corpo[-200:]
+    specs = [{"quantidade": 100, "de": 1, "ate": 10_000} for _ in range(100)]
+    for _ in range(10):
+        r = await cliente.pedir("POST", "/api/sorteador/lote", json_={"sorteios": specs, "seed": rng.randrange(2**32)})
+        assert r.status == 200, r.corpo[:200]
+
+
+async def _rodar(app, sessoes, concorrencia):
+    """Roda as corrotinas de sessão (fábricas) com no máximo `concorrencia` juntas."""
+    medidor = Medidor()
+    semaforo = asyncio.Semaphore(concorrencia)
+
+    async def uma(fabrica):
+        async with semaforo:
+            await fabrica(ClienteASGI(app, medidor))
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(uma(f) for f in sessoes))
+    return medidor.resumo(time.perf_counter() - inicio)
+
+
+def rodar_cenarios(cenarios, partidas=20, tamanhos=(10, 100, 1000), concorrencia=1, seed=0, dificuldade="normal"):
+    """Retorna {nome do cenário: resumo}."""
+    from app import app  # só aqui: --micro não precisa subir o app
+
+    rng = random.Random(seed)
+    planos = {}
+    if "truco" in cenarios:
+        planos["truco"] = [
+            (lambda c, r=random.Random(rng.random()): sessao_truco(c, r, dificuldade)) for _ in range(partidas)
+        ]
+    if "amigo" in cenarios:
+        for tamanho in tamanhos:
+            planos[f"amigo-{tamanho}"] = [
+                lambda c, r=random.Random(rng.random()), t=tamanho: sessao_amigo(c, r, t)
+            ]
+    if "sorteador" in cenarios:
+        planos["sorteador"] = [lambda c, r=random.Random(rng.random()): sessao_sorteador(c, r)]
+
+    resultados = {}
+    for nome, sessoes in planos.items():
+        resultados[nome] = asyncio.run(_rodar(app, sessoes, concorrencia))
+    return resultados
+
+
+# ----------------- MICRO -----------------
+
+def _entradas_micro(n, seed):
+    from truco.motor import truco_baralho
+
+    rng = random.Random(seed)
+    comparar, maos, respostas = [], [], []
+    for _ in range(n):
+        baralho = truco_baralho(rng)
+        manilha = rng.randrange(6)
+        comparar.append((baralho[0], baralho[1], manilha))
+        respostas.append((baralho[2:2 + rng.randint(1, 3)], baralho[5], manilha))
+        tricks = [rng.choice(("user", "bot", "tie")) for _ in range(rng.randint(1, 3))]
+        maos.append((tricks, rng.choice(("user", "bot"))))
+    return comparar, maos, respostas
+
+
+def rodar_micro(n=10_000, repeticoes=5, seed=0):
+    """ns por chamada (a melhor de `repeticoes` passadas por n entradas)."""
+    from truco.motor import bot_escolher_resposta, truco_comparar, vencedor_da_mao
+
+    comparar, maos, respostas = _entradas_micro(n, seed)
+    casos = {
+        "truco_comparar": (truco_comparar, comparar),
+        "vencedor_da_mao": (vencedor_da_mao, maos),
+        "bot_escolher_resposta": (bot_escolher_resposta, respostas),
+    }
+    resultados = {}
+    for nome, (fn, entradas) in casos.items():
+        melhor = float("inf")
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            for args in entradas:
+                fn(*args)
+            melhor = min(melhor, time.perf_counter() - inicio)
+        resultados[nome] = {"ns": round(melhor / len(entradas) * 1e9, 1), "chamadas_s": round(len(entradas) / melhor)}
+    return resultados
+
+
+# ----------------- RELATÓRIO / COMPARAÇÃO -----------------
+
+def relatorio(resultados, detalhado=False):
+    linhas = []
+    if "cenarios" in resultados:
+        linhas.append(f"{'cenário':<16}{'reqs':>8}{'seg':>9}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+        for nome, r in resultados["cenarios"].items():
+            linhas.append(
+                f"{nome:<16}{r['requests']:>8}{r['segundos']:>9.2f}{r['req_s']:>10.1f}"
+                f"{r['p50_ms']:>10.2f}{r['p99_ms']:>10.2f}"
+            )
+            if detalhado:
+                for rota, rr in r["rotas"].items():
+                    linhas.append(f"    {rota:<40}{rr['requests']:>8}{rr['p50_ms']:>10.2f}{rr['p99_ms']:>10.2f}")
+    if "micro" in resultados:
+        linhas.append(f"{'função':<24}{'ns/chamada':>12}{'chamadas/s':>14}")
+        for nome, r in resultados["micro"].items():
+            linhas.append(f"{nome:<24}{r['ns']:>12.1f}{r['chamadas_s']:>14,}")
+    return "\n".join(linhas)
+
+
+def comparar(base, atual, tolerancia):
+    """Lista de regressões (piora maior que `tolerancia`, ex.: 0.2 = 20%)."""
+    regressoes = []
+    for nome, r in atual.get("cenarios", {}).items():
+        b = base.get("cenarios", {}).get(nome)
+        if not b:
+            continue
+        if r["req_s"] < b["req_s"] * (1 - tolerancia):
+            regressoes.append(f"{nome}: req/s {b['req_s']} -> {r['req_s']}")
+        if r["p99_ms"] > b["p99_ms"] * (1 + tolerancia):
+            regressoes.append(f"{nome}: p99 {b['p99_ms']}ms -> {r['p99_ms']}ms")
+    for nome, r in atual.get("micro", {}).items():
+        b = base.get("micro", {}).get(nome)
+        if b and r["ns"] > b["ns"] * (1 + tolerancia):
+            regressoes.append(f"{nome}: {b['ns']}ns -> {r['ns']}ns")
+    return regressoes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks dos jogos (in-process, sem rede).")
+    parser.add_argument("cenarios", nargs="*", metavar="cenário", help=f"um ou mais de: {', '.join(CENARIOS)}")
+    parser.add_argument("-n", "--partidas", type=int, default=20, help="partidas de Truco")
+    parser.add_argument("--amigos", default="10,100,1000", help="tamanhos dos grupos do Amigo Secreto")
+    parser.add_argument("--concorrencia", type=int, default=1, help="sessões rodando ao mesmo tempo")
+    parser.add_argument("--dificuldade", choices=("normal", "dificil"), default="normal")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--micro", action="store_true", help="só as funções puras do Truco")
+    parser.add_argument("-v", "--detalhado", action="store_true", help="latência por rota")
+    parser.add_argument("--salvar", metavar="ARQ", help="grava os resultados em JSON")
+    parser.add_argument("--comparar", metavar="ARQ", help="compara com um JSON salvo antes")
+    parser.add_argument("--tolerancia", type=float, default=0.2, help="piora aceita na comparação (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+    for nome in args.cenarios:
+        if nome not in CENARIOS:
+            parser.error(f"cenário inválido: {nome} (use {', '.join(CENARIOS)})")
+
+    resultados = {"parametros": {k: v for k, v in vars(args).items() if k not in ("salvar", "comparar", "detalhado", "tolerancia")}}
+    if args.micro:
+        resultados["micro"] = rodar_micro(seed=args.seed)
+    else:
+        tamanhos = tuple(int(t) for t in args.amigos.split(",") if t)
+        resultados["cenarios"] = rodar_cenarios(
+            args.cenarios or CENARIOS, args.partidas, tamanhos, args.concorrencia, args.seed, args.dificuldade
+        )
+    print(relatorio(resultados, args.detalhado))
+
+    if args.salvar:
+        with open(args.salvar, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, indent=2, ensure_ascii=False)
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            base = json.load(f)
+        if base.get("parametros") != resultados["parametros"]:
+            print("\naviso: a base foi medida com outros parâmetros")
+        regressoes = comparar(base, resultados, args.tolerancia)
+        if regressoes:
+            print("\nREGRESSÕES:")
+            print("\n".join(f"  {r}" for r in regressoes))
+            sys.exit(1)
+        print("\nsem regressões")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""
+Arquivos estáticos com cache longo.
+
+EstaticosComHash indexa a pasta na subida: cada arquivo ganha uma URL com o
+hash do conteúdo (css/truco.css -> /static/css/truco.3f9a1c2b7e.css), que os
+templates pegam com static_url()/img_url(). Pela URL com hash a resposta sai
+com Cache-Control immutable; pela URL sem hash, com no-cache. As duas levam
+ETag forte (hash do conteúdo) e respondem 304 ao If-None-Match.
+
+CSS/JS e outros textos ficam em memória já comprimidos (gzip, e brotli se
+o pacote estiver instalado), então a compressão acontece uma vez só. Nos CSS,
+os url(/img/...) são trocados pelas URLs com hash das imagens.
+
+Os arquivos gerados (img/gerado) já têm o hash no nome e vão direto por
+ArquivosImutaveis.
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import FileResponse, Response
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional: sem ele só vai gzip
+    brotli = None
+
+CACHE_IMUTAVEL = "public, max-age=31536000, immutable"
+CACHE_REVALIDAR = "no-cache"
+COMPRIMIR = {".css", ".js", ".json", ".svg", ".html", ".txt", ".map"}
+TAM_HASH_URL = 10
+
+_COM_HASH = re.compile(r"^(.*)\.([0-9a-f]{%d})(\.[^./]+)$" % TAM_HASH_URL)
+_CSS_URL = re.compile(r"""url\(\s*(['"]?)(/[^'")\s]+)\1\s*\)""")
+
+
+class ArquivosImutaveis(StaticFiles):
+    """StaticFiles para arquivos com hash no nome (Cache-Control immutable)."""
+
+    def file_response(self, *args, **kwargs):
+        resposta = super().file_response(*args, **kwargs)
+        resposta.headers["Cache-Control"] = CACHE_IMUTAVEL
+        return resposta
+
+
+def aceita_codificacao(accept_encoding, codificacao):
+    for parte in accept_encoding.split(","):
+        nome, _, params = parte.strip().partition(";")
+        if nome.strip() == codificacao:
+            return params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+
+def etag_bate(if_none_match, etag):
+    if not if_none_match:
+        return False
+    candidatos = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+    return etag in candidatos or "*" in candidatos
+
+
+class EstaticosComHash(StaticFiles):
+    def __init__(self, *, directory, prefixo, reescrever_url=None, **kwargs):
+        super().__init__(directory=directory, **kwargs)
+        self.prefixo = prefixo.rstrip("/")
+        self.reescrever_url = reescrever_url
+        self._arquivos = {}  # rel -> dict (caminho, stat, hash, tipo, corpo, gzip, br)
+        self.indexar()
+
+    # ----------------- ÍNDICE -----------------
+
+    def indexar(self):
+        self._arquivos = {}
+        for raiz, _, nomes in os.walk(self.directory):
+            for nome in nomes:
+                caminho = os.path.join(raiz, nome)
+                rel = os.path.relpath(caminho, self.directory).replace(os.sep, "/")
+                self._arquivos[rel] = self._ler(caminho)
+
+    def _ler(self, caminho):
+        st = os.stat(caminho)
+        ext = os.path.splitext(caminho)[1].lower()
+        arq = {
+            "caminho": caminho,
+            "stat": (st.st_mtime_ns, st.st_size),
+            "tipo": mimetypes.guess_type(caminho)[0] or "application/octet-stream",
+            "corpo": None,
+            "gzip": None,
+            "br": None,
+        }
+        if ext in COMPRIMIR:
+            # texto: fica inteiro em memória, já comprimido
+            with open(caminho, "rb") as f:
+                corpo = f.read()
+            if ext == ".css" and self.reescrever_url is not None:
+                corpo = self._reescrever_css(corpo)
+            arq["corpo"] = corpo
+            arq["hash"] = hashlib.sha256(corpo).hexdigest()
+            gz = gzip.compress(corpo, 9, mtime=0)
+            if len(gz) < len(corpo):
+                arq["gzip"] = gz
+            if brotli is not None:
+                br = brotli.compress(corpo, quality=11)
+                if len(br) < len(corpo):
+                    arq["br"] = br
+        else:
+            h = hashlib.sha256()
+            with open(caminho, "rb") as f:
+                for bloco in iter(lambda: f.read(1 << 16), b""):
+                    h.update(bloco)
+            arq["hash"] = h.hexdigest()
+        return arq
+
+    def _reescrever_css(self, corpo):
+        texto = corpo.decode("utf-8")
+
+        def troca(m):
+            return f'url("{self.reescrever_url(m.group(2))}")'
+
+        return _CSS_URL.sub(troca, texto).encode("utf-8")
+
+    def _atual(self, rel):
+        """Entrada do índice, relida se o arquivo mudou em disco (dev)."""
+        arq = self._arquivos.get(rel)
+        if arq is None:
+            return None
+        try:
+            st = os.stat(arq["caminho"])
+        except OSError:
+            del self._arquivos[rel]
+            return None
+        if (st.st_mtime_ns, st.st_size) != arq["stat"]:
+            arq = self._arquivos[rel] = self._ler(arq["caminho"])
+        return arq
+
+    def url(self, caminho):
+        """URL com hash de um arquivo ("css/truco.css" ou "/static/css/truco.css")."""
+        rel = caminho
+        if rel.startswith(self.prefixo + "/"):
+            rel = rel[len(self.prefixo) + 1:]
+        rel = rel.lstrip("/")
+        arq = self._atual(rel)
+        if arq is None:
+            return caminho if caminho.startswith("/") else f"{self.prefixo}/{rel}"
+        base, ext = os.path.splitext(rel)
+        return f"{self.prefixo}/{base}.{arq['hash'][:TAM_HASH_URL]}{ext}"
+
+    # ----------------- RESPOSTA -----------------
+
+    def _resolver(self, rel):
+        m = _COM_HASH.match(rel)
+        if m:
+            arq = self._atual(m.group(1) + m.group(3))
+            if arq is not None:
+                # hash antigo (deploy anterior): serve o atual, mas sem cache longo
+                return arq, arq["hash"].startswith(m.group(2))
+        return self._atual(rel), False
+
+    async def get_response(self, path, scope):
+        arq, versionado = self._resolver(path.replace(os.sep, "/"))
+        if arq is None:
+            return await super().get_response(path, scope)
+        if scope["method"] not in ("GET", "HEAD"):
+            raise HTTPException(status_code=405)
+
+        pedido = Headers(scope=scope)
+        corpo, codificacao = arq["corpo"], None
+        if corpo is not None:
+            accept = pedido.get("accept-encoding", "")
+            if arq["br"] is not None and aceita_codificacao(accept, "br"):
+                corpo, codificacao = arq["br"], "br"
+            elif arq["gzip"] is not None and aceita_codificacao(accept, "gzip"):
+                corpo, codificacao = arq["gzip"], "gzip"
+
+        # ETag forte muda com a codificação (bytes diferentes)
+        etag = arq["hash"][:32] + (f"-{codificacao}" if codificacao else "")
+        headers = {
+            "ETag": f'"{etag}"',
+            "Cache-Control": CACHE_IMUTAVEL if versionado else CACHE_REVALIDAR,
+        }
+        if arq["corpo"] is not None:
+            headers["Vary"] = "Accept-Encoding"
+        if etag_bate(pedido.get("if-none-match"), headers["ETag"]):
+            return Response(status_code=304, headers=headers)
+
+        if corpo is None:
+            return FileResponse(arq["caminho"], headers=headers, media_type=arq["tipo"])
+        if codificacao:
+            headers["Content-Encoding"] = codificacao
+        return Response(corpo, media_type=arq["tipo"], headers=headers)
@@ -0,0 +1,94 @@
+"""
+Execução do trabalho pesado (sorteios, jogadas do bot) fora do event loop.
+
+As rotas chamam `await executor.rodar(fn, ...)`: a função roda num pool de
+threads ou de processos (EXECUCAO_MODO), com um tempo máximo por request e um
+limite de tarefas na fila. Fila cheia vira 503 na hora (Sobrecarga), em vez
+de empilhar requests e subir a latência de todo mundo; tempo estourado vira
+504 (TempoEsgotado).
+
+No modo "processo" a função e os argumentos vão por pickle: use funções de
+módulo puras (recebem e devolvem dados), nada de request/sessão. O que for
+carregado na subida (tabelas etc.) vai em `inicializar`, que cada processo
+roda ao nascer.
+"""
+
+import asyncio
+import functools
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+EXECUCAO_MODO = os.environ.get("EXECUCAO_MODO", "thread")  # "thread" ou "processo"
+EXECUCAO_WORKERS = int(os.environ.get("EXECUCAO_WORKERS", os.cpu_count() or 2))
+EXECUCAO_FILA = int(os.environ.get("EXECUCAO_FILA", 64))  # rodando + esperando
+EXECUCAO_TEMPO = float(os.environ.get("EXECUCAO_TEMPO", 5.0))  # segundos por request
+
+
+class Sobrecarga(Exception):
+    """Fila do pool cheia: o request é recusado (503)."""
+
+
+class TempoEsgotado(Exception):
+    """A tarefa passou do tempo do request (504)."""
+
+
+def _semear(inicializar=None):
+    # processos filhos herdam o estado do random do pai no fork
+    random.seed()
+    if inicializar is not None:
+        inicializar()
+
+
+class Executor:
+    def __init__(
+        self, modo=EXECUCAO_MODO, workers=EXECUCAO_WORKERS, fila=EXECUCAO_FILA, tempo=EXECUCAO_TEMPO,
+        inicializar=None,
+    ):
+        if modo not in ("thread", "processo"):
+            raise ValueError(f"EXECUCAO_MODO inválido: {modo!r}")
+        self.modo = modo
+        self.workers = workers
+        self.fila = fila
+        self.tempo = tempo
+        self.inicializar = inicializar
+        self.ocupadas = 0
+        self.recusadas = 0
+        self.estouradas = 0
+        self._pool = None
+
+    def _pool_atual(self):
+        if self._pool is None:
+            if self.modo == "processo":
+                self._pool = ProcessPoolExecutor(
+                    self.workers, initializer=_semear, initargs=(self.inicializar,)
+                )
+            else:
+                self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix="jogos")
+        return self._pool
+
+    def _liberar(self, _futuro):
+        self.ocupadas -= 1
+
+    async def rodar(self, fn, *args, tempo=None, **kwargs):
+        """Roda fn(*args, **kwargs) no pool e devolve o resultado."""
+        if self.ocupadas >= self.fila:
+            self.recusadas += 1
+            raise Sobrecarga()
+
+        loop = asyncio.get_running_loop()
+        futuro = loop.run_in_executor(self._pool_atual(), functools.partial(fn, *args, **kwargs))
+        # a vaga só volta quando a tarefa termina de verdade (uma thread que
+        # estourou o tempo continua rodando até o fim)
+        self.ocupadas += 1
+        futuro.add_done_callback(self._liberar)
+        try:
+            return await asyncio.wait_for(asyncio.shield(futuro), self.tempo if tempo is None else tempo)
+        except asyncio.TimeoutError:
+            self.estouradas += 1
+            raise TempoEsgotado()
+
+    def fechar(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,366 @@
+"""
+Variantes otimizadas das imagens (cartas do Truco e capas da home).
+
+Para cada imagem configurada em IMAGENS_GRUPOS são geradas versões menores
+em AVIF e WebP, com o hash do conteúdo no nome do arquivo
+(img/gerado/img-truco/2♠-160.3f9a1c2b.webp), e um manifesto JSON liga a
+imagem original às variantes. Como o nome muda quando o conteúdo muda, os
+arquivos gerados podem ser cacheados para sempre.
+
+O Pillow é opcional: sem ele o app usa o manifesto que já estiver em disco e,
+para o que não tiver variante, cai na imagem original. Na subida o app só
+lê o manifesto; com IMAGENS_GERAR=1 ele também gera o que estiver faltando.
+
+As cartas do Truco também viram um sprite só (cartas.<hash>.webp/.avif) com
+um CSS de posições, para o baralho inteiro vir em um request.
+
+Gerar de novo (ex.: depois de trocar uma carta):
+    python -m imagens -j 8
+"""
+
+import argparse
+import fnmatch
+import hashlib
+import io
+import json
+import os
+import time
+
+IMG_DIR = "img"
+GERADO_DIR = os.path.join(IMG_DIR, "gerado")
+MANIFESTO = os.path.join(GERADO_DIR, "manifesto.json")
+URL_BASE = "/img"
+
+# padrão (relativo a img/) -> larguras geradas; o primeiro que casar vale
+IMAGENS_GRUPOS = [
+    ("capa-*.png", (480, 960)),
+    ("img-truco/capa-*.png", (480, 960)),
+    ("img-truco/*.png", (160, 320)),
+]
+FORMATOS = {
+    "avif": {"quality": 55, "speed": 8},
+    "webp": {"quality": 80, "method": 6},
+}
+
+# sprite das cartas do Truco: as 24 do baralho + o verso, numa imagem só
+ATLAS_PASTA = "img-truco"
+ATLAS_JSON = os.path.join(GERADO_DIR, "atlas.json")
+ATLAS_COLUNAS = 5
+ATLAS_CELULA = (320, 464)  # 2x de --card-w máximo, proporção 1,45 das cartas
+
+_manifesto = None
+_atlas = None
+
+
+def _hash(dados: bytes, n: int = 8) -> str:
+    return hashlib.sha256(dados).hexdigest()[:n]
+
+
+def _larguras(rel):
+    for padrao, larguras in IMAGENS_GRUPOS:
+        if fnmatch.fnmatch(rel, padrao):
+            return larguras
+    return None
+
+
+def origens(img_dir=IMG_DIR):
+    """Imagens (caminho relativo a img/) que têm variantes configuradas."""
+    achadas = []
+    for raiz, pastas, arquivos in os.walk(img_dir):
+        pastas[:] = [p for p in pastas if os.path.join(raiz, p) != GERADO_DIR]
+        for nome in arquivos:
+            rel = os.path.relpath(os.path.join(raiz, nome), img_dir).replace(os.sep, "/")
+            if _larguras(rel):
+                achadas.append(rel)
+    return sorted(achadas)
+
+
+# ----------------- GERAÇÃO -----------------
+
+def _gerar_uma(rel, dados, img_dir, gerado_dir):
+    from PIL import Image
+
+    img = Image.open(io.BytesIO(dados))
+    img.load()
+    largura, altura = img.size
+    base, _ = os.path.splitext(rel)
+    entrada = {"origem": _hash(dados, 16), "largura": largura, "altura": altura, "variantes": {}}
+
+    for fmt, opcoes in FORMATOS.items():
+        variantes = {}
+        for w in _larguras(rel):
+            w = min(w, largura)
+            if w in variantes:
+                continue
+            h = round(altura * w / largura)
+            menor = img.resize((w, h), Image.LANCZOS) if w != largura else img
+            buf = io.BytesIO()
+            menor.save(buf, fmt.upper(), **opcoes)
+            saida = buf.getvalue()
+            nome = f"{base}-{w}.{_hash(saida)}.{fmt}"
+            caminho = os.path.join(gerado_dir, nome)
+            os.makedirs(os.path.dirname(caminho), exist_ok=True)
+            if not os.path.exists(caminho):
+                with open(caminho, "wb") as f:
+                    f.write(saida)
+            variantes[w] = nome
+        entrada["variantes"][fmt] = variantes
+    return entrada
+
+
+def gerar(img_dir=IMG_DIR, gerado_dir=GERADO_DIR, manifesto=MANIFESTO, forcar=False, processos=None):
+    """
+    Gera as variantes que faltam (ou que ficaram velhas) e grava o manifesto.
+    Retorna o manifesto. Arquivos gerados que ninguém usa mais são apagados.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    atual = {} if forcar else ler_manifesto(manifesto)
+    novo, pendentes = {}, []
+    for rel in origens(img_dir):
+        with open(os.path.join(img_dir, rel), "rb") as f:
+            dados = f.read()
+        entrada = atual.get(rel)
+        if entrada and entrada["origem"] == _hash(dados, 16) and _arquivos_ok(entrada, gerado_dir):
+            novo[rel] = entrada
+        else:
+            pendentes.append((rel, dados))
+
+    if pendentes:
+        with ProcessPoolExecutor(max_workers=processos) as pool:
+            futuros = {
+                rel: pool.submit(_gerar_uma, rel, dados, img_dir, gerado_dir)
+                for rel, dados in pendentes
+            }
+            for rel, futuro in futuros.items():
+                novo[rel] = futuro.result()
+
+    atlas = gerar_atlas(img_dir, gerado_dir, forcar=forcar)
+
+    usados = {
+        os.path.normpath(os.path.join(gerado_dir, nome))
+        for entrada in novo.values()
+        for variantes in entrada["variantes"].values()
+        for nome in variantes.values()
+    }
+    usados.update(os.path.normpath(os.path.join(gerado_dir, nome)) for nome in atlas["arquivos"])
+    usados.add(os.path.normpath(os.path.join(gerado_dir, os.path.basename(ATLAS_JSON))))
+    for raiz, _, arquivos in os.walk(gerado_dir):
+        for nome in arquivos:
+            caminho = os.path.normpath(os.path.join(raiz, nome))
+            if caminho != os.path.normpath(manifesto) and caminho not in usados:
+                os.remove(caminho)
+
+    os.makedirs(os.path.dirname(manifesto), exist_ok=True)
+    with open(manifesto, "w", encoding="utf-8") as f:
+        json.dump(novo, f, ensure_ascii=False, indent=1, sort_keys=True)
+    return novo
+
+
+def _nomes_atlas():
+    from truco.motor import TRUCO_CARTAS
+
+    return TRUCO_CARTAS + ["back"]
+
+
+def gerar_atlas(img_dir=IMG_DIR, gerado_dir=GERADO_DIR, forcar=False):
+    """
+    Junta as cartas em uma grade (ATLAS_COLUNAS x n), cada uma centralizada
+    na célula como o object-fit: contain das <img>, e grava AVIF/WebP + um CSS
+    com a posição de cada carta. O mapa vai em atlas.json.
+    """
+    nomes = _nomes_atlas()
+    h = hashlib.sha256()
+    for nome in nomes:
+        with open(os.path.join(img_dir, ATLAS_PASTA, nome + ".png"), "rb") as f:
+            h.update(f.read())
+    origem = h.hexdigest()[:16]
+
+    atual = {} if forcar else ler_atlas(os.path.join(gerado_dir, os.path.basename(ATLAS_JSON)))
+    if atual.get("origem") == origem and all(
+        os.path.exists(os.path.join(gerado_dir, nome)) for nome in atual["arquivos"]
+    ):
+        return atual
+
+    from PIL import Image
+
+    cw, ch = ATLAS_CELULA
+    colunas = ATLAS_COLUNAS
+    linhas = -(-len(nomes) // colunas)
+    folha = Image.new("RGBA", (cw * colunas, ch * linhas), (0, 0, 0, 0))
+    posicoes = {}
+    for i, nome in enumerate(nomes):
+        col, lin = i % colunas, i // colunas
+        carta = Image.open(os.path.join(img_dir, ATLAS_PASTA, nome + ".png")).convert("RGBA")
+        escala = min(cw / carta.width, ch / carta.height)
+        w, h_ = round(carta.width * escala), round(carta.height * escala)
+        carta = carta.resize((w, h_), Image.LANCZOS)
+        folha.paste(carta, (col * cw + (cw - w) // 2, lin * ch + (ch - h_) // 2))
+        posicoes[nome] = [col, lin]
+
+    arquivos, urls = [], {}
+    for fmt, opcoes in FORMATOS.items():
+        buf = io.BytesIO()
+        folha.save(buf, fmt.upper(), **opcoes)
+        saida = buf.getvalue()
+        nome = f"cartas.{_hash(saida)}.{fmt}"
+        with open(os.path.join(gerado_dir, nome), "wb") as f:
+            f.write(saida)
+        arquivos.append(nome)
+        urls[fmt] = _url(nome)
+
+    # background-size/position em % fazem o sprite acompanhar --card-w
+    fontes = ", ".join(f"url('{url}') type('image/{fmt}')" for fmt, url in urls.items())
+    regras = [
+        ".carta-sprite{"
+        f"background-image:url('{urls['webp']}');"
+        f"background-image:image-set({fontes});"
+        f"background-size:{colunas * 100}% {linhas * 100}%;"
+        "background-repeat:no-repeat}"
+    ]
+    for nome, (col, lin) in posicoes.items():
+        x = col * 100 / (colunas - 1) if colunas > 1 else 0
+        y = lin * 100 / (linhas - 1) if linhas > 1 else 0
+        regras.append(f'.carta-sprite[data-carta="{nome}"]{{background-position:{x:g}% {y:g}%}}')
+    css = ("\n".join(regras) + "\n").encode()
+    nome_css = f"cartas.{_hash(css)}.css"
+    with open(os.path.join(gerado_dir, nome_css), "wb") as f:
+        f.write(css)
+    arquivos.append(nome_css)
+
+    atlas = {
+        "origem": origem,
+        "arquivos": arquivos,
+        "css": _url(nome_css),
+        "imagens": urls,
+        "colunas": colunas,
+        "linhas": linhas,
+        "celula": [cw, ch],
+        "cartas": posicoes,
+    }
+    with open(os.path.join(gerado_dir, os.path.basename(ATLAS_JSON)), "w", encoding="utf-8") as f:
+        json.dump(atlas, f, ensure_ascii=False, indent=1)
+    return atlas
+
+
+def _arquivos_ok(entrada, gerado_dir):
+    return all(
+        os.path.exists(os.path.join(gerado_dir, nome))
+        for variantes in entrada["variantes"].values()
+        for nome in variantes.values()
+    )
+
+
+# ----------------- USO NO APP -----------------
+
+def ler_manifesto(caminho=MANIFESTO):
+    try:
+        with open(caminho, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def ler_atlas(caminho=ATLAS_JSON):
+    return ler_manifesto(caminho)
+
+
+def preparar(gerar_se_puder=True):
+    """
+    Chamado na subida do app: atualiza as variantes se o Pillow estiver
+    instalado e carrega o manifesto (sem Pillow, usa o que estiver em disco).
+    """
+    global _manifesto, _atlas
+    if gerar_se_puder:
+        try:
+            import PIL  # noqa: F401
+        except ImportError:
+            gerar_se_puder = False
+    _manifesto = gerar() if gerar_se_puder else ler_manifesto()
+    _atlas = ler_atlas()
+    return _manifesto
+
+
+def atlas():
+    """Mapa do sprite das cartas (atlas.json), ou None se não foi gerado."""
+    if _atlas is None:
+        preparar(gerar_se_puder=False)
+    return _atlas or None
+
+
+def _rel(caminho):
+    # aceita tanto "capa-truco.png" quanto a URL "/img/capa-truco.png"
+    prefixo = URL_BASE + "/"
+    return caminho[len(prefixo):] if caminho.startswith(prefixo) else caminho
+
+
+def _entrada(rel):
+    m = _manifesto if _manifesto is not None else preparar(gerar_se_puder=False)
+    return m.get(_rel(rel))
+
+
+def _url(nome):
+    return f"{URL_BASE}/gerado/{nome}"
+
+
+def srcset(rel, fmt="webp"):
+    """"url 160w, url 320w" da imagem (relativa a img/), ou "" sem variantes."""
+    entrada = _entrada(rel)
+    if not entrada:
+        return ""
+    variantes = entrada["variantes"].get(fmt, {})
+    return ", ".join(f"{_url(nome)} {w}w" for w, nome in sorted(variantes.items(), key=lambda x: int(x[0])))
+
+
+def image_set(rel):
+    """
+    Valor CSS para background-image: image-set() com AVIF/WebP em 1x e 2x.
+    Sem variantes, devolve url() da original.
+    """
+    original = f"url('{URL_BASE}/{_rel(rel)}')"
+    entrada = _entrada(rel)
+    if not entrada:
+        return original
+    partes = []
+    for fmt in FORMATOS:
+        variantes = sorted(entrada["variantes"].get(fmt, {}).items(), key=lambda x: int(x[0]))
+        for densidade, (_, nome) in zip(("1x", "2x"), variantes):
+            partes.append(f"url('{_url(nome)}') type('image/{fmt}') {densidade}")
+    return f"image-set({', '.join(partes)})" if partes else original
+
+
+def variantes_js(prefixo):
+    """
+    {nome: {"avif": srcset, "webp": srcset, "png": url original}} das
+    imagens dentro de `prefixo` (ex.: "img-truco/"), para o JS montar <picture>.
+    """
+    m = _manifesto if _manifesto is not None else preparar(gerar_se_puder=False)
+    saida = {}
+    for rel in m:
+        if not rel.startswith(prefixo):
+            continue
+        nome = os.path.splitext(rel[len(prefixo):])[0]
+        saida[nome] = {fmt: srcset(rel, fmt) for fmt in FORMATOS}
+        saida[nome]["png"] = f"{URL_BASE}/{rel}"
+    return saida
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera as variantes AVIF/WebP das imagens.")
+    parser.add_argument("--forcar", action="store_true", help="gera tudo de novo")
+    parser.add_argument("-j", "--processos", type=int, default=os.cpu_count())
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    manifesto = gerar(forcar=args.forcar, processos=args.processos)
+    n = sum(len(v) for e in manifesto.values() for v in e["variantes"].values())
+    total = sum(
+        os.path.getsize(os.path.join(GERADO_DIR, nome))
+        for e in manifesto.values() for v in e["variantes"].values() for nome in v.values()
+    )
+    print(f"{len(manifesto)} imagens, {n} variantes ({total / 1024:.0f} KB) "
+          f"em {time.perf_counter() - t0:.1f}s -> {MANIFESTO}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Métricas por rota (contagem, latência, tamanho da resposta e do cookie de
+sessão), expostas em /metrics no formato texto do Prometheus.
+
+O middleware só mede: dois perf_counter, alguns somatórios num dict e o
+índice do balde calculado direto (sem busca). Tudo roda no event loop, então
+não precisa de lock. A rota é o molde do path ("/api/truco/play",
+"/static" para os mounts), nunca a URL crua, para não explodir o número de
+séries.
+
+Baldes no estilo HDR: cada potência de 2 é dividida em SUBBALDES partes
+iguais, então o erro relativo de qualquer medida fica abaixo de
+1/SUBBALDES em toda a faixa (de 100µs a minutos) com poucos baldes.
+"""
+
+import math
+import time
+
+SUBBALDES = 4
+_SEM_ROTA = "(sem rota)"
+
+
+class Histograma:
+    """Baldes log-lineares de `minimo` até `minimo * 2**oitavas`."""
+
+    def __init__(self, minimo, oitavas):
+        self.minimo = minimo
+        self.limites = [
+            minimo * 2**e * (1 + s / SUBBALDES) for e in range(oitavas) for s in range(1, SUBBALDES + 1)
+        ]
+        self.baldes = [0] * (len(self.limites) + 1)  # o último é o +Inf
+        self.soma = 0
+        self.total = 0
+
+    def indice(self, valor):
+        if valor <= self.minimo:
+            return 0
+        m, e = math.frexp(valor / self.minimo)  # valor/minimo = m * 2**e, 0.5 <= m < 1
+        i = (e - 1) * SUBBALDES + math.ceil((2 * m - 1) * SUBBALDES) - 1
+        return min(max(i, 0), len(self.baldes) - 1)
+
+    def registrar(self, valor):
+        self.baldes[self.indice(valor)] += 1
+        self.soma += valor
+        self.total += 1
+
+    def prometheus(self, nome, rotulos):
+        linhas = []
+        acumulado = 0
+        for limite, n in zip(self.limites, self.baldes):
+            acumulado += n
+            linhas.append(f'{nome}_bucket{{{rotulos},le="{limite:.6g}"}} {acumulado}')
+        linhas.append(f'{nome}_bucket{{{rotulos},le="+Inf"}} {self.total}')
+        linhas.append(f"{nome}_sum{{{rotulos}}} {self.soma:.6g}")
+        linhas.append(f"{nome}_count{{{rotulos}}} {self.total}")
+        return linhas
+
+
+class Metricas:
+    def __init__(self, cookie_sessao="session"):
+        self.cookie_sessao = cookie_sessao
+        self.inicio = time.time()
+        self.requests = {}  # (rota, método, status) -> n
+        self.latencia = {}  # rota -> Histograma (segundos)
+        self.bytes = {}  # rota -> Histograma (bytes do corpo)
+        self.cookie = Histograma(16, 12)  # bytes do cookie de sessão (pedido + Set-Cookie)
+
+    def registrar(self, rota, metodo, status, segundos, tamanho, cookie):
+        chave = (rota, metodo, status)
+        self.requests[chave] = self.requests.get(chave, 0) + 1
+        if rota not in self.latencia:
+            self.latencia[rota] = Histograma(0.0001, 20)  # 100µs .. ~100s
+            self.bytes[rota] = Histograma(64, 20)  # 64B .. ~64MB
+        self.latencia[rota].registrar(segundos)
+        self.bytes[rota].registrar(tamanho)
+        if cookie:
+            self.cookie.registrar(cookie)
+
+    def prometheus(self):
+        """Texto para /metrics (exposition format 0.0.4)."""
+        linhas = [
+            "# HELP jogos_requests_total Requests por rota, método e status.",
+            "# TYPE jogos_requests_total counter",
+        ]
+        for (rota, metodo, status), n in sorted(self.requests.items()):
+            linhas.append(f'jogos_requests_total{{rota="{_escapar(rota)}",metodo="{metodo}",status="{status}"}} {n}')
+
+        linhas += [
+            "# HELP jogos_request_segundos Latência por rota (até o fim da resposta).",
+            "# TYPE jogos_request_segundos histogram",
+        ]
+        for rota in sorted(self.latencia):
+            linhas += self.latencia[rota].prometheus("jogos_request_segundos", f'rota="{_escapar(rota)}"')
+
+        linhas += [
+            "# HELP jogos_resposta_bytes Tamanho do corpo da resposta por rota.",
+            "# TYPE jogos_resposta_bytes histogram",
+        ]
+        for rota in sorted(self.bytes):
+            linhas += self.bytes[rota].prometheus("jogos_resposta_bytes", f'rota="{_escapar(rota)}"')
+
+        linhas += [
+            "# HELP jogos_cookie_sessao_bytes Tamanho do cookie de sessão (no pedido e no Set-Cookie).",
+            "# TYPE jogos_cookie_sessao_bytes histogram",
+        ]
+        linhas += self.cookie.prometheus("jogos_cookie_sessao_bytes", 'cookie="sessao"')
+
+        linhas += [
+            "# HELP jogos_inicio_segundos Hora (unix) em que o processo começou a contar.",
+            "# TYPE jogos_inicio_segundos gauge",
+            f"jogos_inicio_segundos {self.inicio:.3f}",
+        ]
+        return "\n".join(linhas) + "\n"
+
+
+def _escapar(valor):
+    return valor.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _rota(scope):
+    rota = scope.get("route")
+    if rota is not None and getattr(rota, "path", None):
+        return rota.path
+    # Mount (static/img) não marca "route", mas deixa o prefixo no root_path
+    return scope.get("root_path") or _SEM_ROTA
+
+
+class MetricasMiddleware:
+    """Middleware ASGI puro: mede cada request HTTP e soma em `metricas`."""
+
+    def __init__(self, app, metricas, ignorar=("/metrics",)):
+        self.app = app
+        self.metricas = metricas
+        self.ignorar = set(ignorar)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.ignorar:
+            await self.app(scope, receive, send)
+            return
+
+        inicio = time.perf_counter()
+        status = 500
+        tamanho = 0
+        cookie = 0
+        prefixo = self.metricas.cookie_sessao.encode() + b"="
+        for nome, valor in scope["headers"]:
+            if nome == b"cookie":
+                for parte in valor.split(b";"):
+                    parte = parte.strip()
+                    if parte.startswith(prefixo):
+                        cookie += len(parte) - len(prefixo)
+
+        async def send_wrapper(message):
+            nonlocal status, tamanho, cookie
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                for nome, valor in message.get("headers", ()):
+                    if nome == b"set-cookie" and valor.startswith(prefixo):
+                        cookie += len(valor.split(b";", 1)[0]) - len(prefixo)
+            elif message["type"] == "http.response.body":
+                tamanho += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.metricas.registrar(
+                _rota(scope), scope["method"], status, time.perf_counter() - inicio, tamanho, cookie
+            )
@@ -0,0 +1,160 @@
+"""
+Números secretos sem repetição, sem guardar a lista embaralhada.
+
+O jogo número `jogo` da sessão usa secreto(seed, jogo, limite): a posição
+`jogo` de uma permutação de 1..limite definida pela seed. A permutação é
+uma rede de Feistel com chave (a seed) sobre o menor domínio 2^b que cabe o
+limite; o que cai fora do intervalo é cifrado de novo até cair dentro
+("cycle walking"), o que continua sendo uma permutação e leva em média menos
+de 4 voltas. Estado na sessão: seed + contador, seja o limite 100 ou 10^9.
+
+Cada jogo guarda um Historico compacto dos chutes, e as estatísticas
+(média de chutes contra a busca binária) são somas acumuladas.
+"""
+
+import base64
+import hashlib
+import random
+import sys
+from array import array
+
+LIMITE_MAX = 10**9  # cabe no uint32 do histórico
+MAX_HISTORICO = 1000  # chutes guardados por jogo (a contagem segue depois disso)
+
+RODADAS = 4
+
+
+def nova_seed():
+    return random.SystemRandom().getrandbits(63)
+
+
+def _feistel(x, metade, mascara, chave):
+    esq, dir_ = x >> metade, x & mascara
+    for r in range(RODADAS):
+        h = hashlib.blake2b(b"%d:%d" % (r, dir_), key=chave, digest_size=8).digest()
+        esq, dir_ = dir_, esq ^ (int.from_bytes(h, "little") & mascara)
+    return (esq << metade) | dir_
+
+
+def permutar(i, n, seed):
+    """Posição i (0 <= i < n) de uma permutação de range(n) dada pela seed."""
+    if not 0 <= i < n:
+        raise ValueError("posição fora da permutação")
+    bits = max(2, (n - 1).bit_length())
+    bits += bits % 2  # metades iguais
+    metade = bits // 2
+    mascara = (1 << metade) - 1
+    chave = seed.to_bytes(8, "little")
+    x = _feistel(i, metade, mascara, chave)
+    while x >= n:
+        x = _feistel(x, metade, mascara, chave)
+    return x
+
+
+def secreto(seed, jogo, limite):
+    """Número secreto (1..limite) do jogo `jogo` (0..limite-1) da sequência."""
+    return 1 + permutar(jogo, limite, seed)
+
+
+# ----------------- HISTÓRICO DO JOGO -----------------
+
+class Historico:
+    """
+    Chutes de um jogo num array de uint32 (na sessão vai em base64, 4 bytes
+    por chute) + o intervalo [lo, hi] onde o secreto ainda pode estar. Um
+    chute fora do intervalo é redundante: as dicas anteriores já o
+    descartavam. Checar isso é O(1), sem olhar os chutes antigos.
+    """
+
+    def __init__(self, limite, lo=1, hi=None, chutes="", tentativas=0, redundantes=0, fim=False):
+        self.limite = limite
+        self.lo = lo
+        self.hi = limite if hi is None else hi
+        self.tentativas = tentativas
+        self.fim = fim
+        self.chutes = array("I")
+        if chutes:
+            self.chutes.frombytes(base64.b64decode(chutes))
+            if sys.byteorder == "big":
+                self.chutes.byteswap()
+        self.redundantes = redundantes
+
+    @classmethod
+    def de_json(cls, d):
+        return cls(d["limite"], d["lo"], d["hi"], d["chutes"], d["tentativas"], d["redundantes"], d["fim"])
+
+    def json(self):
+        chutes = self.chutes
+        if sys.byteorder == "big":
+            chutes = array("I", chutes)
+            chutes.byteswap()
+        return {
+            "limite": self.limite,
+            "lo": self.lo,
+            "hi": self.hi,
+            "chutes": base64.b64encode(chutes.tobytes()).decode("ascii"),
+            "tentativas": self.tentativas,
+            "redundantes": self.redundantes,
+            "fim": self.fim,
+        }
+
+    def chutar(self, chute, secreto):
+        """Registra o chute. Retorna (comparação com o secreto, redundante)."""
+        redundante = not self.lo <= chute <= self.hi
+        self.tentativas += 1
+        if len(self.chutes) < MAX_HISTORICO:
+            self.chutes.append(chute)
+        if redundante:
+            self.redundantes += 1
+        if chute < secreto:
+            self.lo = max(self.lo, chute + 1)
+            return "maior", redundante
+        if chute > secreto:
+            self.hi = min(self.hi, chute - 1)
+            return "menor", redundante
+        self.fim = True
+        return "igual", redundante
+
+
+# ----------------- ESTATÍSTICAS -----------------
+
+def otimo_medio(n):
+    """
+    Média de chutes da busca binária perfeita para um secreto uniforme em
+    1..n: numa árvore binária balanceada com n nós, a soma das
+    profundidades dividida por n. O(log n).
+    """
+    total, nivel, nos = 0, 1, 1
+    restantes = n
+    while restantes > 0:
+        no_nivel = min(nos, restantes)
+        total += nivel * no_nivel
+        restantes -= no_nivel
+        nivel += 1
+        nos *= 2
+    return total / n
+
+
+def nova_estatistica():
+    return {"jogos": 0, "tentativas": 0, "otimo": 0.0, "redundantes": 0}
+
+
+def registrar(est, historico):
+    """Soma um jogo terminado em `est` (acumulado, sem guardar os jogos)."""
+    est["jogos"] += 1
+    est["tentativas"] += historico.tentativas
+    est["otimo"] += otimo_medio(historico.limite)
+    est["redundantes"] += historico.redundantes
+
+
+def resumo(est):
+    jogos = est["jogos"]
+    if not jogos:
+        return {"jogos": 0}
+    return {
+        "jogos": jogos,
+        "media_tentativas": round(est["tentativas"] / jogos, 3),
+        "media_otima": round(est["otimo"] / jogos, 3),
+        "eficiencia": round(est["otimo"] / est["tentativas"], 3),
+        "redundantes_por_jogo": round(est["redundantes"] / jogos, 3),
+    }
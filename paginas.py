@@ -0,0 +1,111 @@
+"""
+Cache das páginas renderizadas.
+
+As páginas do portal dependem só de constantes (catálogo GAMES, mapa das
+imagens), então o HTML é renderizado uma vez por (template, contexto) e fica
+guardado já em bytes (e em gzip), com ETag. A entrada cai quando algum
+arquivo da pasta de templates muda (um template pode estender ou incluir
+outro, então vale a pasta toda).
+
+A pasta é varrida na subida e, com auto_reload do Jinja ligado (o padrão),
+de novo no máximo a cada PAGINAS_CHECAR segundos; sem auto_reload, nunca.
+Contextos constantes passam a `chave` pronta (PaginasCache.chave) para não
+refazer o JSON do contexto a cada acesso.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from starlette.responses import Response
+
+from estaticos import aceita_codificacao, etag_bate
+
+PAGINAS_MAX = 256
+PAGINAS_CHECAR = 2.0  # segundos entre varreduras da pasta de templates
+
+
+class PaginasCache:
+    def __init__(self, templates, max_paginas: int = PAGINAS_MAX, checar_a_cada: float = PAGINAS_CHECAR):
+        self.templates = templates
+        self.max_paginas = max_paginas
+        self.checar_a_cada = checar_a_cada
+        self._cache = OrderedDict()  # chave -> (versao, html, gz, etag)
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.renders = 0
+        self._versao = self._versao_templates()
+        self._checada = time.monotonic()
+
+    def _versao_templates(self):
+        versao = []
+        for pasta in self.templates.env.loader.searchpath:
+            for raiz, _, nomes in os.walk(pasta):
+                for nome in nomes:
+                    st = os.stat(os.path.join(raiz, nome))
+                    versao.append((nome, st.st_mtime_ns, st.st_size))
+        return hash(tuple(versao))
+
+    def _versao_atual(self):
+        if not self.templates.env.auto_reload:
+            return self._versao
+        agora = time.monotonic()
+        if agora - self._checada >= self.checar_a_cada:
+            self._checada = agora
+            self._versao = self._versao_templates()
+        return self._versao
+
+    @staticmethod
+    def chave(contexto):
+        """Chave do cache para `contexto` (calcule uma vez se ele é constante)."""
+        if not contexto:
+            return ""
+        return json.dumps(contexto, sort_keys=True, ensure_ascii=False, default=str)
+
+    def _renderizar(self, nome, contexto):
+        html = self.templates.get_template(nome).render(contexto).encode("utf-8")
+        gz = gzip.compress(html, 6, mtime=0)
+        etag = '"' + hashlib.sha256(html).hexdigest()[:32] + '"'
+        return html, gz, etag
+
+    def pagina(self, request, nome: str, contexto: dict = None, chave: str = None):
+        """
+        Resposta HTML de `nome` com `contexto` (sem o request: os templates
+        não usam). Responde 304 se o navegador já tem essa versão. `chave`
+        é o self.chave(contexto) já calculado, para contextos constantes.
+        """
+        contexto = contexto or {}
+        chave = (nome, self.chave(contexto) if chave is None else chave)
+        versao = self._versao_atual()
+
+        with self._lock:
+            item = self._cache.get(chave)
+            if item is not None and item[0] == versao:
+                self._cache.move_to_end(chave)
+                self.acertos += 1
+            else:
+                item = None
+        if item is None:
+            item = (versao, *self._renderizar(nome, contexto))
+            with self._lock:
+                self.renders += 1
+                self._cache[chave] = item
+                self._cache.move_to_end(chave)
+                while len(self._cache) > self.max_paginas:
+                    self._cache.popitem(last=False)
+
+        _, html, gz, etag = item
+        usar_gzip = aceita_codificacao(request.headers.get("accept-encoding", ""), "gzip")
+        if usar_gzip:
+            etag = etag[:-1] + '-gzip"'
+        headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+        if etag_bate(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+        if usar_gzip:
+            headers["Content-Encoding"] = "gzip"
+            return Response(gz, media_type="text/html", headers=headers)
+        return Response(html, media_type="text/html", headers=headers)
@@ -0,0 +1,453 @@
+"""
+Sessões guardadas no servidor.
+
+O cookie leva só um id opaco (tamanho fixo) e o estado dos jogos fica em um
+armazenamento plugável: memória (LRU com TTL) ou SQLite. Só as chaves da
+sessão tocadas no request são serializadas de novo. Armazenamento com
+`bloqueante = True` (o SQLite) é chamado numa thread, fora do event loop.
+
+Com SESSOES_PERFIL=1 os armazenamentos medem, por chave da sessão, o tempo
+de decodificar/codificar e o tamanho em bytes (PerfilSessao), para saber
+qual estado de jogo pesa mais. Desligado por padrão.
+"""
+
+import json
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import anyio.to_thread
+from starlette.datastructures import MutableHeaders
+from starlette.requests import HTTPConnection
+
+SESSAO_TTL = 14 * 24 * 60 * 60  # 14 dias, igual ao SessionMiddleware
+
+
+class SessaoDict(dict):
+    """
+    dict que anota quais chaves foram lidas ou escritas no request.
+    Ler conta como "tocar" porque os jogos mutam listas/dicts no lugar
+    (ex.: s["as_friends"].append(...)) sem reatribuir a chave.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.tocadas = set()
+        self.limpa = False
+
+    def __getitem__(self, chave):
+        self.tocadas.add(chave)
+        return super().__getitem__(chave)
+
+    def get(self, chave, padrao=None):
+        self.tocadas.add(chave)
+        return super().get(chave, padrao)
+
+    def __setitem__(self, chave, valor):
+        self.tocadas.add(chave)
+        super().__setitem__(chave, valor)
+
+    def __delitem__(self, chave):
+        self.tocadas.add(chave)
+        super().__delitem__(chave)
+
+    def setdefault(self, chave, padrao=None):
+        self.tocadas.add(chave)
+        return super().setdefault(chave, padrao)
+
+    def pop(self, chave, *padrao):
+        self.tocadas.add(chave)
+        return super().pop(chave, *padrao)
+
+    def update(self, *args, **kwargs):
+        novo = dict(*args, **kwargs)
+        self.tocadas.update(novo)
+        super().update(novo)
+
+    def clear(self):
+        self.limpa = True
+        self.tocadas.update(self.keys())
+        super().clear()
+
+
+# -------------------- ARMAZENAMENTOS --------------------
+
+class PerfilSessao:
+    """
+    Custo de (de)serializar cada chave da sessão, somado desde a subida:
+    leituras/escritas, tempo total e bytes. Os armazenamentos chamam
+    decodificou()/codificou() quando recebem um perfil.
+    """
+
+    def __init__(self):
+        self.chaves = {}  # chave -> contadores
+        self.carregamentos = 0
+        self.salvamentos = 0
+        self._lock = threading.Lock()
+
+    def _contadores(self, chave):
+        c = self.chaves.get(chave)
+        if c is None:
+            c = self.chaves[chave] = {
+                "leituras": 0, "decodificar_s": 0.0,
+                "escritas": 0, "codificar_s": 0.0,
+                "bytes_total": 0, "bytes_max": 0,
+            }
+        return c
+
+    def contar(self, qual):
+        with self._lock:
+            setattr(self, qual, getattr(self, qual) + 1)
+
+    def decodificou(self, chave, segundos, tamanho):
+        with self._lock:
+            c = self._contadores(chave)
+            c["leituras"] += 1
+            c["decodificar_s"] += segundos
+            c["bytes_total"] += tamanho
+            c["bytes_max"] = max(c["bytes_max"], tamanho)
+
+    def codificou(self, chave, segundos, tamanho):
+        with self._lock:
+            c = self._contadores(chave)
+            c["escritas"] += 1
+            c["codificar_s"] += segundos
+            c["bytes_total"] += tamanho
+            c["bytes_max"] = max(c["bytes_max"], tamanho)
+
+    def medir_leitura(self, chave, bruto):
+        """json.loads cronometrado (bruto é o JSON guardado)."""
+        t0 = time.perf_counter()
+        valor = json.loads(bruto)
+        self.decodificou(chave, time.perf_counter() - t0, len(bruto.encode()))
+        return valor
+
+    def medir_escrita(self, chave, valor):
+        """json.dumps cronometrado, no mesmo formato do SQLiteSessoes."""
+        t0 = time.perf_counter()
+        bruto = json.dumps(valor, separators=(",", ":"), ensure_ascii=False)
+        self.codificou(chave, time.perf_counter() - t0, len(bruto.encode()))
+        return bruto
+
+    def relatorio(self):
+        """Por chave, da mais cara (tempo total) para a mais barata."""
+        with self._lock:
+            chaves = {k: dict(c) for k, c in self.chaves.items()}
+            carregamentos, salvamentos = self.carregamentos, self.salvamentos
+        total_s = sum(c["decodificar_s"] + c["codificar_s"] for c in chaves.values()) or 1.0
+        linhas = []
+        for chave, c in chaves.items():
+            usos = c["leituras"] + c["escritas"]
+            custo = c["decodificar_s"] + c["codificar_s"]
+            linhas.append({
+                "chave": chave,
+                "leituras": c["leituras"],
+                "escritas": c["escritas"],
+                "decodificar_us": round(c["decodificar_s"] / c["leituras"] * 1e6, 1) if c["leituras"] else 0,
+                "codificar_us": round(c["codificar_s"] / c["escritas"] * 1e6, 1) if c["escritas"] else 0,
+                "bytes_medio": round(c["bytes_total"] / usos) if usos else 0,
+                "bytes_max": c["bytes_max"],
+                "parte_do_tempo": round(custo / total_s, 4),
+            })
+        linhas.sort(key=lambda l: l["parte_do_tempo"], reverse=True)
+        return {"carregamentos": carregamentos, "salvamentos": salvamentos, "chaves": linhas}
+
+    def texto(self):
+        r = self.relatorio()
+        saida = [
+            f"carregamentos: {r['carregamentos']}  salvamentos: {r['salvamentos']}",
+            f"{'chave':<18}{'leit.':>8}{'escr.':>8}{'dec µs':>10}{'cod µs':>10}"
+            f"{'bytes':>9}{'máx':>9}{'tempo':>8}",
+        ]
+        for l in r["chaves"]:
+            saida.append(
+                f"{l['chave']:<18}{l['leituras']:>8}{l['escritas']:>8}{l['decodificar_us']:>10}"
+                f"{l['codificar_us']:>10}{l['bytes_medio']:>9}{l['bytes_max']:>9}{l['parte_do_tempo']:>8.1%}"
+            )
+        return "\n".join(saida) + "\n"
+
+
+class MemoriaSessoes:
+    """
+    Sessões no próprio processo: LRU limitado por quantidade + expiração
+    por inatividade. Guarda os objetos direto, sem serializar nada; com
+    perfil, mede quanto custaria o JSON de cada chave (ida e volta).
+    """
+
+    bloqueante = False  # só mexe em dicts: roda direto no event loop
+
+    def __init__(self, max_sessoes: int = 10_000, ttl: int = SESSAO_TTL, perfil=None):
+        self.max_sessoes = max_sessoes
+        self.ttl = ttl
+        self.perfil = perfil
+        self._dados = OrderedDict()  # sid -> (expira_em, dict)
+        self._lock = threading.Lock()
+
+    def carregar(self, sid: str):
+        agora = time.monotonic()
+        with self._lock:
+            item = self._dados.get(sid)
+            if item is None:
+                return None
+            expira, dados = item
+            if expira <= agora:
+                del self._dados[sid]
+                return None
+            self._dados.move_to_end(sid)
+            dados = dict(dados)
+        if self.perfil is not None:
+            self.perfil.contar("carregamentos")
+            for chave, valor in dados.items():
+                self.perfil.medir_leitura(chave, json.dumps(valor, separators=(",", ":"), ensure_ascii=False))
+        return dados
+
+    def salvar(self, sid: str, dados: dict, tocadas=None) -> None:
+        if self.perfil is not None:
+            self.perfil.contar("salvamentos")
+            for chave in (dados if tocadas is None else tocadas):
+                if chave in dados:
+                    self.perfil.medir_escrita(chave, dados[chave])
+        with self._lock:
+            self._dados[sid] = (time.monotonic() + self.ttl, dict(dados))
+            self._dados.move_to_end(sid)
+            while len(self._dados) > self.max_sessoes:
+                self._dados.popitem(last=False)
+
+    def apagar(self, sid: str) -> None:
+        with self._lock:
+            self._dados.pop(sid, None)
+
+    def liberar(self, sid: str) -> None:
+        pass  # nada guardado por request
+
+    def limpar_expiradas(self) -> int:
+        agora = time.monotonic()
+        with self._lock:
+            vencidas = [sid for sid, (expira, _) in self._dados.items() if expira <= agora]
+            for sid in vencidas:
+                del self._dados[sid]
+        return len(vencidas)
+
+
+class SQLiteSessoes:
+    """
+    Sessões em SQLite (sobrevive a restart e pode ser dividido entre workers).
+    Uma linha por (sessão, chave): só as chaves tocadas são serializadas, e
+    só são gravadas se o JSON mudou.
+    """
+
+    bloqueante = True  # I/O de disco: o middleware chama numa thread
+
+    def __init__(self, caminho: str = "sessoes.db", ttl: int = SESSAO_TTL, perfil=None):
+        self.caminho = caminho
+        self.ttl = ttl
+        self.perfil = perfil
+        self._local = threading.local()
+        self._cache = {}  # sid -> {chave: json} do último carregar (até o liberar)
+        self._lock = threading.Lock()
+        self._gravacoes = 0
+        with self._conexao() as con:
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS sessoes ("
+                " sid TEXT NOT NULL, chave TEXT NOT NULL, valor TEXT NOT NULL,"
+                " expira REAL NOT NULL, PRIMARY KEY (sid, chave))"
+            )
+            con.execute("CREATE INDEX IF NOT EXISTS sessoes_expira ON sessoes (expira)")
+
+    def _conexao(self):
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = sqlite3.connect(self.caminho, timeout=5, check_same_thread=False)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            self._local.con = con
+        return con
+
+    def carregar(self, sid: str):
+        linhas = self._conexao().execute(
+            "SELECT chave, valor FROM sessoes WHERE sid = ? AND expira > ?",
+            (sid, time.time()),
+        ).fetchall()
+        if not linhas:
+            return None
+        brutos = dict(linhas)
+        with self._lock:
+            self._cache[sid] = brutos
+        if self.perfil is not None:
+            self.perfil.contar("carregamentos")
+            return {chave: self.perfil.medir_leitura(chave, valor) for chave, valor in brutos.items()}
+        return {chave: json.loads(valor) for chave, valor in brutos.items()}
+
+    def salvar(self, sid: str, dados: dict, tocadas=None) -> None:
+        with self._lock:
+            anteriores = self._cache.pop(sid, {})
+        chaves = set(dados) | set(anteriores) if tocadas is None else tocadas
+        # grava tudo sem saber o que havia antes (outro request com o mesmo
+        # sid já liberou o cache): apaga a sessão antes para não sobrar chave
+        recriar = tocadas is None and not anteriores
+        expira = time.time() + self.ttl
+
+        if self.perfil is not None:
+            self.perfil.contar("salvamentos")
+        gravar, remover = [], []
+        for chave in chaves:
+            if chave not in dados:
+                # DELETE mesmo sem a chave em `anteriores`: outro request com o
+                # mesmo sid pode ter levado o cache, e apagar de novo não custa
+                remover.append((sid, chave))
+                continue
+            if self.perfil is not None:
+                valor = self.perfil.medir_escrita(chave, dados[chave])
+            else:
+                valor = json.dumps(dados[chave], separators=(",", ":"), ensure_ascii=False)
+            if anteriores.get(chave) != valor:
+                gravar.append((sid, chave, valor, expira))
+
+        con = self._conexao()
+        with con:
+            if recriar:
+                con.execute("DELETE FROM sessoes WHERE sid = ?", (sid,))
+            if remover:
+                con.executemany("DELETE FROM sessoes WHERE sid = ? AND chave = ?", remover)
+            if gravar:
+                con.executemany("INSERT OR REPLACE INTO sessoes VALUES (?, ?, ?, ?)", gravar)
+            # renova a expiração da sessão inteira (TTL por inatividade)
+            con.execute("UPDATE sessoes SET expira = ? WHERE sid = ?", (expira, sid))
+
+        self._gravacoes += 1
+        if self._gravacoes % 1000 == 0:
+            self.limpar_expiradas()
+
+    def apagar(self, sid: str) -> None:
+        with self._lock:
+            self._cache.pop(sid, None)
+        con = self._conexao()
+        with con:
+            con.execute("DELETE FROM sessoes WHERE sid = ?", (sid,))
+
+    def liberar(self, sid: str) -> None:
+        """Esquece o cache do carregar (fim do request ou da conexão)."""
+        with self._lock:
+            self._cache.pop(sid, None)
+
+    def limpar_expiradas(self) -> int:
+        con = self._conexao()
+        with con:
+            cur = con.execute("DELETE FROM sessoes WHERE expira <= ?", (time.time(),))
+        return cur.rowcount
+
+
+def gravar_chave(armazenamento, sid: str, chave: str, valor) -> None:
+    """
+    Grava uma chave da sessão fora do ciclo de um request HTTP (ex.: de uma
+    conexão WebSocket), relendo a sessão antes para não pisar nas outras
+    chaves que requests paralelos tenham mudado.
+    """
+    dados = armazenamento.carregar(sid) or {}
+    dados[chave] = valor
+    armazenamento.salvar(sid, dados, {chave})
+
+
+async def no_armazenamento(armazenamento, funcao, *args):
+    """Chama `funcao(*args)` numa thread se o armazenamento faz I/O bloqueante."""
+    if getattr(armazenamento, "bloqueante", False):
+        return await anyio.to_thread.run_sync(funcao, *args)
+    return funcao(*args)
+
+
+# -------------------- MIDDLEWARE --------------------
+
+class SessaoServidorMiddleware:
+    """
+    Substituto do SessionMiddleware do Starlette: mesma interface
+    (request.session), mas o cookie só carrega o id da sessão.
+    """
+
+    def __init__(
+        self,
+        app,
+        armazenamento=None,
+        session_cookie: str = "session",
+        max_age: int = SESSAO_TTL,
+        path: str = "/",
+        same_site: str = "lax",
+        https_only: bool = False,
+    ):
+        self.app = app
+        self.armazenamento = armazenamento if armazenamento is not None else MemoriaSessoes()
+        self.session_cookie = session_cookie
+        self.max_age = max_age
+        self.path = path
+        self.security_flags = "httponly; samesite=" + same_site
+        if https_only:
+            self.security_flags += "; secure"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        armazenamento = self.armazenamento
+        sid = HTTPConnection(scope).cookies.get(self.session_cookie)
+        dados = await no_armazenamento(armazenamento, armazenamento.carregar, sid) if sid else None
+        sessao_existia = dados is not None
+        if not sessao_existia:
+            sid = None
+        sid_carregado = sid
+
+        sessao = SessaoDict(dados or {})
+        scope["session"] = sessao
+        scope["session_id"] = sid
+        scope["session_store"] = self.armazenamento
+
+        async def send_wrapper(message):
+            nonlocal sid
+            if message["type"] == "websocket.accept" and sid is None:
+                # WebSocket não passa pelo salvar do fim do request: o id já
+                # nasce no handshake para a conexão poder gravar (gravar_chave)
+                sid = secrets.token_urlsafe(24)
+                scope["session_id"] = sid
+                message.setdefault("headers", [])
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Set-Cookie",
+                    f"{self.session_cookie}={sid}; path={self.path}; "
+                    f"Max-Age={self.max_age}; {self.security_flags}",
+                )
+            elif message["type"] == "http.response.start":
+                sessao_atual = scope["session"]
+                if sessao_atual:
+                    novo = sid is None
+                    if novo:
+                        sid = secrets.token_urlsafe(24)
+                        scope["session_id"] = sid
+                    tocadas = getattr(sessao_atual, "tocadas", None)
+                    if novo or getattr(sessao_atual, "limpa", False):
+                        tocadas = None  # grava tudo
+                    await no_armazenamento(armazenamento, armazenamento.salvar, sid, sessao_atual, tocadas)
+                    headers = MutableHeaders(scope=message)
+                    headers.append(
+                        "Set-Cookie",
+                        f"{self.session_cookie}={sid}; path={self.path}; "
+                        f"Max-Age={self.max_age}; {self.security_flags}",
+                    )
+                elif sessao_existia:
+                    # a sessão foi esvaziada
+                    await no_armazenamento(armazenamento, armazenamento.apagar, sid)
+                    headers = MutableHeaders(scope=message)
+                    headers.append(
+                        "Set-Cookie",
+                        f"{self.session_cookie}=null; path={self.path}; "
+                        f"expires=Thu, 01 Jan 1970 00:00:00 GMT; {self.security_flags}",
+                    )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # WebSocket, erro antes da resposta, sessão esvaziada...: nem todo
+            # request chega no salvar, que é quem esvaziava o cache
+            if sid_carregado is not None:
+                armazenamento.liberar(sid_carregado)
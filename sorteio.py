@@ -0,0 +1,126 @@
+"""
+Sorteio de números únicos para o Sorteador.
+
+amostra() sorteia k números distintos de [de, ate] sob demanda, com memória
+O(k) independente do tamanho do intervalo: é um Fisher–Yates esparso, que só
+guarda as posições já trocadas num dict. Sai em ordem aleatória, então dá
+para ir mandando os números enquanto sorteia (streaming).
+
+Os sorteios em lote usam amostra() com um random.Random(seed) isolado: a
+mesma seed reproduz os mesmos números. Mudar o algoritmo de amostra() muda
+o resultado das seeds antigas.
+"""
+
+import json
+import os
+import random
+
+# limites (configuráveis por variável de ambiente)
+SORTEIO_MAX_JSON = int(os.environ.get("SORTEIO_MAX_JSON", 100_000))      # resposta de uma vez
+SORTEIO_MAX_STREAM = int(os.environ.get("SORTEIO_MAX_STREAM", 1_000_000))  # resposta em NDJSON
+SORTEIO_LOTE = 1000  # números por linha do NDJSON
+SORTEIO_MAX_SORTEIOS = int(os.environ.get("SORTEIO_MAX_SORTEIOS", 1000))  # sorteios por lote
+
+
+class SorteioInvalido(ValueError):
+    """Parâmetros do sorteio inválidos (vira um 400 com a mensagem)."""
+
+
+def validar(quantidade, de, ate, maximo=None):
+    """Converte e valida os campos do formulário. Retorna (quantidade, de, ate)."""
+    try:
+        quantidade = int(quantidade)
+        de = int(de)
+        ate = int(ate)
+    except (TypeError, ValueError):
+        raise SorteioInvalido("Preencha todos os campos com números válidos.")
+
+    if quantidade <= 0:
+        raise SorteioInvalido("A quantidade deve ser maior que zero.")
+
+    if de > ate:
+        raise SorteioInvalido('O valor "Do número" não pode ser maior que "Até o número".')
+
+    total_possiveis = ate - de + 1
+    if quantidade > total_possiveis:
+        raise SorteioInvalido(
+            f"Quantidade ({quantidade}) maior que o total de números possíveis no intervalo ({total_possiveis})."
+        )
+
+    if maximo is not None and quantidade > maximo:
+        raise SorteioInvalido(f"No máximo {maximo} números por sorteio.")
+
+    return quantidade, de, ate
+
+
+def sortear(quantidade, de, ate):
+    """Sorteio simples (já validado), tudo de uma vez."""
+    return random.sample(range(de, ate + 1), k=quantidade)
+
+
+def amostra(de, ate, k, rng=random):
+    """
+    Gera k números distintos de [de, ate] em ordem aleatória (uniforme),
+    um de cada vez. Memória O(k): só as trocas do Fisher–Yates ficam no dict.
+    """
+    n = ate - de + 1
+    trocas = {}
+    for i in range(k):
+        j = rng.randrange(i, n)
+        escolhido = trocas.get(j, j)
+        # a posição j passa a guardar o que estava em i; i não é mais visitada
+        trocas[j] = trocas.pop(i, i)
+        yield de + escolhido
+
+
+def nova_seed():
+    # cabe num Number do JS sem perder precisão (2**53)
+    return random.SystemRandom().randrange(2**53)
+
+
+def sortear_lote(specs, seed=None):
+    """
+    Vários sorteios seguidos com um random.Random(seed) só deles: com a mesma
+    seed e os mesmos specs o resultado se repete igualzinho (para auditoria).
+    Sem seed, uma é sorteada e devolvida. Retorna (seed, [lista por sorteio]).
+    """
+    if not isinstance(specs, list) or not specs:
+        raise SorteioInvalido("Envie uma lista de sorteios.")
+    if len(specs) > SORTEIO_MAX_SORTEIOS:
+        raise SorteioInvalido(f"No máximo {SORTEIO_MAX_SORTEIOS} sorteios por lote.")
+    if seed is None:
+        seed = nova_seed()
+    elif isinstance(seed, bool) or not isinstance(seed, (int, str)) or len(str(seed)) > 100:
+        raise SorteioInvalido("A seed deve ser um número inteiro ou um texto curto.")
+
+    validos = []
+    total = 0
+    for i, spec in enumerate(specs, 1):
+        if not isinstance(spec, dict):
+            raise SorteioInvalido(f"Sorteio {i}: formato inválido.")
+        try:
+            validos.append(validar(spec.get("quantidade"), spec.get("de"), spec.get("ate")))
+        except SorteioInvalido as e:
+            raise SorteioInvalido(f"Sorteio {i}: {e}")
+        total += validos[-1][0]
+    if total > SORTEIO_MAX_JSON:
+        raise SorteioInvalido(f"No máximo {SORTEIO_MAX_JSON} números somando todos os sorteios.")
+
+    rng = random.Random(seed)
+    return seed, [list(amostra(de, ate, quantidade, rng)) for quantidade, de, ate in validos]
+
+
+def ndjson(de, ate, k, rng=random, lote=SORTEIO_LOTE):
+    """
+    Linhas NDJSON do sorteio: uma lista de até `lote` números por linha e,
+    no fim, {"ok": true, "total": k} (sem ela, o stream foi cortado).
+    """
+    buf = []
+    for x in amostra(de, ate, k, rng):
+        buf.append(x)
+        if len(buf) == lote:
+            yield json.dumps(buf, separators=(",", ":")) + "\n"
+            buf = []
+    if buf:
+        yield json.dumps(buf, separators=(",", ":")) + "\n"
+    yield json.dumps({"ok": True, "total": k}) + "\n"
@@ -34,6 +34,7 @@ function closeEditModal() {
 }
 
 let amigosCache = []; // [{id, name}, ...]
+let versao = null; // versão da lista no servidor que o amigosCache reflete
 
 function escapeHtml(str) {
   return String(str)
@@ -87,14 +88,34 @@ function renderSorteio(pares) {
 async function carregarEstado() {
   const resp = await fetch("/api/amigo-secreto/estado");
   const data = await resp.json();
-  if (data.ok) renderAmigos(data.amigos);
+  if (data.ok) {
+    versao = data.versao;
+    renderAmigos(data.amigos);
+  }
+}
+
+// Respostas com ?delta=1 trazem só o que mudou; se pulamos alguma versão
+// (outra aba, por exemplo), busca a lista inteira.
+function aplicarDelta(data) {
+  if (data.base !== versao) {
+    carregarEstado();
+    return;
+  }
+  const removidos = new Set(data.removidos);
+  const alterados = new Map(data.alterados.map((a) => [a.id, a]));
+  const amigos = amigosCache
+    .filter((a) => !removidos.has(a.id))
+    .map((a) => alterados.get(a.id) || a)
+    .concat(data.adicionados);
+  versao = data.versao;
+  renderAmigos(amigos);
 }
 
 async function adicionar() {
   const nome = input.value.trim();
 
   try {
-    const resp = await fetch("/api/amigo-secreto/adicionar", {
+    const resp = await fetch("/api/amigo-secreto/adicionar?delta=1", {
       method: "POST",
       headers: { "Content-Type": "application/json" },
       body: JSON.stringify({ nome }),
@@ -106,7 +127,7 @@ async function adicionar() {
       return;
     }
 
-    renderAmigos(data.amigos);
+    aplicarDelta(data);
     input.value = "";
     input.focus();
     renderSorteio([]); // opcional: limpa sorteio quando lista muda
@@ -117,7 +138,7 @@ async function adicionar() {
 
 async function remover(friendId) {
   try {
-    const resp = await fetch("/api/amigo-secreto/remover", {
+    const resp = await fetch("/api/amigo-secreto/remover?delta=1", {
       method: "POST",
       headers: { "Content-Type": "application/json" },
       body: JSON.stringify({ id: friendId }),
@@ -129,7 +150,7 @@ async function remover(friendId) {
       return;
     }
 
-    renderAmigos(data.amigos);
+    aplicarDelta(data);
     renderSorteio([]); // limpa sorteio (lista mudou)
   } catch {
     alert("Falha de conexão com o servidor.");
@@ -155,7 +176,7 @@ async function salvarEdicao() {
   }
 
   try {
-    const resp = await fetch("/api/amigo-secreto/editar", {
+    const resp = await fetch("/api/amigo-secreto/editar?delta=1", {
       method: "POST",
       headers: { "Content-Type": "application/json" },
       body: JSON.stringify({ id: editId, nome }),
@@ -167,7 +188,7 @@ async function salvarEdicao() {
       return;
     }
 
-    renderAmigos(data.amigos);
+    aplicarDelta(data);
     renderSorteio([]); // limpa sorteio (lista mudou)
     closeEditModal();
   } catch {
@@ -201,6 +222,7 @@ async function reiniciar() {
       return;
     }
 
+    versao = data.versao;
     renderAmigos([]);
     renderSorteio([]);
     input.value = "";
@@ -53,6 +53,7 @@ async function novoJogo() {
     const data = await resp.json();
 
     setTexto(data.titulo, data.mensagem);
+    if (data.limite) input.max = data.limite;
     btnReiniciar.disabled = true;
     btnChutar.disabled = false;
     limparCampo();
@@ -69,5 +70,5 @@ input.addEventListener("keydown", (e) => {
 });
 
 // Estado inicial da tela
-setTexto("Jogo do número secreto", "Escolha um número entre 1 e 100");
+setTexto("Jogo do número secreto", `Escolha um número entre 1 e ${input.max}`);
 limparCampo();
@@ -18,12 +18,70 @@ function habilitarReiniciar(habilitar) {
   }
 }
 
+// acima disso o sorteio vem em stream (NDJSON) e a tela mostra só o começo
+const LIMITE_TELA = 1000;
+
+async function sortearStream(quantidade, de, ate) {
+  const resp = await fetch("/api/sorteador/stream", {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ quantidade, de, ate }),
+  });
+
+  if (!resp.ok) {
+    const data = await resp.json();
+    alert(data.erro || "Erro ao sortear.");
+    return;
+  }
+
+  const leitor = resp.body.getReader();
+  const decoder = new TextDecoder();
+  const primeiros = [];
+  let resto = "";
+  let recebidos = 0;
+  let completo = false;
+
+  for (;;) {
+    const { done, value } = await leitor.read();
+    if (done) break;
+    resto += decoder.decode(value, { stream: true });
+
+    const linhas = resto.split("\n");
+    resto = linhas.pop();
+    for (const linha of linhas) {
+      if (!linha) continue;
+      const item = JSON.parse(linha);
+      if (!Array.isArray(item)) {
+        completo = !!item.ok;
+        continue;
+      }
+      recebidos += item.length;
+      if (primeiros.length < LIMITE_TELA) primeiros.push(...item.slice(0, LIMITE_TELA - primeiros.length));
+    }
+    setResultado(`Sorteando... ${recebidos} de ${quantidade}`);
+  }
+
+  if (!completo) {
+    alert("O sorteio foi interrompido. Tente de novo.");
+    return;
+  }
+
+  const mais = recebidos - primeiros.length;
+  setResultado(`Números sorteados: ${primeiros.join(", ")}${mais > 0 ? ` … e mais ${mais}` : ""}`);
+  habilitarReiniciar(true);
+}
+
 async function sortear() {
   const quantidade = document.getElementById("quantidade").value;
   const de = document.getElementById("de").value;
   const ate = document.getElementById("ate").value;
 
   try {
+    if (Number(quantidade) > LIMITE_TELA) {
+      await sortearStream(quantidade, de, ate);
+      return;
+    }
+
     const resp = await fetch("/api/sorteador/sortear", {
       method: "POST",
       headers: { "Content-Type": "application/json" },
@@ -8,6 +8,7 @@ const pBot = document.getElementById("pBot");
 const mesaEl = document.getElementById("mesa");
 
 const btnNovo = document.getElementById("btnNovo");
+const selDificuldade = document.getElementById("dificuldade");
 const btnTruco = document.getElementById("btnTruco");
 const btnAceitar = document.getElementById("btnAceitar");
 const btnCorrer = document.getElementById("btnCorrer");
@@ -19,6 +20,7 @@ const controle = document.getElementById("controle");
 let bloqueado = false;
 let timerFimMao = null;
 let jogoIniciado = false;
+let trucoArmado = false; // pedido que vai junto com a próxima carta
 
 const TEMPO_SUMIR_MAO = 280;
 const DELAY_MOSTRAR_USER = 180;
@@ -47,10 +49,30 @@ let estado = {
   pedido: null,
   manilha: null,
   vez: "user",
+  pode_pedir: true,
 };
 
+// variantes AVIF/WebP e sprite das cartas geradas por imagens.py (vem do template)
+const IMAGENS = window.TRUCO_IMAGENS || {};
+const ATLAS = !!window.TRUCO_ATLAS;
+const TAMANHO_CARTA = "(max-width: 820px) 120px, 150px";
+
+function imgCarta(carta) {
+  // ✅ com o sprite o baralho inteiro já veio numa imagem só: virar carta não baixa nada
+  if (ATLAS) return `<span class="carta-sprite" data-carta="${carta}" role="img" aria-label="${carta}"></span>`;
+
+  const v = IMAGENS[carta];
+  if (!v) return `<img src="/img/img-truco/${carta}.png" alt="${carta}">`;
+
+  const fontes = ["avif", "webp"]
+    .filter((fmt) => v[fmt])
+    .map((fmt) => `<source type="image/${fmt}" srcset="${v[fmt]}" sizes="${TAMANHO_CARTA}">`)
+    .join("");
+  return `<picture>${fontes}<img src="${v.png}" alt="${carta}"></picture>`;
+}
+
 function renderCarta(slot, carta) {
-  slot.innerHTML = `<img src="/img/img-truco/${carta}.png" alt="${carta}">`;
+  slot.innerHTML = imgCarta(carta);
 }
 
 function limparMesa() {
@@ -69,7 +91,7 @@ function renderMao(cartas) {
     const botao = document.createElement("button");
     botao.className = "card";
     botao.type = "button";
-    botao.innerHTML = `<img src="/img/img-truco/${carta}.png" alt="${carta}">`;
+    botao.innerHTML = imgCarta(carta);
     botao.onclick = () => jogarCarta(botao, carta);
     mao.appendChild(botao);
   });
@@ -89,10 +111,12 @@ function cancelarTimerFimMao() {
 }
 
 function setEstadoTruco(d) {
+  if (d.nova_mao || d.pedido || d.vez !== "user") trucoArmado = false;
   estado.mao_valor = d.mao_valor ?? estado.mao_valor;
   estado.pedido = d.pedido ?? null;
   estado.manilha = d.manilha ?? estado.manilha;
   estado.vez = d.vez ?? estado.vez;
+  estado.pode_pedir = d.pode_pedir ?? estado.pode_pedir;
 
   maoValorTxt.textContent = `Mão valendo ${estado.mao_valor}`;
   manilhaTxt.textContent = `Manilha: ${estado.manilha || "-"}`;
@@ -133,9 +157,13 @@ function atualizarBotoes() {
   btnCorrer.style.display = "none";
 
   const proximo = proxValor(estado.mao_valor);
+  // depois de um pedido seu, só pode pedir de novo quando o bot aumentar
+  const podePedir = proximo && estado.pode_pedir !== false;
+  if (!podePedir) trucoArmado = false;
   btnTruco.style.display = "inline-block";
-  btnTruco.textContent = proximo ? `Pedir ${proximo}` : "Máximo";
-  btnTruco.disabled = !proximo;
+  btnTruco.textContent = !proximo ? "Máximo" : trucoArmado ? `Cancelar ${proximo}` : `Pedir ${proximo}`;
+  btnTruco.disabled = !podePedir;
+  btnTruco.classList.toggle("armado", trucoArmado);
 }
 
 function mostrarBotTornou(carta) {
@@ -145,7 +173,7 @@ function mostrarBotTornou(carta) {
   limparMesa();
 
   // ✅ agora mostra a carta que o bot tornou
-  cartaBotSlot.innerHTML = `<img src="/img/img-truco/${carta}.png" alt="${carta}">`;
+  renderCarta(cartaBotSlot, carta);
   resultado.textContent = "Bot tornou — responda com uma carta";
 }
 
@@ -161,10 +189,10 @@ async function novoJogo() {
     limparMesa();
     resultado.textContent = "Distribuindo cartas...";
 
-    const r = await fetch("/api/truco/new");
-    const d = await r.json();
+    const dificuldade = selDificuldade ? selDificuldade.value : "normal";
+    const d = await novaPartida(dificuldade);
 
-    if (!r.ok || !d.ok) {
+    if (!d.ok) {
       resultado.textContent = d?.erro || "Falha ao iniciar novo jogo.";
       jogoIniciado = false;
       setModoJogo(false);
@@ -195,171 +223,154 @@ async function novoJogo() {
   }
 }
 
-async function pedirOuAumentar() {
-  if (bloqueado) return;
-
-  cancelarTimerFimMao();
-  bloqueado = true;
-
-  try {
-    // Se bot pediu, o botão vira "Aumentar"
-    if (estado.pedido && estado.pedido.por === "bot") {
-      const r = await fetch("/api/truco/aumentar", { method: "POST" });
-      const d = await r.json();
-
-      if (!r.ok || !d.ok) {
-        resultado.textContent = d?.erro || "Falha ao aumentar.";
-        bloqueado = false;
-        return;
-      }
-
-      if (d.mensagem) resultado.textContent = d.mensagem;
-
-      if (d.nova_mao) {
-        limparMesa();
-        renderCarta(viraSlot, d.vira);
-        renderMao(d.mao_user);
-        setModoJogo(true);
-      }
+// ✅ WebSocket quando der (estado fica no servidor durante a conexão);
+// se não abrir ou cair, tudo volta a ir por fetch
+let ws = null;
+let wsSeq = 0;
+const wsPendentes = new Map();
+
+function conectarWs() {
+  if (!("WebSocket" in window)) return;
+  const proto = location.protocol === "https:" ? "wss" : "ws";
+  const sock = new WebSocket(`${proto}://${location.host}/ws/truco`);
+
+  sock.onopen = () => {
+    ws = sock;
+  };
+  sock.onmessage = (ev) => {
+    const d = JSON.parse(ev.data);
+    const resolver = wsPendentes.get(d.id);
+    if (!resolver) return;
+    wsPendentes.delete(d.id);
+    resolver(d);
+  };
+  sock.onclose = () => {
+    ws = null;
+    wsPendentes.forEach((resolver) => resolver({ ok: false, erro: "Conexão perdida. Tente de novo." }));
+    wsPendentes.clear();
+  };
+}
 
-      setPlacar(d.placar);
-      setEstadoTruco(d);
+function enviarWs(msg) {
+  return new Promise((resolve) => {
+    const id = ++wsSeq;
+    wsPendentes.set(id, resolve);
+    ws.send(JSON.stringify({ ...msg, id }));
+  });
+}
 
-      if (d.bot_iniciou) mostrarBotTornou(d.bot_iniciou);
+async function enviarAcoes(acoes) {
+  if (ws) return enviarWs({ acoes });
 
-      if (d.fim_jogo) {
-        const u = Number(d.placar[0]);
-        const b = Number(d.placar[1]);
-        resultado.textContent = u > b ? "FIM DE JOGO — Você venceu! 🏆" : "FIM DE JOGO — Bot venceu!";
-        bloqueado = true;
-        return;
-      }
-
-      bloqueado = false;
-      return;
-    }
+  const r = await fetch("/api/truco/actions", {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ acoes }),
+  });
+  return r.json();
+}
 
-    // Pedido normal (user)
-    if (estado.vez !== "user") {
-      resultado.textContent = "Você só pode pedir truco na sua vez.";
-      bloqueado = false;
-      return;
-    }
+async function novaPartida(dificuldade) {
+  if (ws) return enviarWs({ novo: dificuldade });
 
-    const r = await fetch("/api/truco/pedir", { method: "POST" });
-    const d = await r.json();
+  const r = await fetch(`/api/truco/new?dificuldade=${encodeURIComponent(dificuldade)}`);
+  return r.json();
+}
 
-    if (!r.ok || !d.ok) {
-      resultado.textContent = d?.erro || "Falha ao pedir.";
-      bloqueado = false;
-      return;
-    }
+function mostrarFimDeJogo(d) {
+  const u = Number(d.placar[0]);
+  const b = Number(d.placar[1]);
+  resultado.textContent = u > b ? "FIM DE JOGO — Você venceu! 🏆" : "FIM DE JOGO — Bot venceu!";
+  bloqueado = true;
+}
 
-    if (d.mensagem) resultado.textContent = d.mensagem;
+// resposta de pedir/aumentar/aceitar/correr (sem carta jogada)
+function mostrarResposta(d) {
+  if (d.mensagem) resultado.textContent = d.mensagem;
 
-    if (d.nova_mao) {
-      limparMesa();
-      renderCarta(viraSlot, d.vira);
-      renderMao(d.mao_user);
-      setModoJogo(true);
-    }
+  if (d.nova_mao) {
+    limparMesa();
+    renderCarta(viraSlot, d.vira);
+    renderMao(d.mao_user);
+    setModoJogo(true);
+  }
 
-    setPlacar(d.placar);
-    setEstadoTruco(d);
+  setPlacar(d.placar);
+  setEstadoTruco(d);
 
-    if (d.bot_iniciou) mostrarBotTornou(d.bot_iniciou);
+  if (d.bot_iniciou) mostrarBotTornou(d.bot_iniciou);
 
-    if (d.fim_jogo) {
-      const u = Number(d.placar[0]);
-      const b = Number(d.placar[1]);
-      resultado.textContent = u > b ? "FIM DE JOGO — Você venceu! 🏆" : "FIM DE JOGO — Bot venceu!";
-      bloqueado = true;
-      return;
-    }
-
-    bloqueado = false;
-  } catch (err) {
-    console.error(err);
-    resultado.textContent = "Erro ao pedir/aumentar.";
-    bloqueado = false;
+  if (d.fim_jogo) {
+    mostrarFimDeJogo(d);
+    return;
   }
+
+  bloqueado = false;
 }
 
-async function aceitarPedido() {
+async function responderPedido(tipo, msgErro) {
   if (bloqueado) return;
 
   cancelarTimerFimMao();
   bloqueado = true;
 
   try {
-    const r = await fetch("/api/truco/aceitar", { method: "POST" });
-    const d = await r.json();
+    const d = await enviarAcoes([{ tipo }]);
 
-    if (!r.ok || !d.ok) {
-      resultado.textContent = d?.erro || "Erro ao aceitar.";
+    if (!d.ok) {
+      resultado.textContent = d?.erro || msgErro;
       bloqueado = false;
       return;
     }
 
-    if (d.mensagem) resultado.textContent = d.mensagem;
-    setPlacar(d.placar);
-    setEstadoTruco(d);
-
-    if (d.bot_iniciou) mostrarBotTornou(d.bot_iniciou);
-    else resultado.textContent = estado.vez === "user" ? "Escolha uma carta" : "Aguarde o bot jogar...";
-
-    bloqueado = false;
+    mostrarResposta(d.eventos[0]);
   } catch (err) {
     console.error(err);
-    resultado.textContent = "Erro ao aceitar.";
+    resultado.textContent = msgErro;
     bloqueado = false;
   }
 }
 
-async function correrPedido() {
+function pedirOuAumentar() {
   if (bloqueado) return;
 
-  cancelarTimerFimMao();
-  bloqueado = true;
-
-  try {
-    const r = await fetch("/api/truco/correr", { method: "POST" });
-    const d = await r.json();
+  // Se bot pediu, o botão vira "Aumentar"
+  if (estado.pedido && estado.pedido.por === "bot") {
+    responderPedido("aumentar", "Falha ao aumentar.");
+    return;
+  }
 
-    if (!r.ok || !d.ok) {
-      resultado.textContent = d?.erro || "Erro ao correr.";
-      bloqueado = false;
-      return;
-    }
+  // Pedido normal (user)
+  if (estado.vez !== "user") {
+    resultado.textContent = "Você só pode pedir truco na sua vez.";
+    return;
+  }
 
-    if (d.mensagem) resultado.textContent = d.mensagem;
+  // ✅ o pedido vai junto com a carta (um request só)
+  trucoArmado = !trucoArmado;
+  resultado.textContent = trucoArmado
+    ? `Pedido de ${proxValor(estado.mao_valor)} armado — jogue uma carta`
+    : "Escolha uma carta";
+  atualizarBotoes();
+}
 
-    if (d.nova_mao) {
-      limparMesa();
-      renderCarta(viraSlot, d.vira);
-      renderMao(d.mao_user);
-      setModoJogo(true);
-    }
+function aceitarPedido() {
+  responderPedido("aceitar", "Erro ao aceitar.");
+}
 
-    setPlacar(d.placar);
-    setEstadoTruco(d);
+function correrPedido() {
+  responderPedido("correr", "Erro ao correr.");
+}
 
-    if (d.bot_iniciou) mostrarBotTornou(d.bot_iniciou);
+function mostrarCartaJogada(botao, carta) {
+  botao.classList.add("jogada");
+  setTimeout(() => botao.remove(), TEMPO_SUMIR_MAO);
 
-    if (d.fim_jogo) {
-      const u = Number(d.placar[0]);
-      const b = Number(d.placar[1]);
-      resultado.textContent = u > b ? "FIM DE JOGO — Você venceu! 🏆" : "FIM DE JOGO — Bot venceu!";
-      bloqueado = true;
-      return;
-    }
+  setTimeout(() => {
+    renderCarta(cartaUserSlot, carta);
+  }, DELAY_MOSTRAR_USER);
 
-    bloqueado = false;
-  } catch (err) {
-    console.error(err);
-    resultado.textContent = "Erro ao correr.";
-    bloqueado = false;
-  }
+  renderCarta(cartaBotSlot, "back");
 }
 
 async function jogarCarta(botao, carta) {
@@ -378,34 +389,41 @@ async function jogarCarta(botao, carta) {
   cancelarTimerFimMao();
   bloqueado = true;
 
-  botao.classList.add("jogada");
-  setTimeout(() => botao.remove(), TEMPO_SUMIR_MAO);
+  const acoes = [{ tipo: "jogar", carta }];
+  if (trucoArmado) acoes.unshift({ tipo: "pedir" });
+  trucoArmado = false;
 
-  setTimeout(() => {
-    cartaUserSlot.innerHTML = `<img src="/img/img-truco/${carta}.png" alt="${carta}">`;
-  }, DELAY_MOSTRAR_USER);
-
-  cartaBotSlot.innerHTML = `<img src="/img/img-truco/back.png" alt="back">`;
+  // sem pedido a carta já sai da mão; com pedido, espera a resposta do bot
+  if (acoes.length === 1) mostrarCartaJogada(botao, carta);
 
   try {
-    const r = await fetch("/api/truco/play", {
-      method: "POST",
-      headers: { "Content-Type": "application/json" },
-      body: JSON.stringify({ carta }),
-    });
-
-    const d = await r.json();
+    let d = await enviarAcoes(acoes);
 
-    if (!r.ok) {
+    if (!d.ok) {
       resultado.textContent = d?.erro || "Falha ao jogar carta.";
       bloqueado = false;
+      atualizarBotoes();
       return;
     }
 
+    if (acoes.length > 1) {
+      const [pedido, jogada] = d.eventos;
+      if (!jogada) {
+        // bot correu ou aumentou: a carta fica na mão
+        mostrarResposta(pedido);
+        return;
+      }
+      if (pedido.mensagem) resultado.textContent = pedido.mensagem;
+      mostrarCartaJogada(botao, carta);
+      d = jogada;
+    } else {
+      d = d.eventos[0];
+    }
+
     setEstadoTruco(d);
 
     setTimeout(() => {
-      cartaBotSlot.innerHTML = `<img src="/img/img-truco/${d.carta_bot}.png" alt="${d.carta_bot}">`;
+      renderCarta(cartaBotSlot, d.carta_bot);
     }, DELAY_REVELAR_BOT);
 
     setTimeout(() => {
@@ -421,10 +439,7 @@ async function jogarCarta(botao, carta) {
 
     timerFimMao = setTimeout(() => {
       if (d.fim_jogo) {
-        const u = Number(d.placar[0]);
-        const b = Number(d.placar[1]);
-        resultado.textContent = u > b ? "FIM DE JOGO — Você venceu! 🏆" : "FIM DE JOGO — Bot venceu!";
-        bloqueado = true;
+        mostrarFimDeJogo(d);
         return;
       }
 
@@ -481,4 +496,5 @@ btnCorrer.addEventListener("click", correrPedido);
 
 // Estado inicial: pré-jogo (controle central)
 setModoJogo(false);
-atualizarBotoes();
\ No newline at end of file
+atualizarBotoes();
+conectarWs();
\ No newline at end of file
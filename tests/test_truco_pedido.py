@@ -0,0 +1,45 @@
+"""Quem pediu por último só pede de novo depois do outro lado aumentar."""
+
+import random
+
+import pytest
+
+from truco.motor import novo_estado
+from truco.partida import JogadaInvalida, PartidaTruco
+
+
+def _mao_forte(bot="guloso"):
+    """Bot é mão com as três manilhas mais fortes (pede truco com certeza)."""
+    g = novo_estado(mao_inicial="bot", rng=random.Random(1), bot=bot)
+    manilhas = [g["manilha"] * 4 + naipe for naipe in range(3)]  # ♣ ♥ ♠
+    livres = [c for c in g["deck"] + g["mao_user"] + g["mao_bot"] if c not in manilhas]
+    g["mao_bot"] = manilhas
+    g["mao_user"] = livres[:3]
+    g["deck"] = livres[3:]
+    return g
+
+
+@pytest.mark.parametrize("bot", ["guloso", "mc"])
+def test_bot_nao_pede_de_novo_depois_do_aceite(bot):
+    g = _mao_forte(bot)
+    partida = PartidaTruco(g, random.Random(2))
+    partida._bot_age(partida._evento(nova_mao=True))
+    assert g["pedido"] == {"por": "bot", "base": 1, "valor": 3}
+
+    evento = partida.aplicar({"tipo": "aceitar"})
+
+    assert g["mao_valor"] == 3
+    assert g["pedido"] is None
+    assert evento["bot_iniciou"] is not None  # tornou em vez de pedir 6
+    assert "bot_pediu" not in evento
+
+
+def test_user_nao_pede_de_novo_antes_do_bot_aumentar():
+    g = _mao_forte()
+    g["mao_inicial"] = g["vez"] = "user"
+    g["ultimo_pedido"] = "user"
+    partida = PartidaTruco(g, random.Random(2))
+
+    with pytest.raises(JogadaInvalida):
+        partida.aplicar({"tipo": "pedir"})
+    assert partida.resposta(partida._evento())["pode_pedir"] is False
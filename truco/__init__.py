@@ -0,0 +1 @@
+"""Truco: motor do jogo e ferramentas offline (simulador)."""
@@ -0,0 +1,156 @@
+"""
+Tabela de equidade das mãos do Truco: chance de vencer a mão para cada
+combinação de cartas, por manilha e por situação (ser mão/pé; resultado da
+primeira rodada). É gerada offline por simulação e carregada uma vez em um
+array de bytes (0..255 = 0%..100%), então a consulta é O(1).
+
+Gerar de novo (ex.: depois de mudar a IA gulosa):
+    python -m truco.equidade --amostras 400 -j 8
+"""
+
+import argparse
+import os
+import random
+import time
+from array import array
+from math import comb
+
+ARQUIVO = os.path.join(os.path.dirname(__file__), "equidade.bin")
+
+N_CARTAS = 24
+N_MANILHAS = 6
+MAOS_3 = comb(N_CARTAS, 3)  # 2024
+MAOS_2 = comb(N_CARTAS, 2)  # 276
+
+# contextos
+# 3 cartas (início da mão): 0 = bot é mão, 1 = bot é pé
+# 2 cartas (depois da 1ª rodada): resultado * 2 + (0 se mão, 1 se pé),
+#   com resultado 0 = ganhou, 1 = perdeu, 2 = empatou
+CTX_3 = 2
+CTX_2 = 6
+TAM_3 = N_MANILHAS * CTX_3 * MAOS_3
+TAM_2 = N_MANILHAS * CTX_2 * MAOS_2
+RESULTADOS = ("bot", "user", "tie")
+
+_tabela = None
+
+
+def indice_mao(cartas):
+    """Índice da combinação (sistema combinatório) de 2 ou 3 cartas."""
+    ordenadas = sorted(cartas)
+    return sum(comb(c, i + 1) for i, c in enumerate(ordenadas))
+
+
+def _posicao(manilha, cartas, ctx):
+    if len(cartas) == 3:
+        return (manilha * CTX_3 + ctx) * MAOS_3 + indice_mao(cartas)
+    return TAM_3 + (manilha * CTX_2 + ctx) * MAOS_2 + indice_mao(cartas)
+
+
+def contexto(n_cartas, eh_mao, primeira=None):
+    """Contexto da tabela; `primeira` é o resultado da 1ª rodada ("bot"/"user"/"tie")."""
+    pe = 0 if eh_mao else 1
+    if n_cartas == 3:
+        return pe
+    return RESULTADOS.index(primeira) * 2 + pe
+
+
+def carregar(caminho=ARQUIVO):
+    """Carrega a tabela (uma vez). Sem arquivo, retorna None."""
+    global _tabela
+    if _tabela is None and os.path.exists(caminho):
+        t = array("B")
+        with open(caminho, "rb") as f:
+            t.frombytes(f.read())
+        if len(t) == TAM_3 + TAM_2:
+            _tabela = t
+    return _tabela
+
+
+def consultar(cartas, manilha, ctx):
+    """Chance (0..1) de vencer a mão, ou None se não houver tabela."""
+    t = _tabela if _tabela is not None else carregar()
+    if t is None:
+        return None
+    return t[_posicao(manilha, cartas, ctx)] / 255
+
+
+# ----------------- GERAÇÃO OFFLINE -----------------
+
+def _estimar(manilha, cartas, ctx, amostras, rng):
+    from truco.mc import jogar_resto
+
+    vira_rank = (manilha - 1) % N_MANILHAS
+    viras = [c for c in range(vira_rank * 4, vira_rank * 4 + 4) if c not in cartas]
+    resto = [c for c in range(N_CARTAS) if c not in cartas]
+
+    if len(cartas) == 3:
+        eh_mao = ctx == 0
+        tricks, n_user = [], 3
+        vez = "bot" if eh_mao else "user"
+    else:
+        eh_mao = ctx % 2 == 0
+        primeira = RESULTADOS[ctx // 2]
+        tricks, n_user = [primeira], 2
+        vez = primeira if primeira != "tie" else ("bot" if eh_mao else "user")
+    mao_inicial = "bot" if eh_mao else "user"
+
+    vitorias = 0
+    for _ in range(amostras):
+        vira = rng.choice(viras)
+        mao_user = rng.sample([c for c in resto if c != vira], n_user)
+        win = jogar_resto(list(cartas), mao_user, None, None, vez, tricks, mao_inicial, manilha)
+        vitorias += win == "bot"
+    return vitorias / amostras
+
+
+def _gerar_manilha(manilha, amostras, seed):
+    from itertools import combinations
+
+    rng = random.Random(f"{seed}:{manilha}")
+    parte_3 = array("B")
+    for ctx in range(CTX_3):
+        for cartas in sorted(combinations(range(N_CARTAS), 3), key=indice_mao):
+            parte_3.append(round(255 * _estimar(manilha, cartas, ctx, amostras, rng)))
+    parte_2 = array("B")
+    for ctx in range(CTX_2):
+        for cartas in sorted(combinations(range(N_CARTAS), 2), key=indice_mao):
+            parte_2.append(round(255 * _estimar(manilha, cartas, ctx, amostras, rng)))
+    return manilha, parte_3, parte_2
+
+
+def gerar(amostras=400, seed=0, processos=None):
+    from concurrent.futures import ProcessPoolExecutor
+
+    partes = {}
+    with ProcessPoolExecutor(max_workers=processos) as pool:
+        futuros = [pool.submit(_gerar_manilha, m, amostras, seed) for m in range(N_MANILHAS)]
+        for futuro in futuros:
+            m, p3, p2 = futuro.result()
+            partes[m] = (p3, p2)
+
+    tabela = array("B")
+    for m in range(N_MANILHAS):
+        tabela.extend(partes[m][0])
+    for m in range(N_MANILHAS):
+        tabela.extend(partes[m][1])
+    return tabela
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera a tabela de equidade das mãos do Truco.")
+    parser.add_argument("--amostras", type=int, default=400, help="simulações por entrada")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-j", "--processos", type=int, default=os.cpu_count())
+    parser.add_argument("-o", "--saida", default=ARQUIVO)
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    tabela = gerar(args.amostras, args.seed, args.processos)
+    with open(args.saida, "wb") as f:
+        f.write(tabela.tobytes())
+    print(f"{len(tabela)} entradas em {time.perf_counter() - t0:.1f}s -> {args.saida}")
+
+
+if __name__ == "__main__":
+    main()
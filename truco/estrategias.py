@@ -0,0 +1,16 @@
+"""
+Estratégias de bot disponíveis (nome -> as 4 decisões). O nome fica salvo
+no estado da partida (g["bot"]) e é o que o simulador/torneio aceitam.
+"""
+
+from truco.motor import BOT_GULOSO
+from truco.mc import BOT_MC
+
+ESTRATEGIAS = {
+    "guloso": BOT_GULOSO,
+    "mc": BOT_MC,
+}
+
+
+def estrategia(nome):
+    return ESTRATEGIAS.get(nome, BOT_GULOSO)
@@ -0,0 +1,116 @@
+"""
+Resolvedor exato do fim da mão (últimas duas rodadas).
+
+Com no máximo 2 cartas por jogador e as mãos conhecidas (uma
+determinização do bot Monte Carlo), o resto da mão é uma árvore minúscula:
+minimax com tabela de transposição resolve em microssegundos.
+
+As cartas entram como força (TRUCO_PODER da manilha), porque cartas de
+mesma força são equivalentes. A chave do cache é um int canônico montado a
+partir das mãos, da carta na mesa, das rodadas já jogadas, de quem começa a
+rodada e de quem é mão.
+"""
+
+from truco.motor import TRUCO_PODER, vencedor_da_mao
+
+FINAIS_CACHE_MAX = 1 << 18
+
+_cache = {}
+_TRICK_COD = {"bot": 1, "user": 2, "tie": 3}
+
+
+def _chave(bot, user, mesa_bot, mesa_user, vez, tricks, mao_inicial):
+    # forças vão de 0 a 10: 4 bits cada, +1 para "vazio" ser 0
+    k = 0
+    for p in bot:
+        k = (k << 4) | (p + 1)
+    k = (k << 4) | 0xF
+    for p in user:
+        k = (k << 4) | (p + 1)
+    k = (k << 2) | len(user)
+    k = (k << 4) | (0 if mesa_bot is None else mesa_bot + 1)
+    k = (k << 4) | (0 if mesa_user is None else mesa_user + 1)
+    for t in tricks:
+        k = (k << 2) | _TRICK_COD[t]
+    k = (k << 2) | len(tricks)
+    k = (k << 1) | (vez == "bot")
+    return (k << 1) | (mao_inicial == "bot")
+
+
+def _sem(mao, p):
+    i = mao.index(p)
+    return mao[:i] + mao[i + 1:]
+
+
+def _fechar_rodada(bot, user, cb, cu, lider, tricks, mao_inicial):
+    if cb > cu:
+        r = vez = "bot"
+    elif cu > cb:
+        r = vez = "user"
+    else:
+        r, vez = "tie", lider
+    tricks = tricks + (r,)
+    win = vencedor_da_mao(list(tricks), mao_inicial)
+    if win is not None:
+        return 1 if win == "bot" else -1
+    return _minimax(bot, user, None, None, vez, tricks, mao_inicial)
+
+
+def _minimax(bot, user, mesa_bot, mesa_user, vez, tricks, mao_inicial):
+    """+1 se o bot vence a mão com jogo perfeito dos dois lados, -1 se perde."""
+    chave = _chave(bot, user, mesa_bot, mesa_user, vez, tricks, mao_inicial)
+    valor = _cache.get(chave)
+    if valor is not None:
+        return valor
+
+    if mesa_bot is not None:
+        # adversário responde à carta do bot (minimiza)
+        valor = min(
+            _fechar_rodada(bot, _sem(user, p), mesa_bot, p, "bot", tricks, mao_inicial)
+            for p in set(user)
+        )
+    elif mesa_user is not None:
+        # bot responde (maximiza)
+        valor = max(
+            _fechar_rodada(_sem(bot, p), user, p, mesa_user, "user", tricks, mao_inicial)
+            for p in set(bot)
+        )
+    elif vez == "bot":
+        valor = max(
+            _minimax(_sem(bot, p), user, p, None, vez, tricks, mao_inicial)
+            for p in set(bot)
+        )
+    else:
+        valor = min(
+            _minimax(bot, _sem(user, p), None, p, vez, tricks, mao_inicial)
+            for p in set(user)
+        )
+
+    if len(_cache) >= FINAIS_CACHE_MAX:
+        _cache.clear()
+    _cache[chave] = valor
+    return valor
+
+
+def resolver(mao_bot, mao_user, mesa_bot, mesa_user, vez, tricks, mao_inicial, manilha):
+    """
+    Valor (+1/-1) de cada carta que o bot pode jogar agora, com as duas mãos
+    conhecidas: {carta: valor}. Se o bot não joga agora, retorna {None: valor}.
+    """
+    poder = TRUCO_PODER[manilha]
+    bot = tuple(sorted(poder[c] for c in mao_bot))
+    user = tuple(sorted(poder[c] for c in mao_user))
+    pb = None if mesa_bot is None else poder[mesa_bot]
+    pu = None if mesa_user is None else poder[mesa_user]
+    tricks = tuple(tricks)
+
+    if pb is None and (pu is not None or vez == "bot"):
+        valores = {}
+        for c in mao_bot:
+            resto = _sem(bot, poder[c])
+            if pu is not None:
+                valores[c] = _fechar_rodada(resto, user, poder[c], pu, "user", tricks, mao_inicial)
+            else:
+                valores[c] = _minimax(resto, user, poder[c], None, vez, tricks, mao_inicial)
+        return valores
+    return {None: _minimax(bot, user, pb, pu, vez, tricks, mao_inicial)}
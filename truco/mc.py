@@ -0,0 +1,179 @@
+"""
+Bot "difícil" do Truco: Monte Carlo com determinização.
+
+A cada decisão o bot sorteia mãos possíveis para o adversário (as cartas
+que ele ainda não viu: baralho de 24 menos vira, mão dele e cartas já
+jogadas), joga o resto da mão com a IA gulosa dos dois lados (depois da
+1ª rodada, resolve o final exatamente com truco/finais.py) e escolhe a
+carta / resposta com maior valor esperado. O trabalho por jogada é limitado
+por MC_AMOSTRAS e MC_TEMPO_MS, para a latência do request continuar
+previsível.
+"""
+
+import random
+import time
+
+from truco.finais import resolver
+from truco.motor import (
+    TRUCO_CARTAS, TRUCO_PODER, vencedor_da_mao, resposta_por_equidade,
+    bot_escolher_resposta, bot_escolher_torno,
+)
+
+MC_AMOSTRAS = 200   # determinizações por decisão (no máximo)
+MC_TEMPO_MS = 30    # orçamento de tempo por decisão
+MC_LIMIAR_PEDIR = 0.66  # chance de vencer a mão a partir da qual pede truco
+MC_LIMIAR_AUMENTAR = 0.75
+MC_BLEFE = 0.04
+
+
+def _desconhecidas(g, extra=None):
+    """Cartas que o bot não viu (podem estar com o adversário ou no monte)."""
+    vistas = set(g["mao_bot"])
+    vistas.add(g["vira"])
+    vistas.update(g["jogadas"])
+    for c in (g["carta_bot_mesa"], g.get("carta_user_mesa"), extra):
+        if c is not None:
+            vistas.add(c)
+    return [c for c in range(len(TRUCO_CARTAS)) if c not in vistas]
+
+
+def jogar_resto(mao_bot, mao_user, mesa_bot, mesa_user, vez, tricks, mao_inicial, manilha, primeira=None):
+    """
+    Joga o resto da mão com a IA gulosa dos dois lados (as listas de mão são
+    consumidas). `primeira` força a próxima carta do bot. Retorna o vencedor.
+    """
+    tricks = list(tricks)
+    while True:
+        if mesa_bot is not None:
+            # bot já tornou: adversário responde
+            lider, cb = "bot", mesa_bot
+            cu = bot_escolher_resposta(mao_user, cb, manilha)
+            mao_user.remove(cu)
+        elif mesa_user is not None:
+            # adversário já tornou: bot responde
+            lider, cu = "user", mesa_user
+            cb = primeira if primeira is not None else bot_escolher_resposta(mao_bot, cu, manilha)
+            mao_bot.remove(cb)
+        elif vez == "bot":
+            lider = "bot"
+            cb = primeira if primeira is not None else bot_escolher_torno(mao_bot, manilha)
+            mao_bot.remove(cb)
+            cu = bot_escolher_resposta(mao_user, cb, manilha)
+            mao_user.remove(cu)
+        else:
+            lider = "user"
+            cu = bot_escolher_torno(mao_user, manilha)
+            mao_user.remove(cu)
+            cb = primeira if primeira is not None else bot_escolher_resposta(mao_bot, cu, manilha)
+            mao_bot.remove(cb)
+        mesa_bot = mesa_user = primeira = None
+
+        poder = TRUCO_PODER[manilha]
+        if poder[cb] > poder[cu]:
+            vez = "bot"
+        elif poder[cu] > poder[cb]:
+            vez = "user"
+        else:
+            vez = lider
+        tricks.append(vez if poder[cb] != poder[cu] else "tie")
+
+        win = vencedor_da_mao(tricks, mao_inicial)
+        if win is not None:
+            return win
+
+
+def avaliar(g, rng=random, carta_user=None, amostras=None, tempo_ms=None):
+    """
+    Chance de vencer a mão para cada carta que o bot pode jogar agora
+    ({carta: prob}). Se não é o bot que joga agora, retorna {None: prob}.
+    `carta_user` é a carta do adversário já na mesa (bot respondendo).
+    """
+    amostras = MC_AMOSTRAS if amostras is None else amostras
+    tempo_ms = MC_TEMPO_MS if tempo_ms is None else tempo_ms
+    mesa_user = carta_user if carta_user is not None else g.get("carta_user_mesa")
+    mesa_bot = g["carta_bot_mesa"]
+
+    bot_joga = mesa_bot is None and (mesa_user is not None or g["vez"] == "bot")
+    candidatas = sorted(set(g["mao_bot"]), key=TRUCO_PODER[g["manilha"]].__getitem__) if bot_joga else [None]
+
+    desconhecidas = _desconhecidas(g, mesa_user)
+    n_user = len(g["mao_user"])
+    vitorias = {c: 0 for c in candidatas}
+    limite = time.perf_counter() + tempo_ms / 1000
+    feitas = 0
+
+    # depois da 1ª rodada o resto da mão é resolvido exatamente (truco/finais.py)
+    exato = len(g["tricks"]) >= 1
+
+    while feitas < amostras:
+        mao_user = rng.sample(desconhecidas, n_user)
+        if exato:
+            valores = resolver(
+                g["mao_bot"], mao_user, mesa_bot, mesa_user,
+                g["vez"], g["tricks"], g["mao_inicial"], g["manilha"],
+            )
+            for c in candidatas:
+                vitorias[c] += valores[c] > 0
+        else:
+            for c in candidatas:
+                win = jogar_resto(
+                    list(g["mao_bot"]), list(mao_user), mesa_bot, mesa_user,
+                    g["vez"], g["tricks"], g["mao_inicial"], g["manilha"], primeira=c,
+                )
+                vitorias[c] += win == "bot"
+        feitas += 1
+        if time.perf_counter() >= limite:
+            break
+
+    return {c: v / feitas for c, v in vitorias.items()}
+
+
+def equidade(g, rng=random, carta_user=None):
+    """Chance de vencer a mão jogando a melhor carta."""
+    return max(avaliar(g, rng, carta_user).values())
+
+
+def _melhor(probs):
+    # empates ficam com a carta mais fraca (candidatas vêm em ordem de força)
+    melhor, melhor_p = None, -1.0
+    for carta, p in probs.items():
+        if p > melhor_p:
+            melhor, melhor_p = carta, p
+    return melhor
+
+
+# ----------------- AS 4 DECISÕES -----------------
+
+def mc_torno(g, rng=random):
+    if len(g["mao_bot"]) == 1:
+        return g["mao_bot"][0]
+    return _melhor(avaliar(g, rng))
+
+
+def mc_resposta(g, carta_user, rng=random):
+    if len(g["mao_bot"]) == 1:
+        return g["mao_bot"][0]
+    return _melhor(avaliar(g, rng, carta_user))
+
+
+def mc_deve_pedir(g, rng=random):
+    if g["pedido"] is not None or g["mao_valor"] >= 12:
+        return False
+    if g.get("ultimo_pedido") == "bot":
+        return False  # já pediu: espera o user aumentar (ver bot_deve_pedir_truco)
+    if g["vez"] != "bot" or g["carta_bot_mesa"] is not None:
+        return False
+    return equidade(g, rng) >= MC_LIMIAR_PEDIR or rng.random() < MC_BLEFE
+
+
+def mc_responde_pedido(g, novo_valor, rng=random):
+    """Mesma conta de valor esperado do bot normal, com a equidade simulada."""
+    return resposta_por_equidade(equidade(g, rng), novo_valor, MC_LIMIAR_AUMENTAR)
+
+
+BOT_MC = {
+    "torno": mc_torno,
+    "resposta": mc_resposta,
+    "pedir": mc_deve_pedir,
+    "responder": mc_responde_pedido,
+}
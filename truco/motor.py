@@ -0,0 +1,327 @@
+"""
+Motor do Truco (paulista simplificado): cartas, manilha, IA do bot e estado
+da mão. Puro Python, sem FastAPI nem sessão — usado pelas rotas em app.py e
+pelo simulador.
+
+As funções que sorteiam algo recebem `rng` (padrão: o módulo random), para
+o simulador poder rodar partidas reproduzíveis com random.Random(seed).
+"""
+
+import random
+
+from truco.equidade import consultar as consultar_equidade, contexto as contexto_equidade
+
+TRUCO_NAIPES = ["♣", "♥", "♠", "♦"]  # usado só para montar as cartas/arquivos
+TRUCO_ORDEM = ["Q", "J", "K", "A", "2", "3"]  # ranking base (sem manilha)
+TRUCO_VALORES = [1, 3, 6, 9, 12]  # escada do truco
+
+# ✅ Truco Paulista (manilha): ZAP(♣) > COPAS(♥) > ESPADAS(♠) > OUROS(♦)
+# Para comparar: número MAIOR = mais forte
+TRUCO_FORCA_MANILHA = {"♦": 1, "♠": 2, "♥": 3, "♣": 4}
+
+# Internamente a carta é um int 0..23 (rank * 4 + naipe) e a manilha é o
+# índice do rank em TRUCO_ORDEM. A string "Q♣" só aparece na borda da API.
+TRUCO_CARTAS = [f"{r}{n}" for r in TRUCO_ORDEM for n in TRUCO_NAIPES]
+TRUCO_CARTA_ID = {c: i for i, c in enumerate(TRUCO_CARTAS)}
+
+# TRUCO_PODER[manilha][carta] -> força da carta (maior = mais forte).
+# Não-manilha vale o índice do rank (0..5); manilha vale 6 + força do naipe (7..10).
+TRUCO_PODER = [
+    [
+        6 + TRUCO_FORCA_MANILHA[TRUCO_NAIPES[c % 4]] if c // 4 == m else c // 4
+        for c in range(len(TRUCO_CARTAS))
+    ]
+    for m in range(len(TRUCO_ORDEM))
+]
+
+
+# ----------------- FUNÇÕES BASE -----------------
+
+def prox_valor(atual: int):
+    i = TRUCO_VALORES.index(atual)
+    return TRUCO_VALORES[i + 1] if i < len(TRUCO_VALORES) - 1 else None
+
+def carta_str(carta):
+    # 0 -> "Q♣" (formato usado pelo front e pelos arquivos de imagem)
+    return None if carta is None else TRUCO_CARTAS[carta]
+
+def carta_id(carta):
+    # "Q♣" -> 0 (None se não for carta do baralho)
+    return TRUCO_CARTA_ID.get(carta) if isinstance(carta, str) else None
+
+def cartas_str(cartas):
+    return [TRUCO_CARTAS[c] for c in cartas]
+
+def truco_parse(carta: int):
+    # carta 0..23 -> (rank, naipe), ambos como índice
+    return divmod(carta, 4)
+
+def truco_proxima(rank: int):
+    # manilha = próxima do vira
+    return (rank + 1) % len(TRUCO_ORDEM)
+
+def truco_baralho(rng=random):
+    # baralho limpo (24 cartas)
+    d = list(range(len(TRUCO_CARTAS)))
+    rng.shuffle(d)
+    return d
+
+def truco_poder(carta: int, manilha_rank: int):
+    # manilha sempre ganha de qualquer não-manilha (ver TRUCO_PODER)
+    return TRUCO_PODER[manilha_rank][carta]
+
+def truco_comparar(a: int, b: int, manilha_rank: int):
+    poder = TRUCO_PODER[manilha_rank]
+    pa, pb = poder[a], poder[b]
+    return (pa > pb) - (pa < pb)
+
+
+# ----------------- IA DO BOT -----------------
+
+def bot_escolher_resposta(mao_bot, carta_user, manilha_rank):
+    """
+    Bot tenta ganhar gastando o mínimo:
+    - Se tiver alguma que ganha, joga a menor que ganha
+    - Senão, joga a menor da mão
+    """
+    poder = TRUCO_PODER[manilha_rank]
+    alvo = poder[carta_user]
+    ganhadoras = [c for c in mao_bot if poder[c] > alvo]
+    if ganhadoras:
+        return min(ganhadoras, key=poder.__getitem__)
+    return min(mao_bot, key=poder.__getitem__)
+
+def bot_escolher_torno(mao_bot, manilha_rank):
+    """
+    Quando o bot vai 'tornar' (jogar primeiro na rodada),
+    joga uma carta mediana/baixa pra guardar as fortes.
+    """
+    ordenadas = sorted(mao_bot, key=TRUCO_PODER[manilha_rank].__getitem__)
+    if len(ordenadas) == 3:
+        return ordenadas[1]
+    return ordenadas[0]
+
+# Limiares de decisão sobre a equidade (chance de vencer a mão)
+EQ_PEDIR = 0.66      # pede truco a partir daqui
+EQ_AUMENTAR = 0.75   # aumenta um pedido a partir daqui
+EQ_BLEFE = 0.05      # chance de pedir mesmo com mão fraca
+
+def bot_equidade(g):
+    """
+    Chance do bot vencer a mão no estado atual. Com 3 ou 2 cartas vem da
+    tabela pré-calculada (truco/equidade.bin); com 1 carta é calculada na
+    hora contra todas as cartas que o adversário pode ter.
+    """
+    mao = list(g["mao_bot"])
+    if g["carta_bot_mesa"] is not None:
+        mao.append(g["carta_bot_mesa"])  # carta tornada ainda conta
+    eh_mao = g["mao_inicial"] == "bot"
+    tricks = g["tricks"]
+
+    if len(mao) == 3 and not tricks:
+        p = consultar_equidade(mao, g["manilha"], contexto_equidade(3, eh_mao))
+    elif len(mao) == 2 and len(tricks) == 1:
+        p = consultar_equidade(mao, g["manilha"], contexto_equidade(2, eh_mao, tricks[0]))
+    elif len(mao) == 1:
+        return _equidade_ultima(g, mao[0])
+    else:
+        p = None
+
+    if p is None:
+        # sem tabela: estimativa grosseira pela força das cartas
+        poder = TRUCO_PODER[g["manilha"]]
+        p = sum(poder[c] for c in mao) / (10 * len(mao))
+    return p
+
+def _equidade_ultima(g, carta):
+    vistas = set(g["jogadas"])
+    vistas.update((g["vira"], carta))
+    poder = TRUCO_PODER[g["manilha"]]
+    vitorias = total = 0
+    for c in range(len(TRUCO_CARTAS)):
+        if c in vistas:
+            continue
+        if poder[carta] > poder[c]:
+            r = "bot"
+        elif poder[c] > poder[carta]:
+            r = "user"
+        else:
+            r = "tie"
+        vitorias += vencedor_da_mao(g["tricks"] + [r], g["mao_inicial"]) == "bot"
+        total += 1
+    return vitorias / total if total else 0.5
+
+def bot_deve_pedir_truco(g, rng=random):
+    """
+    Bot só pode pedir na vez dele, antes de jogar.
+    Pede se a chance de vencer a mão (tabela de equidade) for boa,
+    e de vez em quando blefa. Se o último pedido foi dele, espera o user
+    aumentar (senão pediria de novo logo depois do user aceitar).
+    """
+    if g["pedido"] is not None:
+        return False
+    if g.get("ultimo_pedido") == "bot":
+        return False
+    if g["mao_valor"] >= 12:
+        return False
+    if g["vez"] != "bot":
+        return False
+    if g["carta_bot_mesa"] is not None:
+        return False
+
+    return bot_equidade(g) >= EQ_PEDIR or rng.random() < EQ_BLEFE
+
+def bot_responde_pedido(g, novo_valor, rng=random):
+    """
+    Bot decide se aceita, corre ou aumenta pelo valor esperado:
+    correr perde o valor anterior ao pedido, aceitar vale
+    (2p - 1) * novo_valor e aumentar vale o mesmo no próximo degrau.
+    """
+    return resposta_por_equidade(bot_equidade(g), novo_valor)
+
+def resposta_por_equidade(p, novo_valor, limiar_aumentar=EQ_AUMENTAR):
+    anterior = TRUCO_VALORES[TRUCO_VALORES.index(novo_valor) - 1]
+    opcoes = {"correr": -anterior, "aceitar": (2 * p - 1) * novo_valor}
+
+    proximo = prox_valor(novo_valor)
+    if proximo is not None and p >= limiar_aumentar:
+        opcoes["aumentar"] = (2 * p - 1) * proximo
+    return max(opcoes, key=opcoes.get)
+
+
+# Estratégia = as 4 decisões do bot, sempre olhando o estado `g` do ponto de
+# vista do bot ("mao_bot" é a mão dele). Outras estratégias ficam em
+# truco/estrategias.py.
+
+def _guloso_torno(g, rng=random):
+    return bot_escolher_torno(g["mao_bot"], g["manilha"])
+
+def _guloso_resposta(g, carta_user, rng=random):
+    return bot_escolher_resposta(g["mao_bot"], carta_user, g["manilha"])
+
+BOT_GULOSO = {
+    "torno": _guloso_torno,
+    "resposta": _guloso_resposta,
+    "pedir": bot_deve_pedir_truco,
+    "responder": bot_responde_pedido,
+}
+
+
+# ----------------- ESTADO DO JOGO -----------------
+
+def novo_estado(placar_user=0, placar_bot=0, mao_inicial="user", rng=random, bot="guloso"):
+    deck = truco_baralho(rng)
+    vira = deck.pop()
+    manilha = truco_proxima(vira // 4)
+
+    g = {
+        "deck": deck,
+        "vira": vira,
+        "manilha": manilha,
+
+        "mao_user": [deck.pop() for _ in range(3)],
+        "mao_bot": [deck.pop() for _ in range(3)],
+
+        "placar_user": placar_user,
+        "placar_bot": placar_bot,
+
+        "tricks": [],                 # "user" / "bot" / "tie"
+        "mao_inicial": mao_inicial,   # quem é "mão" desta mão
+        "vez": mao_inicial,           # quem joga agora (se "bot", ele pode tornar)
+        "carta_bot_mesa": None,       # quando bot torna, carta fica na mesa
+        "jogadas": [],                # cartas já jogadas nesta mão (as duas mãos)
+
+        # ✅ quem iniciou a rodada atual (importante para empates)
+        "rodada_iniciador": mao_inicial,
+
+        "mao_valor": 1,
+        "pedido": None,               # {"por":"bot"/"user", "base":X, "valor":Y}
+        "ultimo_pedido": None,        # quem pediu/aumentou por último: só pede de novo depois do outro
+        "finalizado": False,
+        "bot": bot,                   # estratégia do bot (ver truco/estrategias.py)
+    }
+    return g
+
+def placar_list(g):
+    return [g["placar_user"], g["placar_bot"]]
+
+def fim_de_jogo(g):
+    return g["placar_user"] >= 12 or g["placar_bot"] >= 12
+
+def mensagem_fim(g):
+    if g["placar_user"] >= 12:
+        return "FIM DE JOGO — Você venceu! 🏆"
+    return "FIM DE JOGO — Bot venceu!"
+
+def vencedor_da_mao(tricks, mao_inicial):
+    """
+    Regras resumidas:
+    - Quem ganhar 2 rodadas vence a mão
+    - Empate + vitória em alguma das duas primeiras já decide
+    - 3 empates => mão (mao_inicial) vence
+    """
+    u = tricks.count("user")
+    b = tricks.count("bot")
+    t = tricks.count("tie")
+
+    if u >= 2:
+        return "user"
+    if b >= 2:
+        return "bot"
+
+    if len(tricks) >= 2 and t >= 1:
+        if u == 1 and b == 0:
+            return "user"
+        if b == 1 and u == 0:
+            return "bot"
+
+    if len(tricks) == 3:
+        if u > b:
+            return "user"
+        if b > u:
+            return "bot"
+        return mao_inicial
+
+    return None
+
+def bot_torna_se_precisar(g, rng=random, bot=BOT_GULOSO):
+    """
+    Se for vez do bot, sem pedido pendente, ele pode:
+    - pedir truco (antes de jogar)
+    - ou tornar (jogar carta na mesa)
+    Retorna a carta tornada (ou None).
+    """
+    if g["finalizado"]:
+        return None
+    if g["pedido"] is not None:
+        return None
+    if g["vez"] != "bot":
+        return None
+
+    # pedir truco antes de jogar
+    if bot["pedir"](g, rng):
+        proximo = prox_valor(g["mao_valor"])
+        if proximo:
+            g["pedido"] = {"por": "bot", "base": g["mao_valor"], "valor": proximo}
+            g["ultimo_pedido"] = "bot"
+            # continua sendo vez do bot, mas aguardando resposta do user
+            return None
+
+    # se já tem carta na mesa, só garante que a vez é do user
+    if g["carta_bot_mesa"] is not None:
+        g["vez"] = "user"
+        return g["carta_bot_mesa"]
+
+    if not g["mao_bot"]:
+        return None
+
+    carta = bot["torno"](g, rng)
+    g["mao_bot"].remove(carta)
+    g["carta_bot_mesa"] = carta
+
+    # ✅ rodada foi iniciada pelo bot
+    g["rodada_iniciador"] = "bot"
+
+    # agora você responde
+    g["vez"] = "user"
+    return carta
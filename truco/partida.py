@@ -0,0 +1,323 @@
+"""
+Máquina de estados de uma partida de Truco (user x bot).
+
+Cada ação do jogador é uma transição: PartidaTruco.aplicar(acao) muda o
+estado `g` (o mesmo dict que fica na sessão), deixa o bot reagir e devolve
+um evento. PartidaTruco.resposta(evento) monta o JSON da API. As rotas em
+app.py, o simulador e os benchmarks passam todos por aqui.
+
+Ações (no JSON da API a carta pode vir como texto, "4♣"):
+    {"tipo": "pedir"}                 user pede truco/6/9/12
+    {"tipo": "aumentar"}              user aumenta o pedido do bot
+    {"tipo": "aceitar"}               user aceita o pedido do bot
+    {"tipo": "correr"}                user corre do pedido do bot
+    {"tipo": "jogar", "carta": 7}     user joga uma carta (int, ver motor)
+"""
+
+import copy
+import random
+
+from truco.estrategias import estrategia
+from truco.motor import (
+    TRUCO_ORDEM, prox_valor, carta_id, carta_str, cartas_str, truco_comparar, novo_estado,
+    placar_list, fim_de_jogo, mensagem_fim, vencedor_da_mao, bot_torna_se_precisar,
+)
+
+
+class JogadaInvalida(Exception):
+    """Ação que não vale no estado atual (vira um 400 com a mensagem)."""
+
+
+RESULTADO_RODADA = {1: "venceu", -1: "perdeu", 0: "empatou"}
+
+
+class PartidaTruco:
+    def __init__(self, g, rng=random):
+        self.g = g
+        self.rng = rng
+
+    @classmethod
+    def nova(cls, bot="guloso", mao_inicial="user", rng=random):
+        partida = cls(novo_estado(mao_inicial=mao_inicial, rng=rng, bot=bot), rng)
+        return partida, partida._bot_age(partida._evento(nova_mao=True))
+
+    @property
+    def bot(self):
+        return estrategia(self.g["bot"])
+
+    # ----------------- TRANSIÇÃO -----------------
+
+    def aplicar(self, acao):
+        tipo = acao.get("tipo")
+        manipulador = self._ACOES.get(tipo)
+        if manipulador is None:
+            raise JogadaInvalida("Ação inválida.")
+
+        g = self.g
+        if g["finalizado"] or fim_de_jogo(g):
+            g["finalizado"] = True
+            return self._evento(fim_jogo=True)
+        return manipulador(self, acao)
+
+    def _pedir(self, acao):
+        g = self.g
+        if g["pedido"] is not None:
+            raise JogadaInvalida("Já existe um pedido pendente.")
+        if g["vez"] != "user":
+            raise JogadaInvalida("Você só pode pedir na sua vez.")
+        if g.get("ultimo_pedido") == "user":
+            raise JogadaInvalida("Você já pediu; só pode pedir de novo depois do bot aumentar.")
+        proximo = prox_valor(g["mao_valor"])
+        if not proximo:
+            raise JogadaInvalida("Mão já está no máximo.")
+        g["ultimo_pedido"] = "user"
+        return self._bot_responde(proximo, ganho_se_correr=g["mao_valor"])
+
+    def _aumentar(self, acao):
+        g = self.g
+        self._exigir_pedido_do_bot("aumentar")
+        valor_atual = g["pedido"]["valor"]
+        proximo = prox_valor(valor_atual)
+        if not proximo:
+            raise JogadaInvalida("Não dá para aumentar mais.")
+        g["ultimo_pedido"] = "user"
+        return self._bot_responde(proximo, ganho_se_correr=valor_atual)
+
+    def _aceitar(self, acao):
+        g = self.g
+        self._exigir_pedido_do_bot("aceitar")
+        g["mao_valor"] = g["pedido"]["valor"]
+        g["pedido"] = None
+        return self._bot_age(self._evento(mensagem=f"Aceito! Mão valendo {g['mao_valor']}."))
+
+    def _correr(self, acao):
+        g = self.g
+        self._exigir_pedido_do_bot("correr")
+        base = g["pedido"]["base"]
+        g["pedido"] = None
+        return self._encerrar_mao("bot", base, f"Você correu! Bot ganhou {base} ponto(s).")
+
+    def _jogar(self, acao):
+        g = self.g
+        if g["pedido"] is not None:
+            raise JogadaInvalida("Responda ao pedido (Aceitar/Correr/Aumentar) antes de jogar.")
+        if g["vez"] != "user":
+            raise JogadaInvalida("Espere o bot jogar.")
+        carta_user = acao.get("carta")
+        if carta_user is None or carta_user not in g["mao_user"]:
+            raise JogadaInvalida("Carta inválida.")
+        if g["carta_bot_mesa"] is None and not g["mao_bot"]:
+            raise JogadaInvalida("Bot sem carta disponível.")
+
+        # ✅ quem iniciou a rodada: bot se já tinha tornado, senão user
+        g["rodada_iniciador"] = "bot" if g["carta_bot_mesa"] is not None else "user"
+        g["mao_user"].remove(carta_user)
+
+        if g["carta_bot_mesa"] is not None:
+            carta_bot = g["carta_bot_mesa"]
+            g["carta_bot_mesa"] = None
+        else:
+            carta_bot = self.bot["resposta"](g, carta_user, self.rng)
+            g["mao_bot"].remove(carta_bot)
+        g["jogadas"] += [carta_user, carta_bot]
+
+        r = truco_comparar(carta_user, carta_bot, g["manilha"])
+        vencedor_rodada = "user" if r == 1 else ("bot" if r == -1 else "tie")
+        g["tricks"].append(vencedor_rodada)
+        # quem ganhou torna a próxima; empate mantém o iniciador
+        g["vez"] = g["rodada_iniciador"] if vencedor_rodada == "tie" else vencedor_rodada
+
+        rodada = {"sua_carta": carta_user, "carta_bot": carta_bot, "resultado": RESULTADO_RODADA[r]}
+
+        win = vencedor_da_mao(g["tricks"], g["mao_inicial"])
+        if win is not None:
+            evento = self._encerrar_mao(win, g["mao_valor"])
+        else:
+            # se a vez passou pro bot ele torna (ou pede truco)
+            evento = self._bot_age(self._evento())
+        evento["rodada"] = rodada
+        return evento
+
+    _ACOES = {
+        "pedir": _pedir,
+        "aumentar": _aumentar,
+        "aceitar": _aceitar,
+        "correr": _correr,
+        "jogar": _jogar,
+    }
+
+    # ----------------- PARTES COMUNS -----------------
+
+    def _exigir_pedido_do_bot(self, verbo):
+        pedido = self.g["pedido"]
+        if pedido is None or pedido["por"] != "bot":
+            raise JogadaInvalida(f"Não há pedido do bot para {verbo}.")
+
+    def _bot_responde(self, valor, ganho_se_correr):
+        """O user pediu `valor`; o bot corre, aceita ou aumenta."""
+        g = self.g
+        acao = self.bot["responder"](g, valor, self.rng)
+        proximo = prox_valor(valor)
+
+        if acao == "correr":
+            g["pedido"] = None
+            evento = self._encerrar_mao(
+                "user", ganho_se_correr, f"Bot correu! Você ganhou {ganho_se_correr} ponto(s)."
+            )
+            evento["resposta_bot"] = "correr"
+            return evento
+
+        if acao == "aceitar" or not proximo:
+            g["mao_valor"] = valor
+            g["pedido"] = None
+            # se o pedido do user veio em cima de um pedido do bot, o bot ainda joga
+            evento = self._bot_age(self._evento(mensagem=f"Bot aceitou! Mão valendo {g['mao_valor']}."))
+            evento["resposta_bot"] = "aceitar"
+            return evento
+
+        # aumentar: o bot aceitou `valor` e pede o próximo
+        g["pedido"] = {"por": "bot", "base": valor, "valor": proximo}
+        g["ultimo_pedido"] = "bot"
+        evento = self._evento(mensagem=f"Bot aumentou pra {proximo}! Aceita, corre ou aumenta?")
+        evento["resposta_bot"] = "aumentar"
+        return evento
+
+    def _encerrar_mao(self, vencedor, pontos, mensagem=None):
+        """Soma os pontos, encerra a partida ou começa a próxima mão."""
+        g = self.g
+        g["placar_" + vencedor] += pontos
+        fim = {"vencedor": vencedor, "pontos": pontos}
+
+        if fim_de_jogo(g):
+            g["finalizado"] = True
+            evento = self._evento(fim_jogo=True)
+            evento["fim_mao"] = fim
+            return evento
+
+        # ✅ quem ganhou a mão é mão na próxima
+        self.g = novo_estado(
+            placar_user=g["placar_user"], placar_bot=g["placar_bot"],
+            mao_inicial=vencedor, rng=self.rng, bot=g["bot"],
+        )
+        evento = self._bot_age(self._evento(mensagem=mensagem, nova_mao=True))
+        evento["fim_mao"] = fim
+        return evento
+
+    def _bot_age(self, evento):
+        """Se a vez é do bot ele pede truco ou torna; anota isso no evento."""
+        g = self.g
+        if g["vez"] != "bot" or g["pedido"] is not None or g["finalizado"]:
+            return evento
+        evento["bot_iniciou"] = bot_torna_se_precisar(g, self.rng, self.bot)
+        if g["pedido"] is not None:
+            evento["bot_pediu"] = g["pedido"]["valor"]
+        return evento
+
+    def _evento(self, mensagem=None, nova_mao=False, fim_jogo=False):
+        return {
+            "mensagem": mensagem,
+            "nova_mao": nova_mao,
+            "fim_jogo": fim_jogo,
+            "bot_iniciou": None,
+            "rodada": None,
+        }
+
+    # ----------------- SERIALIZAÇÃO -----------------
+
+    def resposta(self, evento):
+        """JSON da API para o estado atual + o evento da última transição."""
+        g = self.g
+        d = {
+            "ok": True,
+            "placar": placar_list(g),
+            "mao_valor": g["mao_valor"],
+            "pedido": g["pedido"],
+            "manilha": TRUCO_ORDEM[g["manilha"]],
+            "vez": g["vez"],
+            # o botão de pedir some depois de um pedido do user, até o bot aumentar
+            "pode_pedir": g["pedido"] is None and g.get("ultimo_pedido") != "user" and g["mao_valor"] < 12,
+            "fim_jogo": evento["fim_jogo"],
+            "nova_mao": evento["nova_mao"],
+            "bot_iniciou": carta_str(evento["bot_iniciou"]),
+        }
+        rodada = evento["rodada"]
+        if rodada is not None:
+            d["sua_carta"] = carta_str(rodada["sua_carta"])
+            d["carta_bot"] = carta_str(rodada["carta_bot"])
+            d["resultado_rodada"] = rodada["resultado"]
+        if evento["nova_mao"]:
+            d["vira"] = carta_str(g["vira"])
+            d["mao_user"] = cartas_str(g["mao_user"])
+        if evento["fim_jogo"]:
+            d["mensagem"] = mensagem_fim(g)
+        elif evento["mensagem"]:
+            d["mensagem"] = evento["mensagem"]
+        return d
+
+
+# ----------------- LOTE (API) -----------------
+# Funções puras: recebem e devolvem dados, então rodam tanto na rota quanto
+# num pool de threads/processos (ver execucao.py).
+
+MAX_ACOES_LOTE = 8
+
+
+def acao_do_json(item):
+    if not isinstance(item, dict):
+        raise JogadaInvalida("Ação inválida.")
+    acao = {"tipo": item.get("tipo")}
+    if acao["tipo"] == "jogar":
+        acao["carta"] = carta_id(item.get("carta"))
+    return acao
+
+
+def _precisa_do_user(evento, g):
+    # depois disso as próximas ações do lote já não fazem sentido
+    return evento["fim_jogo"] or evento["nova_mao"] or g["pedido"] is not None
+
+
+def aplicar_lote(partida, acoes, max_acoes=MAX_ACOES_LOTE):
+    """
+    Aplica uma lista de ações em ordem e para no primeiro evento que pede
+    decisão do user (pedido do bot, mão nova, fim de jogo) ou na primeira
+    ação inválida; "aplicadas" diz quantas entraram. Retorna (json, status).
+    """
+    if not isinstance(acoes, list) or not acoes:
+        return {"ok": False, "erro": "Envie uma lista de ações."}, 400
+    if len(acoes) > max_acoes:
+        return {"ok": False, "erro": f"No máximo {max_acoes} ações por vez."}, 400
+
+    eventos = []
+    erro = None
+    for item in acoes:
+        try:
+            evento = partida.aplicar(acao_do_json(item))
+        except JogadaInvalida as e:
+            erro = str(e)
+            break
+        eventos.append(partida.resposta(evento))
+        if _precisa_do_user(evento, partida.g):
+            break
+
+    if not eventos:
+        return {"ok": False, "erro": erro}, 400
+    d = {"ok": True, "aplicadas": len(eventos), "eventos": eventos}
+    if erro:
+        d["erro"] = erro
+    return d, 200
+
+
+def processar(g, acoes):
+    """
+    aplicar_lote numa cópia de `g` (se a rota desistir por tempo, a sessão
+    fica intacta). Retorna (g novo, json, status).
+    """
+    partida = PartidaTruco(copy.deepcopy(g))
+    d, status = aplicar_lote(partida, acoes)
+    return partida.g, d, status
+
+
+def nova(bot="guloso"):
+    """Partida nova com o user sendo mão. Retorna (g, json)."""
+    partida, evento = PartidaTruco.nova(bot=bot, mao_inicial="user")
+    return partida.g, partida.resposta(evento)
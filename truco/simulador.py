@@ -0,0 +1,215 @@
+"""
+Simulador headless do Truco: partidas completas (até 12 pontos) bot contra
+bot, sem HTTP nem sessão. Serve para medir a força do bot e a velocidade do
+motor. As partidas passam pela mesma PartidaTruco das rotas, com uma
+estratégia jogando no lugar do user.
+
+Os assentos não são simétricos: o "user" pode pedir truco depois de ver a
+carta que o bot tornou, o bot só pede antes de jogar. Por isso simular()
+troca as estratégias de assento a cada duas partidas e devolve os números
+por estratégia (A/B), com as vitórias por assento à parte.
+
+Uso:
+    python -m truco.simulador -n 10000 --seed 42
+"""
+
+import argparse
+import random
+import time
+
+from truco.estrategias import ESTRATEGIAS
+from truco.partida import PartidaTruco
+
+LADOS = ("user", "bot")
+
+
+def nova_estatistica():
+    return {
+        "partidas": 0,
+        "vitorias": {"user": 0, "bot": 0},
+        "maos": 0,
+        "pontos": {"user": 0, "bot": 0},
+        "pedidos": {"user": 0, "bot": 0},
+        "aceites": {"user": 0, "bot": 0},
+        "corridas": {"user": 0, "bot": 0},
+        "aumentos": {"user": 0, "bot": 0},
+        "vitorias_assento": {"user": 0, "bot": 0},
+    }
+
+
+def somar_estatisticas(total, parcial):
+    """Acumula `parcial` em `total` (mesmo formato de nova_estatistica)."""
+    for chave, valor in parcial.items():
+        if isinstance(valor, dict):
+            for lado, n in valor.items():
+                total[chave][lado] += n
+        else:
+            total[chave] += valor
+    return total
+
+
+def _visao_user(g):
+    """
+    Estado do ponto de vista do lado "user", no formato que a IA do bot
+    espera ("bot" = quem decide). Só é chamado na vez do user.
+    """
+    rotulo = {"user": "bot", "bot": "user", "tie": "tie"}
+    pedido = g["pedido"]
+    if pedido is not None:
+        pedido = dict(pedido, por=rotulo[pedido["por"]])
+    return {
+        "pedido": pedido,
+        "ultimo_pedido": rotulo.get(g.get("ultimo_pedido")),
+        "mao_valor": g["mao_valor"],
+        "vez": "bot",
+        "vira": g["vira"],
+        "manilha": g["manilha"],
+        "mao_bot": g["mao_user"],
+        "mao_user": g["mao_bot"],
+        "carta_bot_mesa": None,
+        "carta_user_mesa": g["carta_bot_mesa"],
+        "jogadas": g["jogadas"],
+        "tricks": [rotulo[t] for t in g["tricks"]],
+        "mao_inicial": rotulo[g["mao_inicial"]],
+        "placar_bot": g["placar_user"],
+        "placar_user": g["placar_bot"],
+        "finalizado": g["finalizado"],
+    }
+
+
+def _escolher_acao(g, estrategia, rng):
+    """Próxima ação do lado "user" (jogado por `estrategia`)."""
+    visao = _visao_user(g)
+    pedido = g["pedido"]
+    if pedido is not None:
+        return {"tipo": estrategia["responder"](visao, pedido["valor"], rng)}
+    if estrategia["pedir"](visao, rng):
+        return {"tipo": "pedir"}
+    if g["carta_bot_mesa"] is not None:
+        carta = estrategia["resposta"](visao, g["carta_bot_mesa"], rng)
+    else:
+        carta = estrategia["torno"](visao, rng)
+    return {"tipo": "jogar", "carta": carta}
+
+
+def _anotar(est, acao, evento, pedido_antes):
+    """Estatísticas a partir da ação do user e do evento da partida."""
+    if evento.get("bot_pediu"):
+        est["pedidos"]["bot"] += 1
+    resposta_bot = evento.get("resposta_bot")
+    if resposta_bot:
+        if acao["tipo"] == "pedir":
+            est["pedidos"]["user"] += 1
+        est[{"correr": "corridas", "aceitar": "aceites", "aumentar": "aumentos"}[resposta_bot]]["bot"] += 1
+    if acao["tipo"] in ("aceitar", "correr", "aumentar") and pedido_antes is not None:
+        est[{"correr": "corridas", "aceitar": "aceites", "aumentar": "aumentos"}[acao["tipo"]]]["user"] += 1
+    fim = evento.get("fim_mao")
+    if fim:
+        est["maos"] += 1
+        est["pontos"][fim["vencedor"]] += fim["pontos"]
+
+
+def jogar_partida(estrategias, rng, mao_inicial="user", est=None):
+    """
+    Partida completa até 12 pontos pela PartidaTruco (o mesmo caminho das
+    rotas): o lado "bot" é a estratégia da partida e o lado "user" é jogado
+    por `estrategias["user"]`. Retorna o lado vencedor.
+    """
+    est = est if est is not None else nova_estatistica()
+    partida, evento = PartidaTruco.nova(bot=estrategias["bot"], mao_inicial=mao_inicial, rng=rng)
+    _anotar(est, {"tipo": "novo"}, evento, None)
+    user = ESTRATEGIAS[estrategias["user"]]
+
+    while not partida.g["finalizado"]:
+        g = partida.g
+        acao = _escolher_acao(g, user, rng)
+        pedido_antes = g["pedido"]
+        evento = partida.aplicar(acao)
+        _anotar(est, acao, evento, pedido_antes)
+
+    g = partida.g
+    vencedor = "user" if g["placar_user"] >= 12 else "bot"
+    est["partidas"] += 1
+    est["vitorias"][vencedor] += 1
+    est["vitorias_assento"][vencedor] += 1
+    return vencedor
+
+
+def _trocar_lados(est):
+    """Estatística por assento -> por estratégia quando A sentou no "bot"."""
+    for chave, valor in est.items():
+        if isinstance(valor, dict) and chave != "vitorias_assento":
+            valor["user"], valor["bot"] = valor["bot"], valor["user"]
+    return est
+
+
+def simular(n, estrategia_a="guloso", estrategia_b="guloso", seed=None, inicio=0):
+    """
+    Roda `n` partidas A x B. Quem começa como mão alterna a cada partida e
+    os assentos a cada duas (A de "user" nas partidas 0-1, de "bot" nas 2-3,
+    ...). No resultado, "user" = A e "bot" = B em todos os contadores, menos
+    "vitorias_assento", que conta vitórias do assento "user"/"bot". A partida
+    i usa random.Random(f"{seed}:{inicio + i}"), então qualquer fatia de
+    partidas é reproduzível isoladamente.
+    """
+    seed = random.randrange(2**32) if seed is None else seed
+    est = nova_estatistica()
+    for i in range(inicio, inicio + n):
+        rng = random.Random(f"{seed}:{i}")
+        a_no_bot = (i // 2) % 2 == 1
+        if a_no_bot:
+            estrategias = {"user": estrategia_b, "bot": estrategia_a}
+        else:
+            estrategias = {"user": estrategia_a, "bot": estrategia_b}
+        parcial = nova_estatistica()
+        jogar_partida(estrategias, rng, mao_inicial=LADOS[i % 2], est=parcial)
+        if a_no_bot:
+            _trocar_lados(parcial)
+        somar_estatisticas(est, parcial)
+    return est
+
+
+def relatorio(est, nome_a, nome_b, segundos=None):
+    n = est["partidas"] or 1
+    maos = est["maos"] or 1
+    linhas = [
+        f"partidas: {est['partidas']}  mãos: {est['maos']}",
+        f"A ({nome_a}): {est['vitorias']['user'] / n:.2%} vitórias, "
+        f"{est['pontos']['user'] / maos:.3f} pontos/mão",
+        f"B ({nome_b}): {est['vitorias']['bot'] / n:.2%} vitórias, "
+        f"{est['pontos']['bot'] / maos:.3f} pontos/mão",
+    ]
+    for lado, nome in (("user", "A"), ("bot", "B")):
+        respondidos = est["aceites"][lado] + est["corridas"][lado] + est["aumentos"][lado]
+        taxa = est["aceites"][lado] / respondidos if respondidos else 0.0
+        linhas.append(
+            f"{nome}: {est['pedidos'][lado]} pedidos, aceitou {taxa:.2%} "
+            f"({est['corridas'][lado]} corridas, {est['aumentos'][lado]} aumentos)"
+        )
+    linhas.append(
+        f"por assento: user {est['vitorias_assento']['user'] / n:.2%}, "
+        f"bot {est['vitorias_assento']['bot'] / n:.2%}"
+    )
+    if segundos:
+        linhas.append(f"{segundos:.2f}s — {est['partidas'] / segundos:,.0f} partidas/s")
+    return "\n".join(linhas)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simula partidas de Truco bot contra bot.")
+    parser.add_argument("-n", "--partidas", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("-a", "--estrategia-a", choices=sorted(ESTRATEGIAS), default="guloso")
+    parser.add_argument("-b", "--estrategia-b", choices=sorted(ESTRATEGIAS), default="guloso")
+    args = parser.parse_args(argv)
+
+    seed = random.randrange(2**32) if args.seed is None else args.seed
+    t0 = time.perf_counter()
+    est = simular(args.partidas, args.estrategia_a, args.estrategia_b, seed)
+    dt = time.perf_counter() - t0
+    print(f"seed: {seed}")
+    print(relatorio(est, args.estrategia_a, args.estrategia_b, dt))
+
+
+if __name__ == "__main__":
+    main()
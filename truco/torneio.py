@@ -0,0 +1,145 @@
+"""
+Torneio paralelo entre estratégias de bot do Truco.
+
+Divide as partidas em lotes e roda cada lote em um processo do
+ProcessPoolExecutor. Cada partida usa o próprio RNG derivado de
+(seed, índice da partida), então o resultado é o mesmo com 1 ou 64
+processos. Os parciais são mostrados conforme os lotes terminam.
+
+Uso:
+    python -m truco.torneio guloso guloso -n 200000 --seed 7 -j 8
+"""
+
+import argparse
+import itertools
+import math
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from truco.simulador import ESTRATEGIAS, nova_estatistica, simular, somar_estatisticas
+
+
+def _rodar_lote(estrategia_a, estrategia_b, seed, inicio, n):
+    return simular(n, estrategia_a, estrategia_b, seed=seed, inicio=inicio)
+
+
+def intervalo_confianca(vitorias, n, z=1.96):
+    """Intervalo de Wilson (95% por padrão) para a taxa de vitórias."""
+    if n == 0:
+        return 0.0, 1.0
+    p = vitorias / n
+    denom = 1 + z * z / n
+    centro = (p + z * z / (2 * n)) / denom
+    margem = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denom
+    return centro - margem, centro + margem
+
+
+def resumo(est):
+    """
+    Números agregados de um confronto. Nos contadores "user" = A e
+    "bot" = B (simular já desfaz a troca de assentos).
+    """
+    n = est["partidas"]
+    maos = est["maos"] or 1
+    lo, hi = intervalo_confianca(est["vitorias"]["user"], n)
+    out = {
+        "partidas": n,
+        "taxa_a": est["vitorias"]["user"] / n if n else 0.0,
+        "ic_a": (lo, hi),
+        "pontos_por_mao_a": est["pontos"]["user"] / maos,
+        "pontos_por_mao_b": est["pontos"]["bot"] / maos,
+        "taxa_assento_user": est["vitorias_assento"]["user"] / n if n else 0.0,
+    }
+    for lado, nome in (("user", "a"), ("bot", "b")):
+        respondidos = est["aceites"][lado] + est["corridas"][lado] + est["aumentos"][lado]
+        out["pedidos_" + nome] = est["pedidos"][lado]
+        out["aceite_" + nome] = est["aceites"][lado] / respondidos if respondidos else 0.0
+        out["corrida_" + nome] = est["corridas"][lado] / respondidos if respondidos else 0.0
+        out["aumento_" + nome] = est["aumentos"][lado] / respondidos if respondidos else 0.0
+    return out
+
+
+def confronto(estrategia_a, estrategia_b, n, seed, processos=None, lote=2000, ao_progresso=None):
+    """
+    Joga `n` partidas A x B distribuídas em processos. `ao_progresso(est)`
+    é chamado com o acumulado a cada lote concluído.
+    """
+    total = nova_estatistica()
+    lotes = [(i, min(lote, n - i)) for i in range(0, n, lote)]
+    with ProcessPoolExecutor(max_workers=processos) as pool:
+        futuros = [
+            pool.submit(_rodar_lote, estrategia_a, estrategia_b, seed, inicio, tamanho)
+            for inicio, tamanho in lotes
+        ]
+        for futuro in as_completed(futuros):
+            somar_estatisticas(total, futuro.result())
+            if ao_progresso:
+                ao_progresso(total)
+    return total
+
+
+def torneio(estrategias, n, seed, processos=None, lote=2000, ao_progresso=None):
+    """Todos contra todos (ou espelho, se só houver uma estratégia)."""
+    pares = list(itertools.combinations(estrategias, 2)) or [(estrategias[0], estrategias[0])]
+    resultados = {}
+    for a, b in pares:
+        progresso = (lambda est, a=a, b=b: ao_progresso(a, b, est)) if ao_progresso else None
+        resultados[(a, b)] = confronto(a, b, n, seed, processos, lote, progresso)
+    return resultados
+
+
+def _linha_parcial(a, b, est):
+    r = resumo(est)
+    lo, hi = r["ic_a"]
+    return f"\r{a} x {b}: {r['partidas']:>9,} partidas  A {r['taxa_a']:.2%} [{lo:.2%}, {hi:.2%}]"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Torneio paralelo entre estratégias de bot do Truco.")
+    parser.add_argument("estrategias", nargs="*", metavar="ESTRATEGIA",
+                        help=f"padrão: guloso (opções: {', '.join(sorted(ESTRATEGIAS))})")
+    parser.add_argument("-n", "--partidas", type=int, default=100_000, help="partidas por confronto")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("-j", "--processos", type=int, default=os.cpu_count())
+    parser.add_argument("--lote", type=int, default=2000, help="partidas por tarefa")
+    args = parser.parse_args(argv)
+    estrategias = args.estrategias or ["guloso"]
+    for nome in estrategias:
+        if nome not in ESTRATEGIAS:
+            parser.error(f"estratégia desconhecida: {nome}")
+
+    seed = random.randrange(2**32) if args.seed is None else args.seed
+    print(f"seed: {seed}  processos: {args.processos}")
+
+    def progresso(a, b, est):
+        sys.stdout.write(_linha_parcial(a, b, est))
+        sys.stdout.flush()
+
+    t0 = time.perf_counter()
+    resultados = torneio(estrategias, args.partidas, seed, args.processos, args.lote, progresso)
+    dt = time.perf_counter() - t0
+    print()
+
+    for (a, b), est in resultados.items():
+        r = resumo(est)
+        lo, hi = r["ic_a"]
+        print(f"\n== {a} (A) x {b} (B) ==")
+        print(f"A vence {r['taxa_a']:.2%}  IC95 [{lo:.2%}, {hi:.2%}]")
+        print(f"pontos/mão: A {r['pontos_por_mao_a']:.3f}  B {r['pontos_por_mao_b']:.3f}")
+        print(f"assento user vence {r['taxa_assento_user']:.2%} (A e B se revezam nos assentos)")
+        for nome in ("a", "b"):
+            print(
+                f"{nome.upper()}: {r['pedidos_' + nome]:,} pedidos feitos; respondendo: "
+                f"aceita {r['aceite_' + nome]:.2%}, corre {r['corrida_' + nome]:.2%}, "
+                f"aumenta {r['aumento_' + nome]:.2%}"
+            )
+
+    total = sum(est["partidas"] for est in resultados.values())
+    print(f"\n{total:,} partidas em {dt:.2f}s — {total / dt:,.0f} partidas/s")
+
+
+if __name__ == "__main__":
+    main()